@@ -0,0 +1,107 @@
+"""Decoder option benchmark.
+
+Decodes the same stretch of a video (or image-sequence directory) with every
+backend/threads/hardware/BGR-passthrough combination available here and
+reports sustained frames per second, including the conversion to a PIL image
+that the UI does for each frame, plus the mean latency of random seeks.
+
+    python -m benchmarks.decode footage/clip.mp4 --frames 300 --write
+
+`--write` stores the fastest working combination as the decoder options the
+app loads on start.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict
+from typing import Any, cast
+
+import cv2
+from PIL import Image
+
+from src.video_source import (
+    BACKEND_API,
+    Backend,
+    DecoderOptions,
+    open_video_source,
+    save_decoder_options,
+)
+
+SEEK_SAMPLES = 10
+
+
+def measure(path: str, options: DecoderOptions, frames: int) -> dict[str, Any]:
+    with open_video_source(path, options) as source:
+        decoded = 0
+        start = time.perf_counter()
+        while decoded < frames:
+            frame = source.read()
+            if frame is None:
+                break
+            if options.bgr_passthrough:
+                height, width = frame.shape[:2]
+                Image.frombuffer(
+                    "RGB", (width, height), frame, "raw", "BGR", 0, 1
+                )
+            else:
+                Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            decoded += 1
+        elapsed = time.perf_counter() - start
+
+        rng = random.Random(0)
+        seek_start = time.perf_counter()
+        for _ in range(SEEK_SAMPLES):
+            source.seek_time(rng.uniform(0, max(0.0, source.duration - 1)))
+            source.read()
+        seek_ms = (time.perf_counter() - seek_start) * 1000 / SEEK_SAMPLES
+
+    return {
+        "fps": round(decoded / elapsed, 1) if elapsed > 0 else 0.0,
+        "frames": decoded,
+        "seek_ms": round(seek_ms, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="save the fastest combination as the app's decoder options",
+    )
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    thread_counts = sorted({None, 1, 2, 4, cpus}, key=lambda n: n or 0)
+    results: list[tuple[DecoderOptions, dict[str, Any]]] = []
+
+    for backend, threads, hw, bgr in itertools.product(
+        BACKEND_API, thread_counts, (False, True), (False, True)
+    ):
+        options = DecoderOptions(cast(Backend, backend), threads, hw, bgr)
+        try:
+            result = measure(args.video, options, args.frames)
+        except (OSError, cv2.error) as e:
+            result = {"error": str(e)}
+        results.append((options, result))
+        print(json.dumps({"benchmark": "decode", **asdict(options), **result}))
+
+    working = [(o, r) for o, r in results if r.get("frames")]
+    if not working:
+        sys.exit("No decoder configuration could read the video")
+
+    best_options, best = max(working, key=lambda item: item[1]["fps"])
+    print(json.dumps({"best": asdict(best_options), **best}))
+    if args.write:
+        print(f"Saved to {save_decoder_options(best_options)}")
+
+
+if __name__ == "__main__":
+    main()
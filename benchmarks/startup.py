@@ -0,0 +1,96 @@
+"""Cold-start benchmark for the labeling app.
+
+Each sample runs in a fresh interpreter so module caches do not carry over.
+Results are printed as one JSON object per line, ready to be appended to a
+tracking file:
+
+    python -m benchmarks.startup --runs 10 >> startup_history.jsonl
+
+The window timings need a display; without one only imports are measured.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; prints one JSON object
+SAMPLE = """
+import json, sys, time
+t0 = time.perf_counter()
+import tkinter as tk
+from src.app import VideoLabelingApp
+t_import = time.perf_counter()
+result = {"import_s": t_import - t0}
+try:
+    root = tk.Tk()
+except tk.TclError:
+    result["heavy_modules_at_import"] = sorted(
+        m for m in ("cv2", "numpy", "PIL.Image") if m in sys.modules
+    )
+    print(json.dumps(result))
+    raise SystemExit
+app = VideoLabelingApp(root)
+t_init = time.perf_counter()
+root.update_idletasks()
+t_paint = time.perf_counter()
+heavy = sorted(m for m in ("cv2", "numpy", "PIL.Image") if m in sys.modules)
+root.update()
+t_ready = time.perf_counter()
+root.destroy()
+result.update(
+    init_s=t_init - t_import,
+    first_paint_s=t_paint - t0,
+    ready_s=t_ready - t0,
+    heavy_modules_at_paint=heavy,
+)
+print(json.dumps(result))
+"""
+
+
+def run_sample() -> dict[str, Any]:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", SAMPLE],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    sample: dict[str, Any] = json.loads(output.strip().splitlines()[-1])
+    sample["process_s"] = time.perf_counter() - start
+    return sample
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [run_sample() for _ in range(args.runs)]
+    summary: dict[str, Any] = {
+        "benchmark": "startup",
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "display": bool(os.environ.get("DISPLAY")),
+        "runs": args.runs,
+    }
+    for key in ("import_s", "init_s", "first_paint_s", "ready_s", "process_s"):
+        values = [float(s[key]) for s in samples if key in s]
+        if values:
+            summary[f"{key}_median"] = round(statistics.median(values), 4)
+    for key in ("heavy_modules_at_paint", "heavy_modules_at_import"):
+        if key in samples[-1]:
+            summary[key] = samples[-1][key]
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,75 @@
 import os
 import queue
+import threading
 import tkinter as tk
+from functools import partial
 from tkinter import filedialog, ttk
-from typing import Any, Callable, cast
-
-import cv2
-from cv2.typing import MatLike
-from PIL import Image, ImageTk
-
-from .config import BEHAVIOR_DATA
-from .frame_processor import (
-    CommandQueueElement,
-    FrameProcessor,
-    FrameQueueElement,
-)
-from .record import BehaviorRecord, save_as_csv
-from .types import GroupType, RecordType, Role, Sex, Stage
+from typing import TYPE_CHECKING, Any, cast
+
+from .behavior_tree import BehaviorTree
+from .config import PROFILE_ENV_VAR, get_behavior_taxonomy
+from .frame_queue import FrameQueue
+from .record import BehaviorRecord, FrameStamp, save_as_csv
+from .taxonomy import BehaviorEntry
+from .types import GroupType, Role, Sex, Stage
 from .utils import format_time
 
+# cv2, numpy and PIL dominate import time; they are loaded on first use (or
+# preloaded in the background once the window is up) instead of at startup
+if TYPE_CHECKING:
+    from cv2.typing import MatLike
+    from PIL import Image, ImageTk
+
+    from .dedup import DuplicateFinder, Overlap
+    from .enhance import EnhanceSettings
+    from .frame_processor import CommandQueueElement, FrameProcessor
+    from .jobs import JobScheduler
+    from .media_index import FileSignature, MediaIndex, VideoMetadata
+    from .motion import Activity, MotionAnalyzer
+    from .proxy import ProxyManager
+    from .readahead import ReadAheadCache
+    from .roi import Box, RoiStore
+    from .stabilization import Stabilizer
+    from .tracking import TrackPropagator
+    from .video_source import DecoderOptions
+    from .watchdog import ProfileCapture, StallWatchdog
+    from .zoom import TileCache
+
 VIDEO_WIDTH = 1080
 VIDEO_HEIGHT = 720
 
+# Jog/shuttle keys: j and l step through these rates backwards and
+# forwards, k stops, Left and Right step one frame
+SHUTTLE_SPEEDS = (1.0, 2.0, 4.0, 8.0)
+TRANSPORT_KEYS = ("j", "k", "l", "Left", "Right")
+# Toggles a cProfile/tracemalloc capture, see watchdog.py
+PROFILE_HOTKEY = "F12"
+# Widgets that handle typed keys and arrows themselves; ttk.Entry,
+# ttk.Combobox and ttk.Spinbox are tk.Entry subclasses
+INPUT_WIDGETS = (tk.Entry, tk.Spinbox, tk.Text, tk.Listbox, ttk.Treeview)
+
+ACTIVITY_TRACK_HEIGHT = 24
+
+FRAME_QUEUE_BUDGET_BYTES = 96 * 1024 * 1024
+
+
+def preload_heavy_modules() -> None:
+    """Import the decoding and imaging stack off the UI thread."""
+    from PIL import Image, ImageTk  # noqa: F401
+
+    from . import frame_processor  # noqa: F401
+
+
+def frame_to_image(frame: "MatLike", bgr: bool) -> "Image.Image":
+    from PIL import Image
+
+    if not bgr:
+        return Image.fromarray(frame)
+    # PIL swaps the channels while copying the buffer, which saves the
+    # decoder thread a full cv2.cvtColor pass
+    height, width = frame.shape[:2]
+    return Image.frombuffer("RGB", (width, height), frame, "raw", "BGR", 0, 1)
+
 
 def parse_var_str_as_int(var: tk.StringVar) -> int | None:
     var_as_str = var.get()
@@ -32,83 +81,36 @@ def parse_var_str_as_int(var: tk.StringVar) -> int | None:
             return None
 
 
-def setup_behavior_tree(
-    parent: ttk.Frame,
-    data: dict[str, Any],
-    toggler: Callable[[str, RecordType], None],
-) -> None:
-    """Create a tree view for behaviors with their types."""
-    # Create the main tree view
-    tree = ttk.Treeview(parent, selectmode="browse")
-    tree.pack(fill="both", expand=True)
-
-    # Add scrollbar
-    scrollbar = ttk.Scrollbar(parent, orient="vertical", command=tree.yview)
-    scrollbar.pack(side="right", fill="y")
-    tree.configure(yscrollcommand=scrollbar.set)
-
-    # Configure columns
-    tree["columns"] = ("type",)
-    tree.column("#0", width=400, minwidth=400)
-    tree.column("type", width=100, minwidth=100)
-
-    # Configure headings
-    tree.heading("#0", text="Behavior")
-    tree.heading("type", text="Type")
-
-    # Bind double-click event
-    tree.bind("<Double-1>", lambda e: on_tree_select(e, tree, toggler))
-
-    # Add parent categories and their behaviors
-    for parent_category, behaviors in data.items():
-        # Create parent item
-        parent_item = tree.insert("", "end", text=parent_category, values=("",))
-
-        # Add behaviors under parent
-        for behavior, record_type in behaviors.items():
-            tree.insert(
-                parent_item, "end", text=behavior, values=(record_type,)
-            )
-
-
-def on_tree_select(
-    event: Any, tree: ttk.Treeview, toggler: Callable[[str, RecordType], None]
-) -> None:
-    """Handle selection of a behavior in the tree."""
-    item = tree.selection()[0]
-    behavior_path = get_full_path(tree, item)
-    behavior_type: RecordType = cast(RecordType, tree.item(item)["values"][0])
-
-    if behavior_type:  # Only handle leaf nodes (actual behaviors)
-        print(f"Selected behavior: {behavior_path} ({behavior_type})")
-        toggler(behavior_path, behavior_type)
-
-
-def get_full_path(tree: ttk.Treeview, item: str) -> str:
-    """Get the full path of a tree item."""
-    path: list[str] = []
-    while item:
-        path.append(tree.item(item)["text"])
-        item = tree.parent(item)
-    return "/".join(reversed(path))
-
-
 class VideoLabelingApp:
     def __init__(self, root: tk.Tk) -> None:
         self.root = root
         self.root.title("Herramienta de Etiquetado de Comportamientos")
 
-        self.behaviors = BEHAVIOR_DATA
+        self.taxonomy = get_behavior_taxonomy()
 
         self.video_dir = ""
         self.video_files: list[str] = []
+        self.video_signatures: list[FileSignature] = []
+        self.media_index: MediaIndex | None = None
+        self.probe_thread: threading.Thread | None = None
         self.current_video_index = 0
         self.is_playing = False
         self.playback_speed = 1.0
+        # Signed jog/shuttle rate, 0 when shuttle is not in use
+        self.shuttle_speed = 0.0
         self.current_behavior: str | None = None
         self.behavior_start_time: float | None = None
+        self.behavior_start_frame: int | None = None
+        # Frame currently painted on the canvas; records are stamped with it
+        self.displayed_frame: FrameStamp | None = None
+        # Stabilization the frame on screen was warped by; boxes are
+        # stored in the coordinates of the original frame
+        self.displayed_correction: tuple[float, float, float] | None = None
+        self.records_refresh_pending = False
         self.video_duration = 0.0
         self.video_position = tk.DoubleVar()
+        self.slider_dragging = False
+        self.last_seek_position: float | None = None
         self.behavior_records: list[BehaviorRecord] = []
         self.behavior_buttons: dict[str, ttk.Button] = {}
 
@@ -129,27 +131,118 @@ class VideoLabelingApp:
         self.drag_start_x = 0
         self.drag_start_y = 0
         self.is_dragging = False
+        self.pan_origin = (0.0, 0.0)
+        self.pan_offset = (0, 0)
+        self.view_update_id: str | None = None
+        # Tiles of the zoomed frame, used above 100%
+        self.tile_cache: TileCache | None = None
+        # Canvas size of the frame as drawn, at the current zoom
+        self.frame_extent = (0.0, 0.0)
+
+        # Boxes of tagged animals; Shift+drag draws one
+        self.rois: RoiStore | None = None
+        self.roi_start: tuple[float, float] | None = None
+        # Trackers following each tag forwards from its last drawn box
+        self.propagators: dict[str, TrackPropagator] = {}
 
         # Threading related attributes
         self.frame_processor: FrameProcessor | None = None
-        self.frame_queue: queue.Queue[FrameQueueElement] = queue.Queue(
-            maxsize=10
-        )
+        self.decoder_options: DecoderOptions | None = None
+        self.proxy_manager: ProxyManager | None = None
+        self.playing_proxy = False
+        self.readahead: ReadAheadCache | None = None
+        self.playing_local_copy = False
+        # Per-video analysis running in the background, see jobs.py
+        self.jobs: JobScheduler | None = None
+        self.motion_analyzer: MotionAnalyzer | None = None
+        # Normalized motion activity of the current video, once analysed
+        self.activity: Activity | None = None
+        self.activity_poll_id: str | None = None
+        self.stabilizer: Stabilizer | None = None
+        # Videos of the playlist that repeat content found elsewhere
+        self.duplicate_finder: DuplicateFinder | None = None
+        self.overlap_thread: threading.Thread | None = None
+        self.overlaps: list[Overlap] = []
+        self.playlist_flags: dict[str, str] = {}
+        self.stabilization_poll_id: str | None = None
+        # Murky-water filters and the window that adjusts them
+        self.enhance_settings: EnhanceSettings | None = None
+        self.enhance_window: tk.Toplevel | None = None
+        self.enhance_vars: dict[str, tk.DoubleVar] = {}
+        # Bounded by bytes: a 4K frame weighs as much as dozens of 720p ones
+        self.frame_queue = FrameQueue(FRAME_QUEUE_BUDGET_BYTES, "drop_oldest")
         self.command_queue: queue.Queue[CommandQueueElement] = queue.Queue()
 
+        # Diagnostics, set up once the window is up
+        self.watchdog: StallWatchdog | None = None
+        self.profiler: ProfileCapture | None = None
+        self.profile_stop_id: str | None = None
+
         # For UI updates
         self.current_frame: MatLike | None = None
         self.photo_image: ImageTk.PhotoImage | None = None
 
         self.setup_ui()
 
+        # Build everything that is not needed for the first paint afterwards
+        self.secondary_window_ready = False
+        self.root.after(0, self.finish_startup)
+
         # Schedule frame updates
         self.root.after(10, self.check_frame_queue)
 
+    def finish_startup(self) -> None:
+        # Flush pending geometry and redraws so the main window shows first
+        self.root.update_idletasks()
+        threading.Thread(target=preload_heavy_modules, daemon=True).start()
+        self.ensure_secondary_window()
+        self.start_diagnostics()
+
+    def start_diagnostics(self) -> None:
+        from .watchdog import ProfileCapture, StallWatchdog
+
+        self.watchdog = StallWatchdog(
+            self.root, context=lambda: f"{self.frame_queue.stats()}"
+        )
+        self.watchdog.start()
+
+        self.profiler = ProfileCapture()
+        self.root.bind_all(f"<{PROFILE_HOTKEY}>", self.toggle_profiling)
+        window = os.environ.get(PROFILE_ENV_VAR)
+        if window:
+            try:
+                self.start_profiling(float(window))
+            except ValueError:
+                print(f"Ignoring {PROFILE_ENV_VAR}={window!r}: not seconds")
+
+    def toggle_profiling(self, _: Any = None) -> None:
+        if self.profiler is not None and self.profiler.active:
+            self.stop_profiling()
+        else:
+            self.start_profiling()
+
+    def start_profiling(self, seconds: float | None = None) -> None:
+        from .watchdog import PROFILE_WINDOW_SECONDS
+
+        if self.profiler is None or self.profiler.active:
+            return
+        self.profiler.start()
+        self.profile_stop_id = self.root.after(
+            int((seconds or PROFILE_WINDOW_SECONDS) * 1000),
+            self.stop_profiling,
+        )
+
+    def stop_profiling(self) -> None:
+        if self.profile_stop_id is not None:
+            self.root.after_cancel(self.profile_stop_id)
+            self.profile_stop_id = None
+        if self.profiler is not None:
+            self.profiler.stop()
+
     def setup_behaviour_buttons(self, target_frame: ttk.Frame) -> None:
-        setup_behavior_tree(
+        self.behavior_tree = BehaviorTree(
             target_frame,
-            self.behaviors,
+            self.taxonomy,
             toggler=self.toggle_behavior,
         )
 
@@ -184,10 +277,10 @@ class VideoLabelingApp:
 
         # Create scrollbars
         self.h_scrollbar = ttk.Scrollbar(
-            self.canvas_frame, orient=tk.HORIZONTAL, command=self.canvas.xview
+            self.canvas_frame, orient=tk.HORIZONTAL, command=self.on_xscroll
         )
         self.v_scrollbar = ttk.Scrollbar(
-            self.canvas_frame, orient=tk.VERTICAL, command=self.canvas.yview
+            self.canvas_frame, orient=tk.VERTICAL, command=self.on_yscroll
         )
 
         # Configure canvas to work with scrollbars
@@ -214,6 +307,11 @@ class VideoLabelingApp:
         self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
 
+        # Shift+drag draws the box of the tag in "Tag" on this frame, and
+        # Shift+right click hides it from this frame on
+        self.canvas.bind("<Shift-Button-1>", self.on_roi_start)
+        self.canvas.bind("<Shift-Button-3>", self.on_roi_hide)
+
         self.time_frame = ttk.Frame(self.top_frame)
         self.time_frame.pack(fill=tk.X, padx=10)
 
@@ -231,6 +329,13 @@ class VideoLabelingApp:
         self.time_slider.bind("<ButtonRelease-1>", self.slider_released)
         self.time_slider.pack(fill=tk.X, padx=10)
 
+        # Motion activity along the slider; idle stretches are drawn grey
+        self.activity_canvas = tk.Canvas(
+            self.top_frame, height=ACTIVITY_TRACK_HEIGHT, highlightthickness=0
+        )
+        self.activity_canvas.pack(fill=tk.X, padx=10)
+        self.activity_canvas.bind("<Configure>", self.draw_activity)
+
         self.total_time_label = ttk.Label(self.time_frame, text="00:00")
         self.total_time_label.pack(side=tk.RIGHT)
 
@@ -252,6 +357,12 @@ class VideoLabelingApp:
         )
         self.next_button.pack(side=tk.LEFT)
 
+        self.playlist_menu = ttk.Combobox(
+            self.controls_frame, state="readonly", width=40
+        )
+        self.playlist_menu.pack(side=tk.LEFT)
+        self.playlist_menu.bind("<<ComboboxSelected>>", self.on_playlist_select)
+
         self.speed_var = tk.StringVar(value="1.0")
         self.speed_menu = ttk.Combobox(
             self.controls_frame,
@@ -262,6 +373,54 @@ class VideoLabelingApp:
         self.speed_menu.pack(side=tk.LEFT)
         self.speed_menu.bind("<<ComboboxSelected>>", self.change_speed)
 
+        # Play low-resolution proxies, built in the background
+        self.use_proxies_var = tk.BooleanVar(value=False)
+        self.proxy_checkbutton = ttk.Checkbutton(
+            self.controls_frame,
+            text="Proxy",
+            variable=self.use_proxies_var,
+            command=self.on_proxy_toggle,
+        )
+        self.proxy_checkbutton.pack(side=tk.LEFT, padx=5)
+
+        # Copy videos on network shares to local disk ahead of playback
+        self.use_local_cache_var = tk.BooleanVar(value=False)
+        self.local_cache_checkbutton = ttk.Checkbutton(
+            self.controls_frame,
+            text="Caché local",
+            variable=self.use_local_cache_var,
+            command=self.on_local_cache_toggle,
+        )
+        self.local_cache_checkbutton.pack(side=tk.LEFT, padx=5)
+
+        # Jump over stretches without motion, once the video is analysed
+        self.skip_idle_var = tk.BooleanVar(value=False)
+        self.skip_idle_checkbutton = ttk.Checkbutton(
+            self.controls_frame,
+            text="Saltar inactivo",
+            variable=self.skip_idle_var,
+            command=self.send_skip_idle,
+        )
+        self.skip_idle_checkbutton.pack(side=tk.LEFT, padx=5)
+
+        # Remove the rocking of boat-mounted footage, once the video is
+        # analysed
+        self.stabilize_var = tk.BooleanVar(value=False)
+        self.stabilize_checkbutton = ttk.Checkbutton(
+            self.controls_frame,
+            text="Estabilizar",
+            variable=self.stabilize_var,
+            command=self.on_stabilize_toggle,
+        )
+        self.stabilize_checkbutton.pack(side=tk.LEFT, padx=5)
+
+        self.enhance_button = ttk.Button(
+            self.controls_frame,
+            text="Realce…",
+            command=self.open_enhance_window,
+        )
+        self.enhance_button.pack(side=tk.LEFT, padx=5)
+
         # Add zoom controls
         ttk.Separator(self.controls_frame, orient="vertical").pack(
             side=tk.LEFT, fill=tk.Y, padx=5
@@ -287,6 +446,18 @@ class VideoLabelingApp:
         )
         self.zoom_reset_button.pack(side=tk.LEFT, padx=2)
 
+        # Ensure proper cleanup when the app is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def ensure_secondary_window(self) -> None:
+        if self.secondary_window_ready:
+            return
+        self.secondary_window_ready = True
+        self.setup_secondary_window()
+        self.bind_transport_keys()
+        self.bind_behavior_hotkeys()
+
+    def setup_secondary_window(self) -> None:
         # Create secondary window for behavior controls and records
         self.secondary_window = tk.Toplevel(self.root)
         self.secondary_window.title("Comportamientos")
@@ -505,6 +676,24 @@ class VideoLabelingApp:
             row=3, column=6, sticky=tk.E, padx=(10, 0), pady=2
         )
 
+        self.export_snapshots_button = ttk.Button(
+            self.secondary_controls_frame,
+            text="Exportar Capturas📷",
+            command=self.export_record_snapshots,
+        )
+        self.export_snapshots_button.grid(
+            row=3, column=5, sticky=tk.E, padx=(10, 0), pady=2
+        )
+
+        self.export_clips_button = ttk.Button(
+            self.secondary_controls_frame,
+            text="Exportar Clips🎬",
+            command=self.export_record_clips,
+        )
+        self.export_clips_button.grid(
+            row=3, column=4, sticky=tk.E, padx=(10, 0), pady=2
+        )
+
         # Create a frame for records in secondary window
         self.secondary_records_frame = ttk.LabelFrame(
             self.secondary_window, text="Registros de comportamiento"
@@ -545,15 +734,30 @@ class VideoLabelingApp:
         # Store record frames for easy cleanup
         self.record_frames: list[ttk.Frame] = []
 
-        # Ensure proper cleanup when the app is closed
-        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
-
     def on_close(self) -> None:
         # Stop the frame processor thread if it's running
         if self.frame_processor and self.frame_processor.is_alive():
             self.command_queue.put({"type": "stop"})
             # Give thread time to clean up
             self.frame_processor.join(timeout=1.0)
+        if self.proxy_manager is not None:
+            self.proxy_manager.shutdown()
+        if self.readahead is not None:
+            self.readahead.shutdown()
+        if self.jobs is not None:
+            self.jobs.shutdown()
+        if self.motion_analyzer is not None:
+            self.motion_analyzer.shutdown()
+        if self.stabilizer is not None:
+            self.stabilizer.shutdown()
+        if self.duplicate_finder is not None:
+            self.duplicate_finder.shutdown()
+        self.stop_tracking()
+        if self.enhance_window is not None:
+            self.close_enhance_window()
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        self.stop_profiling()
         self.root.destroy()
 
     def check_frame_queue(self) -> None:
@@ -566,63 +770,27 @@ class VideoLabelingApp:
                     frame = message["data"]
                     self.current_frame = frame
 
-                    # Convert to PIL Image (this is now full resolution)
-                    pil_image = Image.fromarray(frame)
-                    self.original_image = pil_image
-
-                    # Calculate the display size based on zoom level
-                    # At zoom level 1.0, we want to fit the video to display size
-                    # At higher zoom levels, we want to show more detail from original
-
-                    if self.zoom_level <= 1.0:
-                        # When zoomed out or at 1.0, scale to fit display area
-                        scale_factor = (
-                            min(
-                                self.display_width / pil_image.width,
-                                self.display_height / pil_image.height,
-                            )
-                            * self.zoom_level
-                        )
-                    else:
-                        # When zoomed in, calculate scale to show original detail
-                        # Base scale to fit display, then multiply by zoom
-                        base_scale = min(
-                            self.display_width / pil_image.width,
-                            self.display_height / pil_image.height,
-                        )
-                        scale_factor = base_scale * self.zoom_level
-
-                    # Calculate final dimensions
-                    final_width = int(pil_image.width * scale_factor)
-                    final_height = int(pil_image.height * scale_factor)
-
-                    # Resize the image
-                    if scale_factor != 1.0:
-                        pil_image = pil_image.resize(
-                            (final_width, final_height),
-                            Image.Resampling.LANCZOS,
-                        )
-
-                    # Convert back to PhotoImage
-                    self.photo_image = ImageTk.PhotoImage(pil_image)
-
-                    # Update canvas
-                    self.canvas.delete("all")
-                    self.canvas.create_image(
-                        0, 0, anchor=tk.NW, image=self.photo_image
+                    current_time = message["position"]
+                    self.displayed_frame = FrameStamp(
+                        position=current_time,
+                        frame_index=message.get("frame_index"),
                     )
+                    self.displayed_correction = message.get("correction")
 
-                    # Update scroll region
-                    self.canvas.configure(
-                        scrollregion=(0, 0, pil_image.width, pil_image.height)
+                    # Convert to PIL Image (scaled for the display and zoom)
+                    self.original_image = frame_to_image(
+                        frame, message.get("bgr", False)
                     )
+                    self.render_frame()
 
                     # Update the time display and slider
-                    current_time = message["position"]
-                    self.video_position.set(current_time)
-                    self.current_time_label.config(
-                        text=format_time(current_time)
-                    )
+                    # While dragging, the slider follows the mouse and the
+                    # frames follow the slider, not the other way round
+                    if not self.slider_dragging:
+                        self.video_position.set(current_time)
+                        self.current_time_label.config(
+                            text=format_time(current_time)
+                        )
 
                 elif message["type"] == "metadata":
                     # Update video duration and slider
@@ -632,9 +800,10 @@ class VideoLabelingApp:
                         text=format_time(self.video_duration)
                     )
 
-                    # Store original video dimensions
+                    # Store original video dimensions; a proxy's are not
                     if (
-                        "original_width" in message
+                        not self.playing_proxy
+                        and "original_width" in message
                         and "original_height" in message
                     ):
                         self.original_video_width = message["original_width"]
@@ -642,8 +811,11 @@ class VideoLabelingApp:
                         self.update_video_label()
 
                 elif message["type"] == "eof":
-                    # Reached end of file, could handle specially if needed
-                    pass
+                    # Reverse playback stops at the first frame
+                    if self.shuttle_speed < 0:
+                        self.shuttle_speed = 0.0
+                        self.is_playing = False
+                        self.play_button.config(text="▶")
         except queue.Empty:
             pass
         except Exception as e:
@@ -655,28 +827,90 @@ class VideoLabelingApp:
     def load_videos(self) -> None:
         self.video_dir = filedialog.askdirectory()
         if self.video_dir:
-            self.video_files = sorted(
-                [
-                    f
-                    for f in os.listdir(self.video_dir)
-                    if f.lower().endswith(".mp4")
-                ]
-            )
+            from .media_index import MediaIndex, scan_media
+
+            if self.media_index is None:
+                self.media_index = MediaIndex.open_default()
+
+            self.video_signatures = scan_media(self.video_dir)
+            self.video_files = [
+                os.path.relpath(signature.path, self.video_dir)
+                for signature in self.video_signatures
+            ]
             self.current_video_index = 0
+            self.playlist_flags = {}
+
+            # Metadata for files seen before comes straight from the index;
+            # the rest is probed in the background
+            self.probe_thread = threading.Thread(
+                target=self.media_index.probe,
+                args=(self.video_signatures,),
+                daemon=True,
+            )
+            self.probe_thread.start()
+            self.refresh_playlist()
+            self.root.after(250, self.poll_media_probe)
+
+            if self.use_proxies_var.get():
+                self.request_proxies()
+            self.request_motion_analysis()
+            if self.stabilize_var.get():
+                self.request_stabilization()
+            self.request_duplicate_scan()
+            self.play_video()
+
+    def video_metadata(self, index: int) -> "VideoMetadata | None":
+        if self.media_index is None or index >= len(self.video_signatures):
+            return None
+        return self.media_index.get(self.video_signatures[index])
+
+    def refresh_playlist(self) -> None:
+        entries = []
+        for index, video_file in enumerate(self.video_files):
+            metadata = self.video_metadata(index)
+            duration = (
+                format_time(metadata.duration)
+                if metadata and metadata.readable
+                else "--:--"
+            )
+            flag = self.playlist_flags.get(
+                self.video_signatures[index].path, ""
+            )
+            entries.append(f"{index + 1}. {video_file} ({duration}){flag}")
+        self.playlist_menu.config(values=entries)
+        if entries:
+            self.playlist_menu.current(self.current_video_index)
+
+    def poll_media_probe(self) -> None:
+        self.refresh_playlist()
+        if self.probe_thread is not None and self.probe_thread.is_alive():
+            self.root.after(250, self.poll_media_probe)
+
+    def on_playlist_select(self, _: Any) -> None:
+        index = self.playlist_menu.current()
+        if 0 <= index < len(self.video_files):
+            self.current_video_index = index
             self.play_video()
 
     def play_video(self) -> None:
+        from .enhance import load_enhance_settings
+        from .frame_processor import FrameProcessor
+        from .video_source import load_decoder_options
+
+        if self.decoder_options is None:
+            self.decoder_options = load_decoder_options()
+        if self.enhance_settings is None:
+            self.enhance_settings = load_enhance_settings()
+
+        self.ensure_secondary_window()
+
         # Stop existing frame processor if running
         if self.frame_processor and self.frame_processor.is_alive():
             self.command_queue.put({"type": "stop"})
             self.frame_processor.join(timeout=1.0)
 
         # Clear the queues
-        while not self.frame_queue.empty():
-            try:
-                self.frame_queue.get_nowait()
-            except queue.Empty:
-                break
+        self.frame_queue.clear()
 
         while not self.command_queue.empty():
             try:
@@ -689,6 +923,17 @@ class VideoLabelingApp:
                 self.video_dir, self.video_files[self.current_video_index]
             )
 
+            # Decode the proxy or the local copy when there is one;
+            # positions are the same
+            proxy_path = self.current_proxy_path()
+            local_path = self.current_local_path()
+            self.playing_proxy = proxy_path is not None
+            self.playing_local_copy = (
+                not self.playing_proxy and local_path is not None
+            )
+            if self.use_local_cache_var.get():
+                self.request_readahead()
+
             # Start the frame processor
             self.frame_processor = FrameProcessor(
                 video_path,
@@ -696,26 +941,481 @@ class VideoLabelingApp:
                 self.command_queue,
                 VIDEO_WIDTH,
                 VIDEO_HEIGHT,
+                self.decoder_options,
+                playback_path=proxy_path or local_path,
             )
             self.frame_processor.start()
+            self.command_queue.put({"type": "zoom", "value": self.zoom_level})
+            if self.enhance_settings.enabled:
+                self.send_enhance()
 
             self.is_playing = True
+            self.shuttle_speed = 0.0
             self.behavior_records = []
             self.update_records_display()
 
             # Clear any active state
             self.current_behavior = None
             self.behavior_start_time = None
+            self.behavior_start_frame = None
+            self.displayed_frame = None
+            self.displayed_correction = None
             self.state_feedback_label.config(
                 text="", font=("TkDefaultFont", 10, "normal"), foreground="gray"
             )
 
-            composed_text = (
-                f"{self.video_files[self.current_video_index]}"
-                f" ({self.frame_processor.cap.get(cv2.CAP_PROP_FRAME_WIDTH):.0f}x"
-                f"{self.frame_processor.cap.get(cv2.CAP_PROP_FRAME_HEIGHT):.0f})"
+            # Show what the index already knows until the processor's
+            # metadata message arrives
+            metadata = self.video_metadata(self.current_video_index)
+            if metadata is not None:
+                self.original_video_width = metadata.width
+                self.original_video_height = metadata.height
+                self.total_time_label.config(
+                    text=format_time(metadata.duration)
+                )
+            self.update_video_label()
+            if self.video_files:
+                self.playlist_menu.current(self.current_video_index)
+
+            # Background work on this video goes first now
+            if self.jobs is not None:
+                self.jobs.focus(self.video_signatures, self.current_video_index)
+            self.activity = None
+            self.draw_activity()
+            self.poll_activity()
+            if self.stabilize_var.get():
+                self.poll_stabilization()
+            self.load_rois()
+
+    def current_proxy_path(self) -> str | None:
+        if (
+            not self.use_proxies_var.get()
+            or self.proxy_manager is None
+            or self.current_video_index >= len(self.video_signatures)
+        ):
+            return None
+        proxy = self.proxy_manager.get(
+            self.video_signatures[self.current_video_index]
+        )
+        return str(proxy) if proxy is not None else None
+
+    def request_proxies(self) -> None:
+        """Queue proxies for the playlist, nearest to the current first."""
+        from .proxy import ProxyManager
+
+        if self.proxy_manager is None:
+            self.proxy_manager = ProxyManager()
+
+        count = len(self.video_signatures)
+        order = sorted(
+            range(count),
+            key=lambda i: min(
+                abs(i - self.current_video_index),
+                count - abs(i - self.current_video_index),
+            ),
+        )
+        self.proxy_manager.request(self.video_signatures[i] for i in order)
+        self.root.after(1000, self.poll_proxies)
+
+    def poll_proxies(self) -> None:
+        """Move playback onto the current video's proxy once it exists."""
+        if self.proxy_manager is None or not self.use_proxies_var.get():
+            return
+        proxy_path = self.current_proxy_path()
+        if (
+            proxy_path is not None
+            and not self.playing_proxy
+            and self.frame_processor
+            and self.frame_processor.is_alive()
+        ):
+            self.command_queue.put({"type": "source", "path": proxy_path})
+            self.playing_proxy = True
+            self.update_video_label()
+        if self.proxy_manager.pending():
+            self.root.after(1000, self.poll_proxies)
+
+    def on_proxy_toggle(self) -> None:
+        if self.use_proxies_var.get():
+            self.request_proxies()
+        else:
+            if self.proxy_manager is not None:
+                self.proxy_manager.cancel_pending()
+            if (
+                self.playing_proxy
+                and self.frame_processor
+                and self.frame_processor.is_alive()
+            ):
+                local_path = self.current_local_path()
+                self.command_queue.put(
+                    {
+                        "type": "source",
+                        "path": local_path or self.frame_processor.video_path,
+                    }
+                )
+                self.playing_local_copy = local_path is not None
+            self.playing_proxy = False
+            self.update_video_label()
+
+    def current_local_path(self) -> str | None:
+        if (
+            not self.use_local_cache_var.get()
+            or self.readahead is None
+            or self.current_video_index >= len(self.video_signatures)
+        ):
+            return None
+        local_copy = self.readahead.get(
+            self.video_signatures[self.current_video_index]
+        )
+        return str(local_copy) if local_copy is not None else None
+
+    def request_readahead(self) -> None:
+        """Copy the current video and the next ones to local disk."""
+        from .readahead import READAHEAD_VIDEOS, ReadAheadCache
+
+        if self.readahead is None:
+            self.readahead = ReadAheadCache()
+        count = len(self.video_signatures)
+        order = [
+            (self.current_video_index + offset) % count
+            for offset in range(min(count, READAHEAD_VIDEOS + 1))
+        ]
+        self.readahead.request(self.video_signatures[i] for i in order)
+        self.root.after(1000, self.poll_readahead)
+
+    def poll_readahead(self) -> None:
+        """Move playback onto the local copy once it is complete."""
+        if self.readahead is None or not self.use_local_cache_var.get():
+            return
+        local_path = self.current_local_path()
+        if (
+            local_path is not None
+            and not self.playing_local_copy
+            and not self.playing_proxy
+            and self.frame_processor
+            and self.frame_processor.is_alive()
+        ):
+            self.command_queue.put({"type": "source", "path": local_path})
+            self.playing_local_copy = True
+            self.update_video_label()
+        if self.readahead.pending():
+            self.root.after(1000, self.poll_readahead)
+
+    def on_local_cache_toggle(self) -> None:
+        if self.use_local_cache_var.get():
+            self.request_readahead()
+            return
+        if self.readahead is not None:
+            self.readahead.request(())
+        if (
+            self.playing_local_copy
+            and self.frame_processor
+            and self.frame_processor.is_alive()
+        ):
+            self.command_queue.put(
+                {"type": "source", "path": self.frame_processor.video_path}
             )
-            self.video_label.config(text=composed_text)
+        self.playing_local_copy = False
+        self.update_video_label()
+
+    def background_jobs(self) -> "JobScheduler":
+        from .dedup import DuplicateFinder
+        from .jobs import JobScheduler
+        from .motion import MotionAnalyzer
+        from .stabilization import Stabilizer
+
+        if self.jobs is None:
+            # Reading a bool is safe from the scheduler's worker threads
+            self.jobs = JobScheduler(throttle=lambda: self.is_playing)
+            self.motion_analyzer = MotionAnalyzer()
+            self.jobs.register(self.motion_analyzer.job_kind())
+            self.stabilizer = Stabilizer()
+            self.jobs.register(self.stabilizer.job_kind())
+            self.duplicate_finder = DuplicateFinder()
+            self.jobs.register(self.duplicate_finder.job_kind())
+        return self.jobs
+
+    def request_motion_analysis(self) -> None:
+        """Queue motion analysis of the playlist, current video first."""
+        from .motion import MOTION_JOB
+
+        self.background_jobs().schedule(
+            MOTION_JOB, self.video_signatures, self.current_video_index
+        )
+
+    def poll_activity(self) -> None:
+        """Show the current video's activity track once it is analysed."""
+        from .motion import MOTION_JOB, normalize_activity
+
+        if self.activity_poll_id is not None:
+            self.root.after_cancel(self.activity_poll_id)
+            self.activity_poll_id = None
+        if (
+            self.jobs is None
+            or self.motion_analyzer is None
+            or self.current_video_index >= len(self.video_signatures)
+        ):
+            return
+
+        activity = self.motion_analyzer.get(
+            self.video_signatures[self.current_video_index]
+        )
+        if activity is not None:
+            self.activity = normalize_activity(activity)
+            self.draw_activity()
+            if self.skip_idle_var.get():
+                self.send_skip_idle()
+        elif self.jobs.pending(MOTION_JOB):
+            self.activity_poll_id = self.root.after(500, self.poll_activity)
+
+    def draw_activity(self, _: Any = None) -> None:
+        """Draw the activity track, one bar per pixel column."""
+        self.activity_canvas.delete("all")
+        if self.activity is None or self.activity.size == 0:
+            return
+        import numpy as np
+
+        from .motion import DEFAULT_IDLE_THRESHOLD
+
+        width = self.activity_canvas.winfo_width()
+        height = self.activity_canvas.winfo_height()
+        if width <= 1:
+            return
+        # Peak of the frames that fall on each column
+        bounds = np.linspace(0, self.activity.size, width + 1).astype(int)
+        starts = np.minimum(bounds[:-1], self.activity.size - 1)
+        columns = np.maximum.reduceat(self.activity, starts)
+        for x, value in enumerate(columns.tolist()):
+            bar = max(1, round(value * (height - 1)))
+            self.activity_canvas.create_line(
+                x,
+                height,
+                x,
+                height - bar,
+                fill="#2a7ab0"
+                if value >= DEFAULT_IDLE_THRESHOLD
+                else "#b0b0b0",
+            )
+
+    def request_duplicate_scan(self) -> None:
+        """Hash the playlist, then look for its videos across the corpus."""
+        from .dedup import DEDUP_JOB
+
+        self.background_jobs().schedule(
+            DEDUP_JOB, self.video_signatures, self.current_video_index
+        )
+        self.root.after(2000, self.poll_duplicates)
+
+    def poll_duplicates(self) -> None:
+        from .dedup import DEDUP_JOB
+
+        if self.jobs is None or self.duplicate_finder is None:
+            return
+        if self.jobs.pending(DEDUP_JOB):
+            self.root.after(2000, self.poll_duplicates)
+            return
+        if self.overlap_thread is not None and self.overlap_thread.is_alive():
+            # Matching for a directory loaded before; this one goes next
+            self.root.after(250, self.poll_duplicates)
+            return
+
+        finder = self.duplicate_finder
+        signatures = list(self.video_signatures)
+
+        def find() -> None:
+            self.overlaps = finder.overlaps(signatures)
+
+        # Matching reads the whole index, so it stays off the UI thread
+        self.overlap_thread = threading.Thread(target=find, daemon=True)
+        self.overlap_thread.start()
+        self.root.after(250, self.poll_overlap_thread, signatures)
+
+    def poll_overlap_thread(self, signatures: list["FileSignature"]) -> None:
+        if self.overlap_thread is not None and self.overlap_thread.is_alive():
+            self.root.after(250, self.poll_overlap_thread, signatures)
+            return
+        # A directory loaded since then gets its own scan
+        if signatures == self.video_signatures:
+            self.report_overlaps()
+
+    def report_overlaps(self) -> None:
+        """Log every duplicate or overlap and flag them in the playlist."""
+        self.playlist_flags = {}
+        for overlap in self.overlaps:
+            if overlap.duplicate:
+                print(f"Duplicate videos: {overlap.first} and {overlap.second}")
+                flag = " ⚠ duplicado"
+            else:
+                print(
+                    f"Overlapping videos: {overlap.first} at t is "
+                    f"{overlap.second} at t{overlap.offset:+.0f} s, "
+                    f"for {overlap.duration:.0f} s"
+                )
+                flag = " ⚠ solapado"
+            for path in (overlap.first, overlap.second):
+                # A duplicate outranks an overlap in the same entry
+                if self.playlist_flags.get(path) != " ⚠ duplicado":
+                    self.playlist_flags[path] = flag
+        self.refresh_playlist()
+
+    def request_stabilization(self) -> None:
+        """Queue stabilization of the playlist, current video first."""
+        from .stabilization import STABILIZE_JOB
+
+        self.background_jobs().schedule(
+            STABILIZE_JOB, self.video_signatures, self.current_video_index
+        )
+
+    def poll_stabilization(self) -> None:
+        """Stabilize playback once the current video is analysed."""
+        from .stabilization import STABILIZE_JOB
+
+        if self.stabilization_poll_id is not None:
+            self.root.after_cancel(self.stabilization_poll_id)
+            self.stabilization_poll_id = None
+        if (
+            self.jobs is None
+            or self.stabilizer is None
+            or not self.stabilize_var.get()
+            or self.current_video_index >= len(self.video_signatures)
+        ):
+            return
+
+        signature = self.video_signatures[self.current_video_index]
+        if self.stabilizer.get(signature) is not None:
+            self.send_stabilize()
+        elif self.jobs.pending(STABILIZE_JOB):
+            self.stabilization_poll_id = self.root.after(
+                1000, self.poll_stabilization
+            )
+
+    def on_stabilize_toggle(self) -> None:
+        if self.stabilize_var.get() and self.video_signatures:
+            self.request_stabilization()
+            self.poll_stabilization()
+        else:
+            self.send_stabilize()
+
+    def send_stabilize(self) -> None:
+        if self.frame_processor and self.frame_processor.is_alive():
+            self.command_queue.put(
+                {
+                    "type": "stabilize",
+                    "value": 1.0 if self.stabilize_var.get() else 0.0,
+                }
+            )
+
+    def open_enhance_window(self) -> None:
+        """Sliders for the murky-water filters; changes apply at once."""
+        from .enhance import load_enhance_settings
+
+        if self.enhance_window is not None:
+            self.enhance_window.lift()
+            return
+        if self.enhance_settings is None:
+            self.enhance_settings = load_enhance_settings()
+
+        self.enhance_window = tk.Toplevel(self.root)
+        self.enhance_window.title("Realce")
+        self.enhance_window.protocol(
+            "WM_DELETE_WINDOW", self.close_enhance_window
+        )
+        sliders = (
+            ("black", "Negro", 0.0, 254.0),
+            ("white", "Blanco", 1.0, 255.0),
+            ("gamma", "Gamma", 0.3, 3.0),
+            ("clahe", "CLAHE", 0.0, 8.0),
+            ("dehaze", "Neblina", 0.0, 1.0),
+        )
+        for row, (name, text, low, high) in enumerate(sliders):
+            ttk.Label(self.enhance_window, text=text).grid(
+                row=row, column=0, sticky=tk.W, padx=5, pady=2
+            )
+            variable = tk.DoubleVar(value=getattr(self.enhance_settings, name))
+            ttk.Scale(
+                self.enhance_window,
+                from_=low,
+                to=high,
+                variable=variable,
+                length=200,
+                command=self.on_enhance_change,
+            ).grid(row=row, column=1, padx=5, pady=2)
+            self.enhance_vars[name] = variable
+
+        ttk.Button(
+            self.enhance_window, text="Restablecer", command=self.reset_enhance
+        ).grid(row=len(sliders), column=0, padx=5, pady=5)
+        # What each filter costs per frame, to judge what playback can afford
+        self.enhance_cost_label = ttk.Label(self.enhance_window, text="")
+        self.enhance_cost_label.grid(
+            row=len(sliders), column=1, sticky=tk.W, padx=5, pady=5
+        )
+        self.poll_enhance_costs()
+
+    def on_enhance_change(self, _: Any = None) -> None:
+        from .enhance import EnhanceSettings
+
+        values = {name: var.get() for name, var in self.enhance_vars.items()}
+        black = round(values["black"])
+        self.enhance_settings = EnhanceSettings(
+            black=black,
+            white=max(black + 1, round(values["white"])),
+            gamma=round(values["gamma"], 2),
+            clahe=round(values["clahe"], 1),
+            dehaze=round(values["dehaze"], 2),
+        )
+        self.send_enhance()
+
+    def reset_enhance(self) -> None:
+        from .enhance import EnhanceSettings
+
+        defaults = EnhanceSettings()
+        for name, variable in self.enhance_vars.items():
+            variable.set(getattr(defaults, name))
+        self.on_enhance_change()
+
+    def close_enhance_window(self) -> None:
+        from .enhance import save_enhance_settings
+
+        if self.enhance_settings is not None:
+            try:
+                save_enhance_settings(self.enhance_settings)
+            except OSError as e:
+                print(f"Error saving enhancement settings: {e}")
+        if self.enhance_window is not None:
+            self.enhance_window.destroy()
+        self.enhance_window = None
+        self.enhance_vars = {}
+
+    def poll_enhance_costs(self) -> None:
+        if self.enhance_window is None:
+            return
+        enhancer = (
+            self.frame_processor.enhancer if self.frame_processor else None
+        )
+        costs = enhancer.costs() if enhancer else {}
+        self.enhance_cost_label.config(
+            text=", ".join(f"{name} {ms:.1f} ms" for name, ms in costs.items())
+        )
+        self.root.after(1000, self.poll_enhance_costs)
+
+    def send_enhance(self) -> None:
+        if (
+            self.enhance_settings is not None
+            and self.frame_processor
+            and self.frame_processor.is_alive()
+        ):
+            self.command_queue.put(
+                {"type": "enhance", "settings": self.enhance_settings}
+            )
+
+    def send_skip_idle(self) -> None:
+        from .motion import DEFAULT_IDLE_THRESHOLD
+
+        if self.frame_processor and self.frame_processor.is_alive():
+            threshold = (
+                DEFAULT_IDLE_THRESHOLD if self.skip_idle_var.get() else 0.0
+            )
+            self.command_queue.put({"type": "skip_idle", "value": threshold})
 
     def trigger_play_video(self) -> None:
         self.command_queue.put({"type": "play"})
@@ -754,10 +1454,95 @@ class VideoLabelingApp:
                 {"type": "speed", "value": self.playback_speed}
             )
 
+    def bind_transport_keys(self) -> None:
+        self.root.bind_all("<j>", partial(self.on_transport_key, action="j"))
+        self.root.bind_all("<k>", partial(self.on_transport_key, action="k"))
+        self.root.bind_all("<l>", partial(self.on_transport_key, action="l"))
+        self.root.bind_all(
+            "<Left>", partial(self.on_transport_key, action="Left")
+        )
+        self.root.bind_all(
+            "<Right>", partial(self.on_transport_key, action="Right")
+        )
+
+    def on_transport_key(self, event: Any, action: str) -> None:
+        # Arrows still move through lists and text fields
+        if isinstance(event.widget, INPUT_WIDGETS):
+            return
+        if not self.frame_processor or not self.frame_processor.is_alive():
+            return
+
+        if action == "Left":
+            self.jog(-1)
+        elif action == "Right":
+            self.jog(1)
+        elif action == "k":
+            self.shuttle(0.0)
+        else:
+            # Pressing again speeds up; the other key turns around at 1x
+            direction = 1 if action == "l" else -1
+            if self.shuttle_speed * direction > 0:
+                current = SHUTTLE_SPEEDS.index(abs(self.shuttle_speed))
+                speed = SHUTTLE_SPEEDS[
+                    min(current + 1, len(SHUTTLE_SPEEDS) - 1)
+                ]
+            else:
+                speed = SHUTTLE_SPEEDS[0]
+            self.shuttle(speed * direction)
+
+    def shuttle(self, speed: float) -> None:
+        """Play at a signed rate; negative plays backwards, 0 pauses."""
+        self.shuttle_speed = speed
+        self.command_queue.put({"type": "shuttle", "value": speed})
+        self.is_playing = speed != 0
+        self.play_button.config(text="⏸" if self.is_playing else "▶")
+        if speed != 0:
+            self.playback_speed = abs(speed)
+            self.speed_var.set(str(abs(speed)))
+
+    def jog(self, step: int) -> None:
+        self.shuttle_speed = 0.0
+        self.is_playing = False
+        self.play_button.config(text="▶")
+        self.command_queue.put({"type": "jog", "value": step})
+
+    def bind_behavior_hotkeys(self) -> None:
+        """Bind the taxonomy hotkeys application-wide."""
+        for hotkey, entry in self.taxonomy.hotkeys.items():
+            if hotkey in TRANSPORT_KEYS or hotkey == PROFILE_HOTKEY:
+                print(f"Hotkey {hotkey!r} of {entry.key} is reserved")
+                continue
+            try:
+                self.root.bind_all(
+                    f"<{hotkey}>", partial(self.on_behavior_hotkey, entry=entry)
+                )
+            except tk.TclError:
+                print(f"Ignoring invalid hotkey {hotkey!r} for {entry.key}")
+
+    def on_behavior_hotkey(self, event: Any, entry: BehaviorEntry) -> None:
+        # Read the frame before anything else so the stamp matches the
+        # frame that was on screen when the key went down
+        stamp = self.current_frame_stamp()
+
+        # Keys typed into text fields or lists are not hotkeys
+        if isinstance(event.widget, INPUT_WIDGETS):
+            return
+        self.toggle_behavior(entry, stamp)
+
+    def current_frame_stamp(self) -> FrameStamp:
+        if self.displayed_frame is not None:
+            return self.displayed_frame
+        return FrameStamp(position=self.video_position.get())
+
     def toggle_behavior(
-        self, embedded_behavior: str, record_type: RecordType
+        self, entry: BehaviorEntry, stamp: FrameStamp | None = None
     ) -> None:
-        [parent, behavior] = embedded_behavior.split("/")[:2]
+        if stamp is None:
+            stamp = self.current_frame_stamp()
+
+        parent = entry.category
+        behavior = entry.name
+        record_type = entry.record_type
 
         # Get the current values from the selectors or default values
         current_role = (
@@ -790,7 +1575,8 @@ class VideoLabelingApp:
                         role=cast(Role, current_role),
                         behaviour=behavior,
                         parent_behaviour=parent,
-                        start_time=self.video_position.get(),
+                        start_time=stamp.position,
+                        start_frame=stamp.frame_index,
                         duration=0,
                         record_type=record_type,
                         tag=self.tag_var.get(),
@@ -807,12 +1593,13 @@ class VideoLabelingApp:
                         calves=current_only_calves,
                     )
                 )
-                self.update_records_display()
+                self.schedule_records_display()
             case "STATE":
                 if self.current_behavior is None:
                     # Starting a new state
                     self.current_behavior = behavior
-                    self.behavior_start_time = self.video_position.get()
+                    self.behavior_start_time = stamp.position
+                    self.behavior_start_frame = stamp.frame_index
 
                     # Show state feedback label
                     self.state_feedback_label.config(
@@ -828,7 +1615,7 @@ class VideoLabelingApp:
                     # Ending the current state
                     if self.behavior_start_time is None:
                         raise ValueError("Behavior start time is None")
-                    end_time = self.video_position.get()
+                    end_time = stamp.position
                     duration = end_time - self.behavior_start_time
                     self.behavior_records.append(
                         BehaviorRecord(
@@ -838,6 +1625,8 @@ class VideoLabelingApp:
                             parent_behaviour=parent,
                             start_time=self.behavior_start_time,
                             end_time=end_time,
+                            start_frame=self.behavior_start_frame,
+                            end_frame=stamp.frame_index,
                             duration=duration,
                             record_type=record_type,
                             tag=self.tag_var.get(),
@@ -854,6 +1643,7 @@ class VideoLabelingApp:
                     )
                     self.current_behavior = None
                     self.behavior_start_time = None
+                    self.behavior_start_frame = None
 
                     # Hide state feedback label
                     self.state_feedback_label.config(
@@ -864,9 +1654,21 @@ class VideoLabelingApp:
 
                     for btn in self.behavior_buttons.values():
                         btn.config(state=tk.NORMAL)
-                    self.update_records_display()
+                    self.schedule_records_display()
+
+    def schedule_records_display(self) -> None:
+        """Rebuild the records list once the event queue is idle.
+
+        Rapid hotkey presses (e.g. a run of breaths) then cost one rebuild
+        instead of one per record.
+        """
+        if not self.records_refresh_pending:
+            self.records_refresh_pending = True
+            self.root.after_idle(self.update_records_display)
 
     def update_records_display(self) -> None:
+        self.records_refresh_pending = False
+
         # Clear existing record frames
         for frame in self.record_frames:
             frame.destroy()
@@ -913,18 +1715,79 @@ class VideoLabelingApp:
         self.behavior_records = []
         self.update_records_display()
 
+    def export_record_snapshots(self) -> None:
+        """Save a still of every record in the background."""
+        from .snapshots import export_snapshots
+
+        if not self.video_files or not self.behavior_records:
+            return
+        video_path = os.path.join(
+            self.video_dir, self.video_files[self.current_video_index]
+        )
+        records = list(self.behavior_records)
+
+        def run() -> None:
+            report = export_snapshots(
+                {video_path: records},
+                os.path.join(self.video_dir, "capturas"),
+                self.decoder_options,
+            )
+            print(
+                f"Exported {len(report.written)} snapshots"
+                f" ({len(report.missing)} frames not reached)"
+            )
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def export_record_clips(self) -> None:
+        """Save a clip of every STATE record in the background."""
+        from .clips import export_clips
+
+        if not self.video_files or not self.behavior_records:
+            return
+        video_path = os.path.join(
+            self.video_dir, self.video_files[self.current_video_index]
+        )
+        records = list(self.behavior_records)
+
+        def run() -> None:
+            report = export_clips(
+                {video_path: records},
+                os.path.join(self.video_dir, "clips"),
+                options=self.decoder_options,
+            )
+            print(
+                f"Exported {len(report.written)} clips"
+                f" ({len(report.failed)} failed)"
+            )
+
+        threading.Thread(target=run, daemon=True).start()
+
     def update_time_label(self, event: str) -> None:
-        self.trigger_pause_video()
+        if not self.slider_dragging:
+            self.slider_dragging = True
+            self.is_playing = False
+            self.trigger_pause_video()
         self.current_time_label.config(
             text=format_time(self.video_position.get())
         )
+        # The processor only decodes the latest of these, so the preview
+        # keeps up without queueing a seek per mouse motion
+        self.request_seek(self.video_position.get())
 
     def slider_released(self, event: Any) -> None:
-        if self.frame_processor and self.frame_processor.is_alive():
-            print(f"Seeking to {self.video_position.get()}")
-            self.command_queue.put(
-                {"type": "seek", "position": self.video_position.get()}
-            )
+        self.slider_dragging = False
+        self.request_seek(self.video_position.get())
+        # Playback moves on from here; a later seek to the same spot counts
+        self.last_seek_position = None
+
+    def request_seek(self, position: float) -> None:
+        if not self.frame_processor or not self.frame_processor.is_alive():
+            return
+        if position == self.last_seek_position:
+            return
+        self.last_seek_position = position
+        self.command_queue.put({"type": "seek", "position": position})
 
     def _bind_mouse_wheel(self, event: Any) -> None:
         def _on_mouse_wheel(event: Any) -> None:
@@ -954,6 +1817,7 @@ class VideoLabelingApp:
         """Handle MouseWheel for scrolling."""
         # Scroll vertically by default
         self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self.schedule_view_update()
 
     def zoom_out(self) -> None:
         self.zoom_level = max(self.min_zoom, self.zoom_level - self.zoom_step)
@@ -970,76 +1834,287 @@ class VideoLabelingApp:
     def update_zoom_level(self) -> None:
         """Update zoom level display and refresh current frame."""
         self.zoom_level_label.config(text=f"{int(self.zoom_level * 100)}%")
+        self.render_frame()
+        # Frames arrive scaled for the zoom level; ask for sharper ones
+        if self.frame_processor and self.frame_processor.is_alive():
+            self.command_queue.put({"type": "zoom", "value": self.zoom_level})
+
+    def render_frame(self) -> None:
+        """Draw `original_image` at the current zoom level."""
+        pil_image = self.original_image
+        if pil_image is None:
+            return
+        from PIL import Image, ImageTk
+
+        from .zoom import TileCache
+
+        # Fit the frame to the display area, then apply the zoom
+        scale_factor = (
+            min(
+                self.display_width / pil_image.width,
+                self.display_height / pil_image.height,
+            )
+            * self.zoom_level
+        )
 
-        # Refresh current frame with new zoom level
-        if self.original_image is not None:
-            pil_image = self.original_image.copy()
-
-            # Use the same scaling logic as check_frame_queue
-            if self.zoom_level <= 1.0:
-                # When zoomed out or at 1.0, scale to fit display area
-                scale_factor = (
-                    min(
-                        self.display_width / pil_image.width,
-                        self.display_height / pil_image.height,
-                    )
-                    * self.zoom_level
-                )
-            else:
-                # When zoomed in, calculate scale to show original detail
-                # Base scale to fit display, then multiply by zoom
-                base_scale = min(
-                    self.display_width / pil_image.width,
-                    self.display_height / pil_image.height,
-                )
-                scale_factor = base_scale * self.zoom_level
+        if self.zoom_level > 1.0:
+            # Bigger than the view: resize and draw only the visible tiles
+            if self.tile_cache is None:
+                self.tile_cache = TileCache(self.canvas)
+            self.canvas.delete("frame")
+            self.photo_image = None
+            self.tile_cache.show(pil_image, scale_factor)
+            self.frame_extent = (
+                pil_image.width * scale_factor,
+                pil_image.height * scale_factor,
+            )
+            self.draw_rois()
+            return
+        if self.tile_cache is not None:
+            self.tile_cache.clear()
+
+        # Calculate final dimensions
+        final_width = int(pil_image.width * scale_factor)
+        final_height = int(pil_image.height * scale_factor)
+
+        # Resize the image
+        if scale_factor != 1.0:
+            pil_image = pil_image.resize(
+                (final_width, final_height), Image.Resampling.LANCZOS
+            )
 
-            # Calculate final dimensions
-            final_width = int(pil_image.width * scale_factor)
-            final_height = int(pil_image.height * scale_factor)
+        # Convert back to PhotoImage
+        self.photo_image = ImageTk.PhotoImage(pil_image)
 
-            # Resize the image
-            if scale_factor != 1.0:
-                pil_image = pil_image.resize(
-                    (final_width, final_height), Image.Resampling.LANCZOS
-                )
+        # Update canvas
+        self.canvas.delete("frame")
+        self.canvas.create_image(
+            0, 0, anchor=tk.NW, image=self.photo_image, tags=("frame",)
+        )
 
-            # Convert back to PhotoImage
-            self.photo_image = ImageTk.PhotoImage(pil_image)
+        # Update scroll region
+        self.canvas.configure(
+            scrollregion=(0, 0, pil_image.width, pil_image.height)
+        )
+        self.frame_extent = (pil_image.width, pil_image.height)
+        self.draw_rois()
+
+    def draw_rois(self) -> None:
+        """Draw the boxes of every tag on the frame on screen."""
+        self.canvas.delete("roi")
+        index = self.current_frame_index()
+        if self.rois is None or index is None:
+            return
+        width, height = self.frame_extent
+        correction = self.displayed_correction
+        for tag, box in self.rois.boxes_at(index):
+            if correction is not None:
+                from .stabilization import warp_box
+
+                box = warp_box(box, correction, width, height)
+            left, top, right, bottom = box
+            self.canvas.create_rectangle(
+                left * width,
+                top * height,
+                right * width,
+                bottom * height,
+                outline="yellow",
+                width=2,
+                tags=("roi",),
+            )
+            self.canvas.create_text(
+                left * width + 3,
+                top * height + 2,
+                anchor=tk.NW,
+                text=tag,
+                fill="yellow",
+                tags=("roi",),
+            )
 
-            # Update canvas
-            self.canvas.delete("all")
-            self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo_image)
+    def current_frame_index(self) -> int | None:
+        if self.displayed_frame is None:
+            return None
+        return self.displayed_frame.frame_index
+
+    def on_roi_start(self, event: Any) -> None:
+        if not self.tag_var.get().strip() or self.current_frame_index() is None:
+            print("Enter a tag to draw its box")
+            return
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        self.roi_start = (x, y)
+        self.canvas.delete("roi_draft")
+        self.canvas.create_rectangle(
+            x, y, x, y, outline="cyan", dash=(4, 2), tags=("roi_draft",)
+        )
 
-            # Update scroll region
-            self.canvas.configure(
-                scrollregion=(0, 0, pil_image.width, pil_image.height)
+    def finish_roi(self, event: Any) -> None:
+        """Store the box just drawn as a keyframe of its tag."""
+        assert self.roi_start is not None
+        x0, y0 = self.roi_start
+        x1, y1 = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        self.roi_start = None
+        self.canvas.delete("roi_draft")
+        width, height = self.frame_extent
+        index = self.current_frame_index()
+        if (
+            self.rois is None
+            or index is None
+            or not width
+            or not height
+            or abs(x1 - x0) < 3
+            or abs(y1 - y0) < 3
+        ):
+            return
+        box = (
+            max(0.0, min(x0, x1) / width),
+            max(0.0, min(y0, y1) / height),
+            min(1.0, max(x0, x1) / width),
+            min(1.0, max(y0, y1) / height),
+        )
+        if self.displayed_correction is not None:
+            from .stabilization import warp_box
+
+            box = warp_box(
+                box, self.displayed_correction, width, height, inverse=True
             )
+        tag = self.tag_var.get().strip()
+        self.rois.track(tag).set_key(index, box)
+        self.save_rois()
+        self.draw_rois()
+        self.track_from(tag, index, box)
+
+    def on_roi_hide(self, event: Any) -> None:
+        index = self.current_frame_index()
+        tag = self.tag_var.get().strip()
+        if self.rois is None or index is None or tag not in self.rois.tracks:
+            return
+        self.stop_tracking(tag)
+        track = self.rois.track(tag)
+        track.set_key(index, None)
+        track.clear_tracked(index, track.next_drawn_key(index))
+        self.save_rois()
+        self.draw_rois()
+
+    def track_from(self, tag: str, index: int, box: "Box") -> None:
+        """Propagate a drawn box forwards up to the tag's next drawn
+        keyframe, replacing what the tracker found there before."""
+        from .tracking import TrackPropagator
+
+        if self.rois is None or not self.video_files:
+            return
+        self.stop_tracking(tag)
+        track = self.rois.track(tag)
+        end_frame = track.next_drawn_key(index)
+        track.clear_tracked(index, end_frame)
+        # The proxy or the local copy decode faster and number frames alike
+        path = (
+            self.current_proxy_path()
+            or self.current_local_path()
+            or os.path.join(
+                self.video_dir, self.video_files[self.current_video_index]
+            )
+        )
+        if not self.propagators:
+            self.root.after(250, self.poll_tracking)
+        self.propagators[tag] = TrackPropagator(
+            path, self.decoder_options, index, box, end_frame
+        )
+
+    def poll_tracking(self) -> None:
+        """Merge the keyframes the trackers found since the last poll."""
+        if self.rois is None:
+            return
+        changed = False
+        for tag, propagator in list(self.propagators.items()):
+            while (keys := propagator.next_keys()) is not None:
+                self.rois.track(tag).add_tracked(*keys)
+                changed = True
+            if propagator.exhausted:
+                del self.propagators[tag]
+        if changed:
+            self.save_rois()
+            self.draw_rois()
+        if self.propagators:
+            self.root.after(250, self.poll_tracking)
+
+    def stop_tracking(self, tag: str | None = None) -> None:
+        """Stop the tracker of `tag`, or every tracker; unmerged keyframes
+        are dropped."""
+        for name in [tag] if tag is not None else list(self.propagators):
+            propagator = self.propagators.pop(name, None)
+            if propagator is not None:
+                propagator.stop()
+
+    def load_rois(self) -> None:
+        from .roi import RoiStore, roi_path
+
+        self.stop_tracking()
+        self.rois = RoiStore()
+        path = roi_path(
+            self.video_dir, self.video_files[self.current_video_index]
+        )
+        if path.exists():
+            try:
+                self.rois = RoiStore.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Could not read {path}: {e}")
+
+    def save_rois(self) -> None:
+        from .roi import roi_path
+
+        if self.rois is None or not self.video_files:
+            return
+        try:
+            self.rois.save(
+                roi_path(
+                    self.video_dir, self.video_files[self.current_video_index]
+                )
+            )
+        except OSError as e:
+            print(f"Error saving boxes: {e}")
 
     def on_canvas_click(self, event: Any) -> None:
         """Start dragging operation."""
-        self.drag_start_x = self.canvas.canvasx(event.x)
-        self.drag_start_y = self.canvas.canvasy(event.y)
+        # Pans are measured in window pixels from where the drag started
+        self.drag_start_x = event.x
+        self.drag_start_y = event.y
+        self.pan_origin = (self.canvas.canvasx(0), self.canvas.canvasy(0))
         self.is_dragging = True
         # Change cursor to indicate dragging mode
         self.canvas.config(cursor="fleur")
 
     def on_canvas_drag(self, event: Any) -> None:
         """Handle canvas dragging for panning."""
+        if self.roi_start is not None:
+            self.canvas.coords(
+                "roi_draft",
+                *self.roi_start,
+                self.canvas.canvasx(event.x),
+                self.canvas.canvasy(event.y),
+            )
+            return
         if self.is_dragging and self.zoom_level > 1.0:
-            current_x = self.canvas.canvasx(event.x)
-            current_y = self.canvas.canvasy(event.y)
+            self.pan_offset = (
+                self.drag_start_x - event.x,
+                self.drag_start_y - event.y,
+            )
+            # Motion events come much faster than the screen refreshes
+            self.schedule_view_update()
 
-            dx = -(current_x - self.drag_start_x)
-            dy = -(current_y - self.drag_start_y)
+    def schedule_view_update(self) -> None:
+        from .zoom import PAN_INTERVAL_MS
 
-            # Get current scroll position
-            scroll_x = self.canvas.canvasx(0)
-            scroll_y = self.canvas.canvasy(0)
+        if self.view_update_id is None:
+            self.view_update_id = self.root.after(
+                PAN_INTERVAL_MS, self.update_view
+            )
 
-            # Calculate new scroll position
-            new_x = scroll_x + dx
-            new_y = scroll_y + dy
+    def update_view(self) -> None:
+        """Apply the latest pan offset and draw the tiles now in view."""
+        self.view_update_id = None
+        if self.is_dragging and self.zoom_level > 1.0:
+            new_x = self.pan_origin[0] + self.pan_offset[0]
+            new_y = self.pan_origin[1] + self.pan_offset[1]
 
             # Get scroll region bounds
             scroll_region = self.canvas.cget("scrollregion").split()
@@ -1056,11 +2131,23 @@ class VideoLabelingApp:
                 self.canvas.xview_moveto(new_x / max_x if max_x > 0 else 0)
                 self.canvas.yview_moveto(new_y / max_y if max_y > 0 else 0)
 
-            self.drag_start_x = current_x
-            self.drag_start_y = current_y
+        if self.tile_cache is not None:
+            self.tile_cache.refresh()
+            # Tiles drawn just now would cover the boxes
+            self.canvas.tag_raise("roi")
+
+    def on_xscroll(self, *args: Any) -> None:
+        self.canvas.xview(*args)
+        self.schedule_view_update()
+
+    def on_yscroll(self, *args: Any) -> None:
+        self.canvas.yview(*args)
+        self.schedule_view_update()
 
     def on_canvas_release(self, event: Any) -> None:
         """End dragging operation."""
+        if self.roi_start is not None:
+            self.finish_roi(event)
         self.is_dragging = False
         # Reset cursor
         self.canvas.config(cursor="")
@@ -1073,4 +2160,8 @@ class VideoLabelingApp:
                 f"{self.video_files[self.current_video_index]}"
                 f" ({self.original_video_width}x{self.original_video_height})"
             )
+            if self.playing_proxy:
+                composed_text += " [proxy]"
+            elif self.playing_local_copy:
+                composed_text += " [local]"
             self.video_label.config(text=composed_text)
@@ -0,0 +1,159 @@
+import tkinter as tk
+from collections.abc import Callable
+from tkinter import ttk
+from typing import Any
+
+from .taxonomy import BehaviorEntry, BehaviorSearchIndex, Taxonomy
+
+
+class BehaviorTree:
+    """Behaviour tree view with an incremental search box.
+
+    Filtering detaches and reattaches the existing Treeview items instead of
+    rebuilding them, so typing stays cheap on large taxonomies.
+    """
+
+    def __init__(
+        self,
+        parent: ttk.Frame,
+        taxonomy: Taxonomy,
+        toggler: Callable[[BehaviorEntry], None],
+    ) -> None:
+        self.toggler = toggler
+        self.search_index = BehaviorSearchIndex(taxonomy)
+
+        # Search box
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(parent, textvariable=self.search_var)
+        self.search_entry.pack(fill="x", pady=(0, 5))
+        self.search_var.trace_add("write", lambda *_: self.apply_filter())
+        self.search_entry.bind("<Return>", self.on_search_return)
+        self.search_entry.bind("<Down>", self.on_search_down)
+        self.search_entry.bind("<Escape>", lambda e: self.search_var.set(""))
+
+        # Create the main tree view
+        self.tree = ttk.Treeview(parent, selectmode="browse")
+        self.tree.pack(fill="both", expand=True)
+
+        # Add scrollbar
+        scrollbar = ttk.Scrollbar(
+            parent, orient="vertical", command=self.tree.yview
+        )
+        scrollbar.pack(side="right", fill="y")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        # Configure columns
+        self.tree["columns"] = ("type",)
+        self.tree.column("#0", width=400, minwidth=400)
+        self.tree.column("type", width=100, minwidth=100)
+
+        # Configure headings
+        self.tree.heading("#0", text="Behavior")
+        self.tree.heading("type", text="Type")
+
+        # Bind double-click and Enter on the selected behaviour
+        self.tree.bind("<Double-1>", self.on_tree_select)
+        self.tree.bind("<Return>", self.on_tree_select)
+
+        # Leaf item ids map straight to their compiled entries
+        self.entries_by_item: dict[str, BehaviorEntry] = {}
+        self.leaf_items: list[str] = []
+        # Original layout, needed to reattach detached items in order
+        self.parent_of: dict[str, str] = {}
+        self.children_of: dict[str, list[str]] = {"": []}
+
+        # Add categories (created on first use) and their behaviors
+        category_items: dict[tuple[str, ...], str] = {}
+        for index, entry in enumerate(taxonomy.entries):
+            parent_item = ""
+            for depth in range(1, len(entry.path) + 1):
+                category_path = entry.path[:depth]
+                if category_path not in category_items:
+                    category_item = self.tree.insert(
+                        parent_item,
+                        "end",
+                        iid=f"c{len(category_items)}",
+                        text=category_path[-1],
+                        values=("",),
+                    )
+                    category_items[category_path] = category_item
+                    self._register(category_item, parent_item)
+                    self.children_of[category_item] = []
+                parent_item = category_items[category_path]
+
+            item = self.tree.insert(
+                parent_item,
+                "end",
+                iid=f"b{index}",
+                text=entry.name,
+                values=(entry.record_type,),
+            )
+            self._register(item, parent_item)
+            self.entries_by_item[item] = entry
+            self.leaf_items.append(item)
+
+        self.visible: set[str] = set(self.parent_of)
+        self.filtering = False
+
+    def _register(self, item: str, parent_item: str) -> None:
+        self.parent_of[item] = parent_item
+        self.children_of[parent_item].append(item)
+
+    def apply_filter(self) -> None:
+        """Show only behaviours matching the search box."""
+        query = self.search_var.get()
+        matches = self.search_index.search(query)
+
+        visible: set[str] = set()
+        for index in matches:
+            item = self.leaf_items[index]
+            while item and item not in visible:
+                visible.add(item)
+                item = self.parent_of[item]
+
+        # Only parents whose set of visible children changed are touched
+        changed = visible.symmetric_difference(self.visible)
+        for item in changed - visible:
+            self.tree.detach(item)
+        for parent_item in {self.parent_of[item] for item in changed}:
+            for child in self.children_of[parent_item]:
+                if child in visible:
+                    self.tree.move(child, parent_item, "end")
+        self.visible = visible
+
+        # Expand matching categories while filtering, collapse on clear
+        filtering = bool(query.strip())
+        if filtering or self.filtering:
+            for item in self.children_of:
+                if item:
+                    self.tree.item(item, open=filtering and item in visible)
+        self.filtering = filtering
+
+        if matches and filtering:
+            first = self.leaf_items[matches[0]]
+            self.tree.selection_set(first)
+            self.tree.focus(first)
+            self.tree.see(first)
+        else:
+            self.tree.selection_remove(self.tree.selection())
+
+    def on_search_return(self, event: Any) -> None:
+        self.on_tree_select(event)
+
+    def on_search_down(self, event: Any) -> None:
+        self.tree.focus_set()
+        if not self.tree.selection() and self.visible:
+            first = self.tree.get_children("")[0]
+            self.tree.selection_set(first)
+            self.tree.focus(first)
+
+    def on_tree_select(self, event: Any) -> None:
+        """Handle selection of a behavior in the tree."""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        # Only handle leaf nodes (actual behaviors)
+        entry = self.entries_by_item.get(selection[0])
+        if entry is not None:
+            print(f"Selected behavior: {entry.key} ({entry.record_type})")
+            self.toggler(entry)
@@ -0,0 +1,273 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import cv2
+from cv2.typing import MatLike
+
+from .media_index import mark_export_directory, probe_video
+from .record import BehaviorRecord
+from .snapshots import SEEK_GAP_SECONDS, slugify
+from .video_source import DecoderOptions, open_video_source
+
+# Seconds added before and after each bout
+CLIP_PADDING_SECONDS = 2.0
+CLIP_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# Decoded frames waiting for each clip writer
+PENDING_FRAMES = 32
+# Containers ffmpeg can cut without re-encoding
+STREAM_COPY_SUFFIXES = frozenset({".mp4", ".m4v", ".mov", ".mkv", ".ts"})
+
+
+@dataclass(frozen=True)
+class ClipSpec:
+    start: float
+    end: float
+    path: Path
+
+
+@dataclass
+class ClipReport:
+    written: list[Path] = field(default_factory=list)
+    failed: list[ClipSpec] = field(default_factory=list)
+
+
+def record_clips(
+    records: Sequence[BehaviorRecord],
+    directory: Path,
+    stem: str,
+    padding: float = CLIP_PADDING_SECONDS,
+    duration: float | None = None,
+    suffix: str = ".mp4",
+) -> list[ClipSpec]:
+    """One clip per finished STATE record, padded on both sides."""
+    clips: list[ClipSpec] = []
+    for number, record in enumerate(records, start=1):
+        if record.record_type != "STATE" or record.end_time is None:
+            continue
+        start = max(0.0, record.start_time - padding)
+        end = record.end_time + padding
+        if duration:
+            end = min(end, duration)
+        if end <= start:
+            continue
+        name = f"{stem}_{number:04d}_{slugify(record.behaviour)}{suffix}"
+        clips.append(ClipSpec(start, end, directory / name))
+    return clips
+
+
+def can_stream_copy(video_path: str) -> bool:
+    return (
+        shutil.which("ffmpeg") is not None
+        and os.path.isfile(video_path)
+        and Path(video_path).suffix.lower() in STREAM_COPY_SUFFIXES
+    )
+
+
+def copy_clip(video_path: str, clip: ClipSpec) -> Path:
+    """Cut without re-encoding.
+
+    The cut starts at the keyframe at or before `clip.start`, so the clip
+    may begin a little early but every frame is the original.
+    """
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-y",
+            "-ss",
+            f"{clip.start:.3f}",
+            "-to",
+            f"{clip.end:.3f}",
+            "-i",
+            video_path,
+            "-map",
+            "0",
+            "-c",
+            "copy",
+            "-avoid_negative_ts",
+            "make_zero",
+            str(clip.path),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return clip.path
+
+
+class _ClipWriter(threading.Thread):
+    """Encodes the frames of one clip as they arrive."""
+
+    def __init__(self, clip: ClipSpec, fps: float) -> None:
+        threading.Thread.__init__(self, daemon=True)
+        self.clip = clip
+        self.fps = fps
+        self.frames: queue.Queue[MatLike | None] = queue.Queue(PENDING_FRAMES)
+        self.count = 0
+        self.error: Exception | None = None
+
+    def run(self) -> None:
+        writer: cv2.VideoWriter | None = None
+        try:
+            while (frame := self.frames.get()) is not None:
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(
+                        str(self.clip.path),
+                        cv2.VideoWriter.fourcc(*"mp4v"),
+                        self.fps,
+                        (width, height),
+                    )
+                    if not writer.isOpened():
+                        raise OSError(f"Cannot write {self.clip.path}")
+                writer.write(frame)
+                self.count += 1
+        except Exception as e:  # noqa: BLE001
+            # Any failure only loses this clip; the others keep going
+            self.error = e
+            # Keep draining so the decoder never blocks on this clip
+            while self.frames.get() is not None:
+                pass
+        finally:
+            if writer is not None:
+                writer.release()
+
+
+def encode_clips(
+    video_path: str,
+    clips: Sequence[ClipSpec],
+    options: DecoderOptions | None = None,
+) -> ClipReport:
+    """Re-encode frame-accurate clips from a single pass over the video.
+
+    One decoder reads the file front to back, seeking only over long gaps,
+    and hands each frame to the writer of every clip that contains it, so
+    overlapping clips share decoded frames and encode concurrently.
+    """
+    report = ClipReport()
+    with open_video_source(video_path, options) as source:
+        fps = source.fps or 25.0
+        ranges = sorted(
+            (
+                (round(clip.start * fps), round(clip.end * fps), clip)
+                for clip in clips
+            ),
+            key=lambda item: item[0],
+        )
+        seek_gap = round(SEEK_GAP_SECONDS * fps)
+        active: list[tuple[int, _ClipWriter]] = []
+        writers: list[_ClipWriter] = []
+        next_clip = 0
+
+        while next_clip < len(ranges) or active:
+            if not active:
+                begin = ranges[next_clip][0]
+                if begin - source.frame_index > seek_gap:
+                    source.seek_frame(begin)
+            if not source.grab():
+                break
+            index = source.frame_index
+            while next_clip < len(ranges) and ranges[next_clip][0] <= index:
+                _, end, clip = ranges[next_clip]
+                writer = _ClipWriter(clip, fps)
+                writer.start()
+                writers.append(writer)
+                active.append((end, writer))
+                next_clip += 1
+            if not active:
+                continue
+
+            frame = source.retrieve()
+            if frame is None:
+                break
+            for _, writer in active:
+                writer.frames.put(frame)
+            # Clips end before their end frame
+            for end, writer in active:
+                if end <= index + 1:
+                    writer.frames.put(None)
+            active = [item for item in active if item[0] > index + 1]
+
+        for _, writer in active:
+            writer.frames.put(None)
+
+    for writer in writers:
+        writer.join()
+        if writer.error is None and writer.count:
+            report.written.append(writer.clip.path)
+        else:
+            report.failed.append(writer.clip)
+    report.failed.extend(clip for _, _, clip in ranges[next_clip:])
+    return report
+
+
+def export_clips(
+    jobs: Mapping[str, Sequence[BehaviorRecord]],
+    output_dir: str | Path,
+    padding: float = CLIP_PADDING_SECONDS,
+    frame_accurate: bool = False,
+    options: DecoderOptions | None = None,
+) -> ClipReport:
+    """Write a clip of every STATE record of every video in `jobs`.
+
+    Clips are cut with ffmpeg stream copy when the container allows it and
+    `frame_accurate` is not set; otherwise, or if a copy fails, they are
+    re-encoded. Videos and copies are processed concurrently.
+    """
+    output_dir = mark_export_directory(output_dir)
+    report = ClipReport()
+    with ThreadPoolExecutor(CLIP_WORKERS) as pool:
+        copies: list[tuple[str, ClipSpec, Future[Path]]] = []
+        encodes: list[Future[ClipReport]] = []
+        for video_path, records in jobs.items():
+            stem = Path(video_path).stem
+            directory = output_dir / stem
+            stream_copy = not frame_accurate and can_stream_copy(video_path)
+            clips = record_clips(
+                records,
+                directory,
+                stem,
+                padding,
+                probe_video(video_path).duration or None,
+                Path(video_path).suffix.lower() if stream_copy else ".mp4",
+            )
+            if not clips:
+                continue
+            directory.mkdir(parents=True, exist_ok=True)
+            if stream_copy:
+                copies.extend(
+                    (video_path, clip, pool.submit(copy_clip, video_path, clip))
+                    for clip in clips
+                )
+            else:
+                encodes.append(
+                    pool.submit(encode_clips, video_path, clips, options)
+                )
+
+        fallback: dict[str, list[ClipSpec]] = {}
+        for video_path, clip, future in copies:
+            try:
+                report.written.append(future.result())
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"Stream copy of {clip.path.name} failed: {e}")
+                fallback.setdefault(video_path, []).append(
+                    ClipSpec(
+                        clip.start, clip.end, clip.path.with_suffix(".mp4")
+                    )
+                )
+        encodes.extend(
+            pool.submit(encode_clips, video_path, clips, options)
+            for video_path, clips in fallback.items()
+        )
+        for encoded in encodes:
+            result = encoded.result()
+            report.written.extend(result.written)
+            report.failed.extend(result.failed)
+    return report
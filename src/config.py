@@ -1,13 +1,33 @@
+import os
+from functools import cache
+from pathlib import Path
 from typing import Any
 
-BEHAVIOR_DATA = {
+from .taxonomy import Taxonomy, TaxonomyError, load_taxonomy
+
+# Path to a JSON/TOML taxonomy that replaces BEHAVIOR_DATA
+TAXONOMY_ENV_VAR = "BEHAVIOUR_TAXONOMY"
+
+# Where indexes, caches and other derived data are kept
+APP_DATA_ENV_VAR = "BEHAVIOUR_LABELING_HOME"
+DEFAULT_APP_DATA_DIR = Path.home() / ".behaviour_labeling"
+
+# Seconds of cProfile/tracemalloc capture to take right after startup
+PROFILE_ENV_VAR = "BEHAVIOUR_PROFILE"
+
+# The most frequent events of each video get single-letter hotkeys; j, k
+# and l are taken by the playback keys
+BEHAVIOR_DATA: dict[str, Any] = {
     "Individuales": {
-        "Comportamientos en fondo": "EVENT",
-        "Respiración": "EVENT",
-        "Respiración con desprendimiento de lodo": "EVENT",
-        "Respiración con expulsión de agua": "EVENT",
-        "Buceo exponiendo la cola": "EVENT",
-        "Buceo sin exponer la cola": "EVENT",
+        "Comportamientos en fondo": {"type": "EVENT", "hotkey": "f"},
+        "Respiración": {"type": "EVENT", "hotkey": "r"},
+        "Respiración con desprendimiento de lodo": {
+            "type": "EVENT",
+            "hotkey": "d",
+        },
+        "Respiración con expulsión de agua": {"type": "EVENT", "hotkey": "e"},
+        "Buceo exponiendo la cola": {"type": "EVENT", "hotkey": "c"},
+        "Buceo sin exponer la cola": {"type": "EVENT", "hotkey": "b"},
         "Desplazamiento": "STATE",
         "Alejarse": "EVENT",
         "Acercarse": "EVENT",
@@ -17,7 +37,7 @@ BEHAVIOR_DATA = {
     "Sociales": {
         "Comportamientos en fondo": "EVENT",
         "Interacción en fondo (Indefinido)": "EVENT",
-        "Respiración sincronizada": "EVENT",
+        "Respiración sincronizada": {"type": "EVENT", "hotkey": "s"},
         "Romping": "EVENT",
         "Grouping": "EVENT",
         "Desplazamiento sincronizado": "STATE",
@@ -87,18 +107,43 @@ BEHAVIOR_DATA = {
 }
 
 
+DEFAULT_TAXONOMY = Taxonomy.from_mapping(BEHAVIOR_DATA)
+
+
+def get_app_data_dir(*parts: str) -> Path:
+    """Directory under the app data root, created on demand."""
+    root = Path(os.environ.get(APP_DATA_ENV_VAR) or DEFAULT_APP_DATA_DIR)
+    path = root.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@cache
+def get_behavior_taxonomy() -> Taxonomy:
+    """Load the active taxonomy once; later calls reuse the compiled index."""
+    taxonomy_path = os.environ.get(TAXONOMY_ENV_VAR)
+    if taxonomy_path:
+        return load_taxonomy(taxonomy_path)
+    return DEFAULT_TAXONOMY
+
+
 def get_recursive_parents(
-    target: str, data: dict[str, Any], parents: list[str] | None = None
+    target: str, data: dict[str, Any] | None = None
 ) -> list[str]:
-    if parents is None:
-        parents = []
-
-    for key, value in data.items():
-        if isinstance(value, dict):
-            if target in value:
-                return [key] + parents
-            result = get_recursive_parents(target, value, [key] + parents)
-            if result:
-                return result
+    """Parents of the behaviour or category `target`, closest first.
 
-    return []
+    The active and default taxonomies are compiled once; any other
+    mapping may have changed since the last call, so it is compiled
+    afresh. Malformed mappings have no behaviours, so nothing has parents
+    in them.
+    """
+    if data is None:
+        taxonomy = get_behavior_taxonomy()
+    elif data is BEHAVIOR_DATA:
+        taxonomy = DEFAULT_TAXONOMY
+    else:
+        try:
+            taxonomy = Taxonomy.from_mapping(data)
+        except TaxonomyError:
+            return []
+    return list(taxonomy.parents_of(target))
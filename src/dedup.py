@@ -0,0 +1,270 @@
+import multiprocessing
+import os
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from .config import get_app_data_dir
+from .jobs import JobContext, JobKind
+from .media_index import FileSignature
+from .video_source import open_video_source
+
+# One hash per this many seconds of video
+HASH_INTERVAL_SECONDS = 1.0
+HASH_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# Frames this flat (grey level standard deviation) hash to noise, so they
+# are stored as 0 and never matched
+FLAT_FRAME_STD = 4.0
+# A hash is split into this many bands of bits; frames are only compared
+# in full when they agree on a whole band
+LSH_BANDS = 4
+# Frames whose hashes differ in this many bits or fewer look the same
+MAX_HAMMING_DISTANCE = 10
+# Buckets fuller than this hold generic frames that match everything
+MAX_BUCKET_SIZE = 64
+# Shared stretches shorter than this many samples are not reported
+MIN_MATCHED_SAMPLES = 5
+# Two videos sharing this share of the longer one are duplicates
+DUPLICATE_COVERAGE = 0.9
+DEDUP_JOB = "dedup"
+
+type Hashes = npt.NDArray[np.uint64]
+
+
+@dataclass(frozen=True, eq=False)
+class HashedVideo:
+    path: str
+    mtime_ns: int
+    interval: float
+    # One 64-bit perceptual hash per sample, 0 for flat frames
+    hashes: Hashes
+
+
+@dataclass(frozen=True)
+class Overlap:
+    first: str
+    second: str
+    # Time in `second` minus time in `first` of the same content, seconds
+    offset: float
+    # Seconds of content found in both
+    duration: float
+    duplicate: bool
+
+
+def dedup_dir() -> Path:
+    return get_app_data_dir("dedup")
+
+
+def hashes_path(signature: FileSignature) -> Path:
+    return dedup_dir() / f"{signature.digest}.npz"
+
+
+def frame_hash(frame: MatLike) -> int:
+    """pHash: signs of the lowest 8x8 DCT frequencies of a 32x32 thumbnail
+    against their median."""
+    gray = cv2.cvtColor(
+        cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA),
+        cv2.COLOR_BGR2GRAY,
+    ).astype(np.float32)
+    if gray.std() < FLAT_FRAME_STD:
+        return 0
+    frequencies = cv2.dct(gray)[:8, :8].ravel()
+    # The DC term is the mean brightness, which re-encodes shift freely
+    bits = frequencies > np.median(frequencies[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def video_hashes(path: str, interval: float = HASH_INTERVAL_SECONDS) -> Hashes:
+    """Hash one frame every `interval` seconds; runs in a worker process.
+
+    Frames in between are only grabbed, which costs their decode but not
+    their conversion.
+    """
+    hashes: list[int] = []
+    next_time = 0.0
+    with open_video_source(path) as source:
+        while source.grab():
+            if source.position + 1e-6 < next_time:
+                continue
+            frame = source.retrieve()
+            if frame is None:
+                break
+            hashes.append(frame_hash(frame))
+            next_time += interval
+    return np.array(hashes, dtype=np.uint64)
+
+
+def save_hashes(
+    signature: FileSignature, hashes: Hashes, interval: float
+) -> None:
+    path = hashes_path(signature)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as file:
+        np.savez(
+            file,
+            path=np.str_(signature.path),
+            mtime_ns=np.int64(signature.mtime_ns),
+            interval=np.float64(interval),
+            hashes=hashes,
+        )
+    os.replace(tmp_path, path)
+
+
+def load_index() -> list[HashedVideo]:
+    """Every hashed video, the latest version of each path only."""
+    latest: dict[str, HashedVideo] = {}
+    for path in dedup_dir().glob("*.npz"):
+        try:
+            with np.load(path) as data:
+                video = HashedVideo(
+                    str(data["path"]),
+                    int(data["mtime_ns"]),
+                    float(data["interval"]),
+                    data["hashes"].astype(np.uint64),
+                )
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable hashes in {path}: {e}")
+            continue
+        known = latest.get(video.path)
+        if known is None or known.mtime_ns < video.mtime_ns:
+            latest[video.path] = video
+    return list(latest.values())
+
+
+def _bands(value: int) -> list[tuple[int, int]]:
+    width = 64 // LSH_BANDS
+    mask = (1 << width) - 1
+    return [
+        (band, (value >> (band * width)) & mask) for band in range(LSH_BANDS)
+    ]
+
+
+def find_overlaps(
+    videos: Sequence[HashedVideo], query: Sequence[str] | None = None
+) -> list[Overlap]:
+    """Pairs of videos that share content, and how they line up.
+
+    Every sample is put in one bucket per band, so only samples that agree
+    exactly on some band are compared. Each pair of matching samples votes
+    for the offset between the two videos; the offset with most votes, give
+    or take one sample, is taken as their alignment. With `query`, only
+    pairs involving one of those paths are reported.
+    """
+    buckets: defaultdict[tuple[int, int], list[tuple[int, int]]] = defaultdict(
+        list
+    )
+    for video_index, video in enumerate(videos):
+        for sample, value in enumerate(video.hashes.tolist()):
+            if value:
+                for key in _bands(value):
+                    buckets[key].append((video_index, sample))
+
+    wanted = set(query) if query is not None else None
+    pairs: defaultdict[tuple[int, int], set[tuple[int, int]]] = defaultdict(set)
+    for bucket in buckets.values():
+        if len(bucket) > MAX_BUCKET_SIZE:
+            continue
+        for i, (first, first_sample) in enumerate(bucket):
+            for second, second_sample in bucket[i + 1 :]:
+                if first == second:
+                    continue
+                if first > second:
+                    first, first_sample, second, second_sample = (
+                        second,
+                        second_sample,
+                        first,
+                        first_sample,
+                    )
+                pairs[first, second].add((first_sample, second_sample))
+
+    overlaps: list[Overlap] = []
+    for (first, second), matches in pairs.items():
+        a, b = videos[first], videos[second]
+        if wanted is not None and a.path not in wanted and b.path not in wanted:
+            continue
+        a_hashes, b_hashes = a.hashes.tolist(), b.hashes.tolist()
+        votes = Counter(
+            j - i
+            for i, j in matches
+            if (a_hashes[i] ^ b_hashes[j]).bit_count() <= MAX_HAMMING_DISTANCE
+        )
+        if not votes:
+            continue
+        # Sampling phases differ between files, so neighbours count too
+        offset = max(
+            votes,
+            key=lambda d: votes[d - 1] + votes[d] + votes[d + 1],
+        )
+        matched = len(
+            {
+                i
+                for i, j in matches
+                if abs(j - i - offset) <= 1
+                and (a_hashes[i] ^ b_hashes[j]).bit_count()
+                <= MAX_HAMMING_DISTANCE
+            }
+        )
+        if matched < MIN_MATCHED_SAMPLES:
+            continue
+        longer = max(a.hashes.size, b.hashes.size)
+        overlaps.append(
+            Overlap(
+                a.path,
+                b.path,
+                offset * a.interval,
+                matched * a.interval,
+                matched >= DUPLICATE_COVERAGE * longer,
+            )
+        )
+    return overlaps
+
+
+class DuplicateFinder:
+    """Hashes videos as background jobs and matches them across every
+    video hashed so far, in any directory."""
+
+    def __init__(self, max_workers: int = HASH_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # The UI process runs Tk and several threads; never fork it
+            self._pool = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def job_kind(self) -> JobKind:
+        return JobKind(
+            DEDUP_JOB,
+            self.hash,
+            lambda signature: hashes_path(signature).exists(),
+        )
+
+    def hash(self, signature: FileSignature, context: JobContext) -> None:
+        hashes = (
+            self._executor()
+            .submit(video_hashes, signature.path, HASH_INTERVAL_SECONDS)
+            .result()
+        )
+        save_hashes(signature, hashes, HASH_INTERVAL_SECONDS)
+
+    def overlaps(self, signatures: Sequence[FileSignature]) -> list[Overlap]:
+        """Overlaps involving any of `signatures`."""
+        return find_overlaps(
+            load_index(), [signature.path for signature in signatures]
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
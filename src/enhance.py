@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from .config import get_app_data_dir
+
+ENHANCE_SETTINGS_FILE = "enhance.json"
+CLAHE_TILES = (8, 8)
+# Side of the square the haze is measured over, on a 1080-pixel-wide frame
+DEHAZE_WINDOW = 15
+# Haze is estimated on a frame this many times smaller; it varies slowly
+DEHAZE_DOWNSCALE = 4
+# Brightest share of the haze map averaged into the colour of the water
+DEHAZE_TOP_FRACTION = 0.001
+# Never assume less than this much of the scene shows through the haze
+DEHAZE_MIN_TRANSMISSION = 0.1
+
+
+@dataclass(frozen=True)
+class EnhanceSettings:
+    # Input levels stretched to pure black and pure white
+    black: int = 0
+    white: int = 255
+    # Above 1 brightens the midtones
+    gamma: float = 1.0
+    # CLAHE clip limit on the brightness; 0 turns it off
+    clahe: float = 0.0
+    # Share of the estimated haze removed, 0 to 1
+    dehaze: float = 0.0
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "EnhanceSettings":
+        known = {f.name for f in fields(cls)}
+        settings = cls(**{k: v for k, v in data.items() if k in known})
+        if not 0 <= settings.black < settings.white <= 255:
+            raise ValueError("Levels must satisfy 0 <= black < white <= 255")
+        if settings.gamma <= 0:
+            raise ValueError("Gamma must be positive")
+        return settings
+
+    @property
+    def enabled(self) -> bool:
+        return self != EnhanceSettings()
+
+
+def load_enhance_settings(path: str | Path | None = None) -> EnhanceSettings:
+    path = Path(path or get_app_data_dir() / ENHANCE_SETTINGS_FILE)
+    try:
+        with open(path, encoding="utf-8") as file:
+            return EnhanceSettings.from_dict(json.load(file))
+    except FileNotFoundError:
+        return EnhanceSettings()
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Ignoring enhancement settings in {path}: {e}")
+        return EnhanceSettings()
+
+
+def save_enhance_settings(
+    settings: EnhanceSettings, path: str | Path | None = None
+) -> Path:
+    path = Path(path or get_app_data_dir() / ENHANCE_SETTINGS_FILE)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(asdict(settings), file, indent=2)
+    return path
+
+
+def levels_lut(black: int, white: int, gamma: float) -> npt.NDArray[np.uint8]:
+    """Contrast stretch and gamma folded into one 256-entry table."""
+    levels = np.arange(256, dtype=np.float32)
+    levels = np.clip((levels - black) / (white - black), 0.0, 1.0)
+    return np.rint(255 * levels ** (1 / gamma)).astype(np.uint8)
+
+
+def dehaze(frame: MatLike, strength: float) -> MatLike:
+    """Remove `strength` of the haze with the dark channel prior.
+
+    In a clear image nearly every patch has some channel close to black;
+    in murky water that darkest channel is lifted by the haze instead. The
+    haze map is measured on a downscaled frame and scaled back up; only
+    the recovery itself touches every pixel of the full frame.
+    """
+    height, width = frame.shape[:2]
+    small = cv2.resize(
+        frame,
+        (
+            max(1, width // DEHAZE_DOWNSCALE),
+            max(1, height // DEHAZE_DOWNSCALE),
+        ),
+        interpolation=cv2.INTER_AREA,
+    )
+    window = max(3, round(DEHAZE_WINDOW * width / 1080 / DEHAZE_DOWNSCALE))
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (window, window))
+    dark = cv2.erode(small.min(axis=2), kernel)
+
+    # The haze colour is that of the haziest pixels
+    count = max(1, round(dark.size * DEHAZE_TOP_FRACTION))
+    haziest = np.argpartition(dark.ravel(), -count)[-count:]
+    airlight = np.maximum(
+        small.reshape(-1, 3)[haziest].mean(axis=0, dtype=np.float32), 1.0
+    )
+
+    haze = cv2.erode((small / airlight).min(axis=2).astype(np.float32), kernel)
+    transmission = cv2.resize(
+        np.maximum(1.0 - strength * haze, DEHAZE_MIN_TRANSMISSION),
+        (width, height),
+        interpolation=cv2.INTER_LINEAR,
+    )
+    # scene = frame / t + airlight * (1 - 1 / t), saturated to 8 bits
+    inverse = 1.0 / transmission
+    return cv2.add(
+        cv2.multiply(
+            frame, cv2.cvtColor(inverse, cv2.COLOR_GRAY2BGR), dtype=cv2.CV_32F
+        ),
+        # Spreads one channel into three, scaled by the haze colour
+        cv2.transform(1.0 - inverse, airlight.reshape(3, 1)),
+        dtype=cv2.CV_8U,
+    )
+
+
+class Enhancer:
+    """Applies one set of `EnhanceSettings` to display-sized BGR frames.
+
+    Pipeline workers call `apply` concurrently, so each thread gets its
+    own CLAHE, which keeps scratch buffers. The time spent in each filter
+    is accumulated for `costs`.
+    """
+
+    def __init__(self, settings: EnhanceSettings) -> None:
+        self.settings = settings
+        self.lut = (
+            levels_lut(settings.black, settings.white, settings.gamma)
+            if (settings.black, settings.white, settings.gamma) != (0, 255, 1.0)
+            else None
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Filter name: (seconds, frames) since the last `costs` call
+        self._totals: dict[str, tuple[float, int]] = {}
+
+    def apply(self, frame: MatLike) -> MatLike:
+        # Haze is undone on the frame as recorded, before levels move it
+        if self.settings.dehaze > 0:
+            start = time.perf_counter()
+            frame = dehaze(frame, self.settings.dehaze)
+            self._record("neblina", start)
+        if self.lut is not None:
+            start = time.perf_counter()
+            frame = cv2.LUT(frame, self.lut)
+            self._record("niveles", start)
+        if self.settings.clahe > 0:
+            start = time.perf_counter()
+            frame = self._equalize(frame)
+            self._record("CLAHE", start)
+        return frame
+
+    def _equalize(self, frame: MatLike) -> MatLike:
+        """CLAHE on the brightness only, so colours do not shift."""
+        clahe = getattr(self._local, "clahe", None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(self.settings.clahe, CLAHE_TILES)
+            self._local.clahe = clahe
+        ycrcb = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb)
+        ycrcb[..., 0] = clahe.apply(ycrcb[..., 0])
+        return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
+
+    def _record(self, name: str, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            seconds, frames = self._totals.get(name, (0.0, 0))
+            self._totals[name] = (seconds + elapsed, frames + 1)
+
+    def costs(self) -> dict[str, float]:
+        """Mean milliseconds per frame of each filter since the last call."""
+        with self._lock:
+            totals, self._totals = self._totals, {}
+        return {
+            name: 1000 * seconds / frames
+            for name, (seconds, frames) in totals.items()
+        }
@@ -1,28 +1,69 @@
 import queue
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Literal, NotRequired, TypedDict
 
 import cv2
+import numpy as np
+import numpy.typing as npt
 from cv2.typing import MatLike
 
-MAX_QUEUE_SIZE = 5
+from .enhance import Enhancer, EnhanceSettings
+from .frame_queue import FrameQueue
+from .media_index import FileSignature
+from .motion import (
+    MIN_IDLE_SECONDS,
+    load_activity,
+    normalize_activity,
+    skip_targets,
+)
+from .pipeline import PIPELINE_WORKERS, FramePipeline
+from .reverse import ReversePlayer, fit_size
+from .stabilization import Transforms, load_transforms, stabilize_frame
+from .video_source import DecoderOptions, VideoSource, open_video_source
 
 
 class FrameQueueElement(TypedDict):
     data: NotRequired[MatLike]
     duration: NotRequired[float]
     fps: NotRequired[float]
+    # Presentation timestamp of the frame, in seconds
     position: NotRequired[float]
+    frame_index: NotRequired[int]
+    # Set when `data` is still in the decoder's BGR channel order
+    bgr: NotRequired[bool]
     original_width: NotRequired[int]
     original_height: NotRequired[int]
+    # Stabilization (dx, dy, angle) the frame was warped by, if any
+    correction: NotRequired[tuple[float, float, float]]
     type: Literal["metadata", "frame", "eof"]
 
 
 class CommandQueueElement(TypedDict):
-    type: Literal["stop", "pause", "play", "seek", "speed"]
+    type: Literal[
+        "stop",
+        "pause",
+        "play",
+        "seek",
+        "speed",
+        "source",
+        "shuttle",
+        "jog",
+        "skip_idle",
+        "zoom",
+        "stabilize",
+        "enhance",
+    ]
+    # speed: rate; shuttle: signed rate, 0 pauses; jog: signed frame step;
+    # skip_idle: activity threshold, 0 plays every frame; zoom: display
+    # zoom, frames are sent scaled to the display size times this;
+    # stabilize: 1 warps frames by the cached stabilization, 0 stops
     value: NotRequired[float]
     position: NotRequired[float]
+    path: NotRequired[str]
+    # enhance: filters for the frames from now on
+    settings: NotRequired[EnhanceSettings]
 
 
 class FrameProcessor(threading.Thread):
@@ -33,29 +74,57 @@ class FrameProcessor(threading.Thread):
         command_queue: queue.Queue[CommandQueueElement],
         width: int,
         height: int,
+        options: DecoderOptions | None = None,
+        playback_path: str | None = None,
     ) -> None:
         threading.Thread.__init__(self, daemon=True)
         self.video_path = video_path
+        # File actually decoded: the video itself or a copy with the same
+        # timing (a proxy or a local cache copy)
+        self.playback_path = playback_path or video_path
         self.frame_queue = frame_queue
         self.command_queue = command_queue
         self.width = width
         self.height = height
         self.running = True
         self.paused = False
-        self.cap: cv2.VideoCapture = cv2.VideoCapture(self.video_path)
+        self.options = options or DecoderOptions()
+        self.source: VideoSource | None = None
         self.playback_speed = 1.0
         self.current_position = 0.0
         self.total_frames = 0
-        self.fps = 0
+        self.fps = 0.0
+        # 1 plays forward, -1 backwards through `reverse`
+        self.direction = 1
+        self.reverse: ReversePlayer | None = None
+        # Index of the last frame sent to the UI
+        self.last_index = -1
+        # (width, height) of the last frame sent to the UI
+        self.shown_size = (0, 0)
+        # Frame to play instead of each frame while skipping idle stretches
+        self.skip_targets: npt.NDArray[np.int64] | None = None
+        self.zoom = 1.0
+        # Per-frame corrections while stabilizing, see stabilization.py
+        self.stabilization: Transforms | None = None
+        # Murky-water filters, applied at display size
+        self.enhancer: Enhancer | None = None
+        # Forward playback reads ahead and converts frames on `pool`
+        self.pool: ThreadPoolExecutor | None = None
+        self.pipeline: FramePipeline | None = None
 
     def run(self) -> None:
-        self.cap = cv2.VideoCapture(self.video_path)
-        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
-        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        try:
+            self.source = open_video_source(self.playback_path, self.options)
+        except OSError as e:
+            print(f"Error opening video: {e}")
+            self.frame_queue.put({"type": "eof"})
+            return
+        self.fps = self.source.fps
+        self.total_frames = self.source.frame_count
 
         # Get original video dimensions
-        original_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        original_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        original_width = self.source.width
+        original_height = self.source.height
 
         # Send initial metadata to the main thread
         self.frame_queue.put(
@@ -69,27 +138,12 @@ class FrameProcessor(threading.Thread):
         )
 
         last_frame_time = time.time()
+        self.pool = ThreadPoolExecutor(PIPELINE_WORKERS)
 
         while self.running:
             # Check for commands
-            try:
-                cmd = self.command_queue.get_nowait()
-                if cmd["type"] == "stop":
-                    self.running = False
-                elif cmd["type"] == "pause":
-                    self.paused = True
-                elif cmd["type"] == "play":
-                    self.paused = False
-                elif cmd["type"] == "seek":
-                    position = cmd["position"]
-                    self.cap.set(cv2.CAP_PROP_POS_MSEC, position * 1000)
-                    self.command_queue.put({"type": "play"})
-                    time.sleep(0.01)
-                    self.command_queue.put({"type": "pause"})
-                elif cmd["type"] == "speed":
-                    self.playback_speed = cmd["value"]
-            except queue.Empty:
-                pass
+            for cmd in self.pending_commands():
+                self.handle_command(cmd)
 
             if not self.paused:
                 # Calculate the time to wait based on playback speed
@@ -99,40 +153,331 @@ class FrameProcessor(threading.Thread):
 
                 # Only process a new frame if enough time has elapsed
                 if elapsed >= target_frame_time:
-                    ret, frame = self.cap.read()
-
-                    if ret:
-                        # Get current position
-                        self.current_position = (
-                            self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
-                        )
-
-                        # Convert color space but keep original resolution
-                        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        # Remove the resize operation - send full resolution frame
-
-                        # Put the frame in the queue
-                        if (
-                            self.frame_queue.qsize() < MAX_QUEUE_SIZE
-                        ):  # Limit queue size to prevent memory issues
-                            self.frame_queue.put(
-                                {
-                                    "type": "frame",
-                                    "data": frame,
-                                    "position": self.current_position,
-                                }
-                            )
-
-                        last_frame_time = current_time
+                    if self.direction < 0:
+                        if self.present_reverse_frame():
+                            last_frame_time = current_time
                     else:
-                        # End of video, loop back
-                        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                        # Send end of video message
-                        self.frame_queue.put({"type": "eof"})
+                        if self.pipeline is None:
+                            self.start_pipeline()
+                        assert self.pipeline is not None
+                        item = self.pipeline.next_frame()
+
+                        if item is not None:
+                            self.emit_frame(*item, prepared=True)
+                            last_frame_time = current_time
+                        elif self.pipeline.exhausted:
+                            # End of video, loop back
+                            self.stop_pipeline(resync=False)
+                            self.source.seek_frame(0)
+                            self.last_index = -1
+                            # Send end of video message
+                            self.frame_queue.put({"type": "eof"})
 
             # Small sleep to prevent CPU hogging
             time.sleep(0.0001)
 
         # Clean up
-        if self.cap:
-            self.cap.release()
+        self.stop_pipeline(resync=False)
+        self.stop_reverse()
+        self.pool.shutdown(cancel_futures=True)
+        self.source.release()
+
+    def pending_commands(self) -> list[CommandQueueElement]:
+        """Commands queued so far, with every seek and every enhancement
+        change but the last dropped.
+
+        Dragging a slider sends a stream of them; only the latest one is
+        worth decoding.
+        """
+        commands: list[CommandQueueElement] = []
+        while True:
+            try:
+                commands.append(self.command_queue.get_nowait())
+            except queue.Empty:
+                break
+        stale: set[int] = set()
+        for kind in ("seek", "enhance"):
+            latest = [
+                i for i, cmd in enumerate(commands) if cmd["type"] == kind
+            ]
+            stale.update(latest[:-1])
+        return [cmd for i, cmd in enumerate(commands) if i not in stale]
+
+    def handle_command(self, cmd: CommandQueueElement) -> None:
+        assert self.source is not None
+        if cmd["type"] == "stop":
+            self.running = False
+        elif cmd["type"] == "pause":
+            self.paused = True
+        elif cmd["type"] == "play":
+            self.paused = False
+        elif cmd["type"] == "seek":
+            self.seek(cmd["position"])
+        elif cmd["type"] == "speed":
+            self.playback_speed = cmd["value"]
+        elif cmd["type"] == "source":
+            self.switch_source(cmd["path"])
+        elif cmd["type"] == "shuttle":
+            self.shuttle(cmd["value"])
+        elif cmd["type"] == "jog":
+            self.jog(int(cmd["value"]))
+        elif cmd["type"] == "skip_idle":
+            self.set_skip_idle(cmd["value"])
+        elif cmd["type"] == "zoom":
+            self.set_zoom(cmd["value"])
+        elif cmd["type"] == "stabilize":
+            self.set_stabilize(bool(cmd["value"]))
+        elif cmd["type"] == "enhance":
+            self.set_enhance(cmd["settings"])
+
+    def set_skip_idle(self, threshold: float) -> None:
+        """Skip stretches whose motion activity is below `threshold`."""
+        # The pipeline picks up the new targets when it restarts
+        self.stop_pipeline()
+        self.skip_targets = None
+        if threshold <= 0:
+            return
+        try:
+            activity = load_activity(FileSignature.of(self.video_path))
+        except OSError:
+            activity = None
+        if activity is None:
+            print("No motion analysis for this video yet")
+            return
+        self.skip_targets = skip_targets(
+            normalize_activity(activity),
+            threshold,
+            round(MIN_IDLE_SECONDS * self.fps),
+        )
+
+    def set_zoom(self, zoom: float) -> None:
+        """Send frames big enough for `zoom`; while paused, redraw.
+
+        Nothing is redecoded unless the frame on screen is too small for
+        the new zoom, so the UI keeps its tiles while zooming out and back.
+        """
+        if zoom == self.zoom:
+            return
+        self.zoom = zoom
+        if self.source is not None:
+            width, height = fit_size(
+                self.source.width, self.source.height, *self.display_box()
+            )
+            shown_width, shown_height = self.shown_size
+            if width <= shown_width and height <= shown_height:
+                return
+        self.stop_pipeline()
+        if self.paused and self.last_index >= 0:
+            self.jog(0)
+
+    def set_stabilize(self, enabled: bool) -> None:
+        """Warp frames by the cached stabilization of this video.
+
+        Only frames prepared from now on are warped; the few already read
+        ahead play as they are, so toggling never restarts decoding.
+        """
+        transforms = None
+        if enabled:
+            try:
+                transforms = load_transforms(FileSignature.of(self.video_path))
+            except OSError:
+                transforms = None
+            if transforms is None:
+                print("No stabilization for this video yet")
+        self.stabilization = transforms
+        if self.paused and self.last_index >= 0:
+            self.jog(0)
+
+    def set_enhance(self, settings: EnhanceSettings) -> None:
+        """Filter frames prepared from now on; while paused, redraw."""
+        self.enhancer = Enhancer(settings) if settings.enabled else None
+        if self.paused and self.last_index >= 0:
+            self.jog(0)
+
+    def display_box(self) -> tuple[int, int]:
+        """Largest frame worth sending: the display area at the current
+        zoom."""
+        zoom = max(1.0, self.zoom)
+        return round(self.width * zoom), round(self.height * zoom)
+
+    def prepare_frame(self, frame: MatLike, index: int) -> MatLike:
+        """Scale, stabilize, enhance and colour-convert a decoded frame for
+        the UI."""
+        height, width = frame.shape[:2]
+        size = fit_size(width, height, *self.display_box())
+        if size != (width, height):
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        # Warped at display size, which costs far less than at full size
+        transforms = self.stabilization
+        if transforms is not None and 0 <= index < len(transforms):
+            frame = stabilize_frame(frame, transforms[index])
+        enhancer = self.enhancer
+        if enhancer is not None:
+            frame = enhancer.apply(frame)
+        # Convert color space, unless the consumer swaps channels itself
+        if not self.options.bgr_passthrough:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return frame
+
+    def start_pipeline(self) -> None:
+        assert self.source is not None and self.pool is not None
+        self.pipeline = FramePipeline(
+            self.source,
+            self.pool,
+            self.prepare_frame,
+            self.last_index + 1,
+            self.skip_targets,
+        )
+
+    def stop_pipeline(self, resync: bool = True) -> None:
+        """Stop reading ahead; with `resync`, the next read returns the
+        frame after the last one shown."""
+        if self.pipeline is None:
+            return
+        self.pipeline.stop()
+        read_ahead = self.pipeline.next_index != self.last_index + 1
+        self.pipeline = None
+        if resync and read_ahead and self.source is not None:
+            self.source.seek_frame(self.last_index + 1)
+
+    def seek(self, position: float) -> None:
+        """Continue from `position`; while paused, show that frame."""
+        assert self.source is not None
+        # Frames from before the seek are no longer worth showing
+        if isinstance(self.frame_queue, FrameQueue):
+            self.frame_queue.discard_frames()
+        # Reverse playback restarts from the new frame when it resumes
+        self.stop_reverse(resync=False)
+        self.stop_pipeline(resync=False)
+        # As if the frame before (after, when reversing) was just shown
+        self.last_index = round(position * self.fps) - self.direction
+        self.source.seek_time(position)
+        if self.paused:
+            frame = self.source.read()
+            if frame is not None:
+                self.emit_frame(
+                    frame, self.source.frame_index, self.source.position
+                )
+
+    def emit_frame(
+        self,
+        frame: MatLike,
+        index: int,
+        position: float,
+        prepared: bool = False,
+    ) -> None:
+        self.current_position = position
+        self.last_index = index
+
+        if not prepared:
+            frame = self.prepare_frame(frame, index)
+        self.shown_size = (frame.shape[1], frame.shape[0])
+
+        message: FrameQueueElement = {
+            "type": "frame",
+            "data": frame,
+            "position": position,
+            "frame_index": index,
+            "bgr": self.options.bgr_passthrough,
+        }
+        transforms = self.stabilization
+        if transforms is not None and 0 <= index < len(transforms):
+            dx, dy, angle = transforms[index].tolist()
+            message["correction"] = (dx, dy, angle)
+
+        # The queue decides what happens when it is full; a plain bounded
+        # queue just loses the frame
+        try:
+            self.frame_queue.put(message, block=False)
+        except queue.Full:
+            pass
+
+    def present_reverse_frame(self) -> bool:
+        """Send the previous frame; False while it is still being decoded."""
+        if self.reverse is None:
+            self.start_reverse(self.last_index)
+        assert self.reverse is not None
+        item = self.reverse.next_frame()
+        if item is None:
+            if self.reverse.exhausted:
+                # Reached the first frame; wait there
+                self.stop_reverse()
+                self.direction = 1
+                self.paused = True
+                self.frame_queue.put({"type": "eof"})
+            return False
+        self.emit_frame(*item)
+        return True
+
+    def start_reverse(self, end_index: int) -> None:
+        """Play backwards from the frame before `end_index`."""
+        self.stop_reverse()
+        self.stop_pipeline(resync=False)
+        self.reverse = ReversePlayer(
+            self.playback_path, self.options, end_index, *self.display_box()
+        )
+
+    def stop_reverse(self, resync: bool = True) -> None:
+        """Stop reverse playback; with `resync`, forward reads continue
+        after the last frame shown."""
+        if self.reverse is None:
+            return
+        self.reverse.stop()
+        self.reverse = None
+        if resync and self.source is not None:
+            self.source.seek_frame(self.last_index + 1)
+
+    def shuttle(self, speed: float) -> None:
+        """Play at a signed rate: negative plays backwards, 0 pauses."""
+        if speed == 0:
+            self.paused = True
+            return
+        direction = 1 if speed > 0 else -1
+        if direction != self.direction:
+            if direction > 0:
+                self.stop_reverse()
+            else:
+                self.start_reverse(self.last_index)
+            self.direction = direction
+        self.playback_speed = abs(speed)
+        self.paused = False
+
+    def jog(self, step: int) -> None:
+        """Pause and show the frame `step` frames away from the current one."""
+        assert self.source is not None
+        self.paused = True
+        self.stop_reverse()
+        self.stop_pipeline()
+        self.direction = 1
+        target = min(
+            max(0, self.last_index + step), max(0, self.total_frames - 1)
+        )
+        # Stepping forward by one is just the next read
+        if target != self.last_index + 1:
+            self.source.seek_frame(target)
+        frame = self.source.read()
+        if frame is not None:
+            self.emit_frame(
+                frame, self.source.frame_index, self.source.position
+            )
+
+    def switch_source(self, path: str) -> None:
+        """Continue playback from another file with the same timing."""
+        try:
+            source = open_video_source(path, self.options)
+        except OSError as e:
+            print(f"Error switching video source: {e}")
+            return
+        if self.source is not None:
+            self.stop_pipeline(resync=False)
+            # Resume right after the last frame that was shown
+            source.seek_frame(self.last_index + 1)
+            self.source.release()
+        self.source = source
+        self.playback_path = path
+        if self.reverse is not None:
+            # Keep going backwards through the new file
+            self.reverse.stop()
+            self.reverse = ReversePlayer(
+                path, self.options, self.last_index, *self.display_box()
+            )
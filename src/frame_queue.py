@@ -0,0 +1,147 @@
+import queue
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from .frame_processor import FrameQueueElement
+
+# What happens to a frame that does not fit in the budget: it is discarded,
+# the oldest queued frames are discarded to make room, or the producer waits
+type DropPolicy = Literal["drop_newest", "drop_oldest", "block"]
+
+DEFAULT_FRAME_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+def frame_bytes(item: "FrameQueueElement") -> int:
+    data = item.get("data")
+    return int(getattr(data, "nbytes", 0)) if data is not None else 0
+
+
+@dataclass(frozen=True)
+class QueueStats:
+    queued_frames: int
+    queued_bytes: int
+    peak_bytes: int
+    budget_bytes: int
+    dropped_frames: int
+    # Time producers spent waiting for room under the "block" policy
+    blocked_seconds: float
+
+
+class FrameQueue(queue.Queue["FrameQueueElement"]):
+    """Frame queue bounded by the bytes of the frames it holds.
+
+    Messages without pixel data (metadata, end of file) are always
+    accepted, and so is a frame arriving at an empty queue, however large,
+    so playback never stalls on a frame bigger than the budget.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int = DEFAULT_FRAME_BUDGET_BYTES,
+        policy: DropPolicy = "drop_oldest",
+    ) -> None:
+        super().__init__()
+        self.budget_bytes = budget_bytes
+        self.policy = policy
+        self.queued_bytes = 0
+        self.peak_bytes = 0
+        self.dropped_frames = 0
+        self.blocked_seconds = 0.0
+
+    def _fits(self, size: int) -> bool:
+        return (
+            size == 0
+            or not self.queue
+            or self.queued_bytes + size <= self.budget_bytes
+        )
+
+    def _drop_oldest_frames(self, size: int) -> None:
+        while not self._fits(size):
+            for i, item in enumerate(self.queue):
+                if item["type"] == "frame":
+                    del self.queue[i]
+                    self.queued_bytes -= frame_bytes(item)
+                    self.dropped_frames += 1
+                    self.unfinished_tasks -= 1
+                    break
+            else:
+                return
+
+    def put(
+        self,
+        item: "FrameQueueElement",
+        block: bool = True,
+        timeout: float | None = None,
+    ) -> None:
+        size = frame_bytes(item)
+        with self.not_full:
+            if not self._fits(size):
+                if self.policy == "drop_newest":
+                    self.dropped_frames += 1
+                    return
+                if self.policy == "drop_oldest":
+                    self._drop_oldest_frames(size)
+                elif not block:
+                    raise queue.Full
+                else:
+                    start = time.perf_counter()
+                    fits = self.not_full.wait_for(
+                        lambda: self._fits(size), timeout
+                    )
+                    self.blocked_seconds += time.perf_counter() - start
+                    if not fits:
+                        raise queue.Full
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _put(self, item: "FrameQueueElement") -> None:
+        self.queue.append(item)
+        self.queued_bytes += frame_bytes(item)
+        self.peak_bytes = max(self.peak_bytes, self.queued_bytes)
+
+    def _get(self) -> "FrameQueueElement":
+        item: FrameQueueElement = self.queue.popleft()
+        self.queued_bytes -= frame_bytes(item)
+        return item
+
+    def _removed(self, count: int) -> None:
+        # Whatever is left holds no pixel data
+        self.queued_bytes = 0
+        self.unfinished_tasks = max(0, self.unfinished_tasks - count)
+        if not self.unfinished_tasks:
+            self.all_tasks_done.notify_all()
+        self.not_full.notify_all()
+
+    def clear(self) -> int:
+        """Discard everything queued; returns the number of messages."""
+        with self.not_full:
+            count = len(self.queue)
+            self.queue.clear()
+            self._removed(count)
+            return count
+
+    def discard_frames(self) -> int:
+        """Drop queued frames but keep control messages."""
+        with self.not_full:
+            kept = [item for item in self.queue if item["type"] != "frame"]
+            count = len(self.queue) - len(kept)
+            self.queue.clear()
+            self.queue.extend(kept)
+            self._removed(count)
+            return count
+
+    def stats(self) -> QueueStats:
+        with self.mutex:
+            return QueueStats(
+                queued_frames=sum(
+                    1 for item in self.queue if item["type"] == "frame"
+                ),
+                queued_bytes=self.queued_bytes,
+                peak_bytes=self.peak_bytes,
+                budget_bytes=self.budget_bytes,
+                dropped_frames=self.dropped_frames,
+                blocked_seconds=self.blocked_seconds,
+            )
@@ -0,0 +1,336 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .config import get_app_data_dir
+from .media_index import FileSignature
+
+JOB_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# Jobs allowed to run at once while a video is playing
+PLAYBACK_JOB_WORKERS = 1
+# Playlist entries on each side of the current one that go before the rest
+NEIGHBOUR_VIDEOS = 2
+# Jobs restored from a previous session go after the current playlist
+RESTORED_TIER = 3
+STATE_VERSION = 1
+
+# (tier, distance): the current video is tier 0, its neighbours tier 1
+type Priority = tuple[int, int]
+
+
+class JobCancelled(Exception):
+    """Raised inside a cancelled job; its saved progress is kept."""
+
+
+@dataclass(frozen=True)
+class JobKind:
+    name: str
+    # Does the work; long jobs call `context.checkpoint` now and then
+    run: Callable[[FileSignature, "JobContext"], None]
+    # True when the job's output already exists
+    done: Callable[[FileSignature], bool]
+
+
+class JobContext:
+    """What a running job sees of the scheduler."""
+
+    def __init__(
+        self,
+        scheduler: "JobScheduler",
+        key: str,
+        progress: dict[str, Any],
+    ) -> None:
+        self.scheduler = scheduler
+        self.key = key
+        # Whatever the job saved with its last checkpoint, possibly in an
+        # earlier session
+        self.progress = progress
+        self.cancelled = threading.Event()
+
+    @property
+    def throttled(self) -> bool:
+        """True while playback wants the CPU; jobs should use one core."""
+        return self.scheduler.throttled()
+
+    def check(self) -> None:
+        if self.cancelled.is_set():
+            raise JobCancelled(self.key)
+
+    def checkpoint(self, **progress: Any) -> None:
+        """Save progress to resume from, then stop if cancelled."""
+        self.progress = progress
+        self.scheduler._save_progress(self.key, progress)
+        self.check()
+
+
+@dataclass(order=True)
+class _Job:
+    priority: Priority
+    sequence: int
+    kind: str = field(compare=False)
+    signature: FileSignature = field(compare=False)
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.signature.digest}"
+
+
+def video_priority(index: int, current: int, count: int) -> Priority:
+    """Current video first, then its playlist neighbours, then the rest."""
+    distance = abs(index - current)
+    distance = min(distance, count - distance)
+    if distance == 0:
+        return 0, 0
+    return (1 if distance <= NEIGHBOUR_VIDEOS else 2), distance
+
+
+class JobScheduler:
+    """Runs per-video background jobs, most relevant video first.
+
+    Jobs are ordered by `video_priority` around the video being watched.
+    Switching videos reorders the queue, and running jobs that now rank
+    below a queued one are cancelled and requeued; they resume from their
+    last checkpoint. While `throttle` returns True only
+    `playback_workers` jobs run. The queue and every checkpoint are saved,
+    so unfinished work continues in the next session.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = JOB_WORKERS,
+        playback_workers: int = PLAYBACK_JOB_WORKERS,
+        throttle: Callable[[], bool] | None = None,
+        state_path: Path | None = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.playback_workers = playback_workers
+        # Called from worker threads, so it must not touch Tk
+        self.throttle = throttle
+        self.state_path = state_path or get_app_data_dir("jobs") / "state.json"
+        self._condition = threading.Condition()
+        self._kinds: dict[str, JobKind] = {}
+        self._heap: list[_Job] = []
+        self._queued: dict[str, _Job] = {}
+        self._running: dict[str, tuple[_Job, JobContext]] = {}
+        self._failed: set[str] = set()
+        self._progress: dict[str, dict[str, Any]] = {}
+        self._restored: list[tuple[str, FileSignature]] = []
+        self._sequence = itertools.count()
+        self._workers: list[threading.Thread] = []
+        self._stopped = False
+        self._load_state()
+
+    def throttled(self) -> bool:
+        return self.throttle is not None and self.throttle()
+
+    def register(self, kind: JobKind) -> None:
+        """Accept jobs of `kind` and resume its jobs from the last session."""
+        with self._condition:
+            self._kinds[kind.name] = kind
+            restored = [s for k, s in self._restored if k == kind.name]
+            self._restored = [
+                (k, s) for k, s in self._restored if k != kind.name
+            ]
+            for distance, signature in enumerate(restored):
+                self._push(kind.name, signature, (RESTORED_TIER, distance))
+            self._start_workers()
+            self._condition.notify_all()
+
+    def schedule(
+        self, kind: str, signatures: Sequence[FileSignature], current: int
+    ) -> None:
+        """Queue `kind`, already registered, for every video of a playlist
+        playing `current`."""
+        with self._condition:
+            for index, signature in enumerate(signatures):
+                self._push(
+                    kind,
+                    signature,
+                    video_priority(index, current, len(signatures)),
+                )
+            self._preempt()
+            self._save_state()
+            self._condition.notify_all()
+
+    def focus(self, signatures: Sequence[FileSignature], current: int) -> None:
+        """Reorder queued jobs around the video now playing."""
+        ranks = {
+            signature.digest: video_priority(index, current, len(signatures))
+            for index, signature in enumerate(signatures)
+        }
+        with self._condition:
+            for job in self._queued.values():
+                job.priority = ranks.get(job.signature.digest, job.priority)
+            for job, _ in self._running.values():
+                job.priority = ranks.get(job.signature.digest, job.priority)
+            heapq.heapify(self._heap)
+            self._preempt()
+            self._condition.notify_all()
+
+    def pending(self, kind: str | None = None) -> bool:
+        with self._condition:
+            return any(
+                kind is None or job.kind == kind
+                for job in (
+                    *self._queued.values(),
+                    *(job for job, _ in self._running.values()),
+                )
+            )
+
+    def shutdown(self) -> None:
+        """Stop the workers; running jobs keep their last checkpoint."""
+        with self._condition:
+            self._stopped = True
+            for _, context in self._running.values():
+                context.cancelled.set()
+            self._save_state()
+            self._condition.notify_all()
+
+    def _push(
+        self, kind: str, signature: FileSignature, priority: Priority
+    ) -> None:
+        job = _Job(priority, next(self._sequence), kind, signature)
+        key = job.key
+        if (
+            key in self._running
+            or key in self._failed
+            or self._kinds[kind].done(signature)
+        ):
+            return
+        queued = self._queued.get(key)
+        if queued is not None and queued.priority <= priority:
+            return
+        # A superseded heap entry is skipped when popped
+        self._queued[key] = job
+        heapq.heappush(self._heap, job)
+
+    def _limit(self) -> int:
+        if self.throttled():
+            return min(self.max_workers, self.playback_workers)
+        return self.max_workers
+
+    def _preempt(self) -> None:
+        """Make room for the best queued job if every slot is taken by a
+        job that ranks below it."""
+        best = self._peek()
+        if best is None or len(self._running) < self._limit():
+            return
+        job, context = max(
+            self._running.values(), key=lambda item: item[0].priority
+        )
+        if best.priority < job.priority:
+            context.cancelled.set()
+
+    def _peek(self) -> _Job | None:
+        while self._heap:
+            job = self._heap[0]
+            if self._queued.get(job.key) is job:
+                return job
+            heapq.heappop(self._heap)
+        return None
+
+    def _start_workers(self) -> None:
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _next(self) -> tuple[_Job, JobContext] | None:
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                job = self._peek()
+                if job is not None and len(self._running) < self._limit():
+                    heapq.heappop(self._heap)
+                    del self._queued[job.key]
+                    context = JobContext(
+                        self, job.key, dict(self._progress.get(job.key, {}))
+                    )
+                    self._running[job.key] = (job, context)
+                    return job, context
+                # The throttle is polled, so playback stopping is noticed
+                self._condition.wait(0.5)
+
+    def _work(self) -> None:
+        while (item := self._next()) is not None:
+            job, context = item
+            kind = self._kinds[job.kind]
+            finished = False
+            try:
+                if FileSignature.of(job.signature.path) != job.signature:
+                    # Changed or gone since the job was queued
+                    finished = True
+                elif not kind.done(job.signature):
+                    kind.run(job.signature, context)
+                finished = True
+            except JobCancelled:
+                pass
+            except Exception as e:  # noqa: BLE001
+                # A failing job must not take its worker down with it
+                print(f"Background job {job.key} failed: {e}")
+                with self._condition:
+                    self._failed.add(job.key)
+                finished = True
+            with self._condition:
+                del self._running[job.key]
+                if finished:
+                    self._progress.pop(job.key, None)
+                elif job.key not in self._queued:
+                    self._queued[job.key] = job
+                    heapq.heappush(self._heap, job)
+                self._save_state()
+                self._condition.notify_all()
+
+    def _save_progress(self, key: str, progress: dict[str, Any]) -> None:
+        with self._condition:
+            self._progress[key] = progress
+            self._save_state()
+
+    def _load_state(self) -> None:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") != STATE_VERSION:
+                return
+            self._progress = dict(state["progress"])
+            self._restored = [
+                (job["kind"], FileSignature(**job["signature"]))
+                for job in state["jobs"]
+            ]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._progress = {}
+            self._restored = []
+
+    def _save_state(self) -> None:
+        jobs = sorted(
+            [
+                *self._queued.values(),
+                *(job for job, _ in self._running.values()),
+            ]
+        )
+        state = {
+            "version": STATE_VERSION,
+            "jobs": [
+                {"kind": job.kind, "signature": asdict(job.signature)}
+                for job in jobs
+            ]
+            + [
+                {"kind": kind, "signature": asdict(signature)}
+                for kind, signature in self._restored
+            ],
+            "progress": self._progress,
+        }
+        tmp_path = self.state_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Could not save background job state: {e}")
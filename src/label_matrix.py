@@ -0,0 +1,239 @@
+"""Dense per-frame labels for training detectors.
+
+    python -m src.label_matrix videos/ [--output matrices/]
+
+Every video with CSVs saved next to it gets `<stem>.npy`, one row per frame
+and one bit per taxonomy behaviour, packed with `np.packbits(axis=1)`, and
+`<stem>.json`, the manifest naming the column of each bit.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+from .config import get_behavior_taxonomy
+from .media_index import VIDEO_EXTENSIONS, probe_video, scan_media
+from .record import BehaviorRecord, load_from_csv
+from .taxonomy import Taxonomy
+from .utils import video_stem_path
+
+MANIFEST_VERSION = 1
+# Scratch memory used at once while filling the matrix
+MATRIX_CHUNK_BYTES = 64 * 1024 * 1024
+# Scratch bytes per frame and column: int32 edges, their int32 running
+# sum and the unpacked bool labels
+_CELL_BYTES = 4 + 4 + 1
+
+type PackedLabels = npt.NDArray[np.uint8]
+
+
+@dataclass(frozen=True)
+class MatrixExport:
+    matrix: Path
+    manifest: Path
+    frames: int
+    # Records whose behaviour is not in the taxonomy, or STATE records
+    # that were never closed
+    skipped: int
+
+
+def label_spans(
+    records: Sequence[BehaviorRecord],
+    taxonomy: Taxonomy,
+    fps: float,
+    frame_count: int,
+) -> tuple[npt.NDArray[np.int64], int]:
+    """(column, first frame, end frame) of every record, and the skipped.
+
+    EVENT records cover the single frame they were stamped on and STATE
+    records every frame from their start up to, not including, their end.
+    """
+    # Records only name the closest category; like `parents_of`, the first
+    # behaviour in document order wins when deeper paths share it
+    columns: dict[tuple[str, str], int] = {}
+    for index, entry in enumerate(taxonomy.entries):
+        columns.setdefault((entry.category, entry.name), index)
+    spans: list[tuple[int, int, int]] = []
+    skipped = 0
+    for record in records:
+        column = columns.get((record.parent_behaviour, record.behaviour))
+        if column is None or (
+            record.record_type == "STATE" and record.end_time is None
+        ):
+            skipped += 1
+            continue
+        start = record.start_frame
+        if start is None:
+            start = round(record.start_time * fps)
+        if record.record_type == "EVENT":
+            end = start + 1
+        elif record.end_frame is not None:
+            end = max(record.end_frame, start + 1)
+        else:
+            end = max(round((record.end_time or 0.0) * fps), start + 1)
+        start, end = max(0, start), min(frame_count, end)
+        if start < end:
+            spans.append((column, start, end))
+    return np.array(spans, dtype=np.int64).reshape(-1, 3), skipped
+
+
+def chunk_frames_for(columns: int, budget: int = MATRIX_CHUNK_BYTES) -> int:
+    """Frames per chunk that keep the scratch arrays within `budget`."""
+    return max(1, budget // (_CELL_BYTES * max(1, columns)))
+
+
+def fill_label_matrix(
+    matrix: PackedLabels,
+    spans: npt.NDArray[np.int64],
+    columns: int,
+    chunk_frames: int | None = None,
+) -> None:
+    """Set the bits of `spans` in a packed matrix, one chunk at a time.
+
+    Only `chunk_frames` rows are ever unpacked, by default as many as fit
+    in `MATRIX_CHUNK_BYTES`, so `matrix` can be a memory map far larger
+    than RAM.
+    """
+    if chunk_frames is None:
+        chunk_frames = chunk_frames_for(columns)
+    frames = matrix.shape[0]
+    for begin in range(0, frames, chunk_frames):
+        end = min(frames, begin + chunk_frames)
+        inside = spans[(spans[:, 1] < end) & (spans[:, 2] > begin)]
+        # +1 where a span starts and -1 where it ends, summed down the rows
+        edges = np.zeros((end - begin + 1, columns), dtype=np.int32)
+        np.add.at(
+            edges, (np.maximum(inside[:, 1], begin) - begin, inside[:, 0]), 1
+        )
+        np.add.at(
+            edges, (np.minimum(inside[:, 2], end) - begin, inside[:, 0]), -1
+        )
+        dense = np.cumsum(edges[:-1], axis=0, dtype=np.int32) > 0
+        matrix[begin:end] = np.packbits(dense, axis=1)
+
+
+def export_label_matrix(
+    records: Sequence[BehaviorRecord],
+    video_path: str,
+    output_stem: str | Path,
+    taxonomy: Taxonomy | None = None,
+) -> MatrixExport:
+    """Write the packed label matrix of one video and its manifest."""
+    if taxonomy is None:
+        taxonomy = get_behavior_taxonomy()
+    metadata = probe_video(video_path)
+    fps = metadata.fps or 25.0
+    columns = len(taxonomy)
+    spans, skipped = label_spans(records, taxonomy, fps, metadata.frame_count)
+
+    output_stem = Path(output_stem)
+    output_stem.parent.mkdir(parents=True, exist_ok=True)
+    # Video stems may contain dots, so suffixes are appended, not swapped
+    matrix_path = output_stem.parent / f"{output_stem.name}.npy"
+    matrix = np.lib.format.open_memmap(
+        matrix_path,
+        mode="w+",
+        dtype=np.uint8,
+        shape=(metadata.frame_count, (columns + 7) // 8),
+    )
+    try:
+        fill_label_matrix(matrix, spans, columns)
+        matrix.flush()
+    finally:
+        del matrix
+
+    manifest_path = output_stem.parent / f"{output_stem.name}.json"
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "video": str(video_path),
+        "fps": fps,
+        "frames": metadata.frame_count,
+        "bitorder": "big",
+        "columns": [
+            {
+                "index": column,
+                "category": entry.category,
+                "behaviour": entry.name,
+                "type": entry.record_type,
+            }
+            for column, entry in enumerate(taxonomy.entries)
+        ],
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return MatrixExport(
+        matrix_path, manifest_path, metadata.frame_count, skipped
+    )
+
+
+def load_label_matrix(
+    matrix_path: str | Path, begin: int = 0, end: int | None = None
+) -> tuple[npt.NDArray[np.bool_], list[dict[str, object]]]:
+    """Unpacked rows [begin, end) of a `.npy` matrix and its columns."""
+    matrix_path = Path(matrix_path)
+    with open(matrix_path.with_suffix(".json"), encoding="utf-8") as f:
+        columns: list[dict[str, object]] = json.load(f)["columns"]
+    packed = np.load(matrix_path, mmap_mode="r")
+    rows = np.unpackbits(packed[begin:end], axis=1, count=len(columns))
+    return rows.astype(np.bool_), columns
+
+
+def video_csv_files(video_dir: str | Path, video_path: str) -> list[Path]:
+    """CSVs saved for a video: `<stem>.csv` and `<stem>_<n>.csv`.
+
+    When a video called `<stem>_<n>` sits in the same directory,
+    `<stem>_<n>.csv` is its own CSV and is left out.
+    """
+    video_dir = Path(video_dir)
+    stem = Path(video_path).stem
+    pattern = re.compile(rf"{re.escape(stem)}(_\d+)?\.csv")
+    other_videos = {
+        path.stem
+        for path in video_dir.glob(f"{glob.escape(stem)}_*")
+        if path.suffix.lower() in VIDEO_EXTENSIONS
+    }
+    return sorted(
+        path
+        for path in video_dir.glob(f"{glob.escape(stem)}*.csv")
+        if pattern.fullmatch(path.name) and path.stem not in other_videos
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("videos", help="directory of videos and their CSVs")
+    parser.add_argument("--output", help="defaults to <videos>/matrices")
+    args = parser.parse_args()
+    output_dir = Path(args.output or Path(args.videos) / "matrices")
+
+    taxonomy = get_behavior_taxonomy()
+    root = os.path.abspath(args.videos)
+    for signature in scan_media(root):
+        # CSVs are saved next to their video; matrices keep its subfolder
+        csv_files = video_csv_files(Path(signature.path).parent, signature.path)
+        if not csv_files:
+            continue
+        records = [r for path in csv_files for r in load_from_csv(path)]
+        export = export_label_matrix(
+            records,
+            signature.path,
+            video_stem_path(output_dir, os.path.relpath(signature.path, root)),
+            taxonomy,
+        )
+        print(
+            f"{export.matrix}: {export.frames} frames, "
+            f"{len(records) - export.skipped} records"
+            + (f" ({export.skipped} skipped)" if export.skipped else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from .config import get_app_data_dir
+
+VIDEO_EXTENSIONS: frozenset[str] = frozenset(
+    {
+        ".3gp",
+        ".avi",
+        ".flv",
+        ".m2ts",
+        ".m4v",
+        ".mkv",
+        ".mov",
+        ".mp4",
+        ".mpeg",
+        ".mpg",
+        ".mts",
+        ".mxf",
+        ".ts",
+        ".webm",
+        ".wmv",
+    }
+)
+
+# Directories with at least this many images are listed as image sequences
+MIN_IMAGE_SEQUENCE_FRAMES = 10
+IMAGE_EXTENSIONS: frozenset[str] = frozenset(
+    {".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp"}
+)
+
+# Present in directories the app exports stills and clips into, so that
+# scanning the videos around them never lists the exports as videos
+EXPORT_MARKER = ".behaviour_labeling_export"
+
+INDEX_VERSION = 1
+# Probing is mostly waiting on I/O and the demuxer, both release the GIL
+PROBE_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+
+@dataclass(frozen=True, slots=True)
+class FileSignature:
+    """Identity of a file's contents as far as caches are concerned."""
+
+    path: str
+    mtime_ns: int
+    # Bytes for files, number of frames for image-sequence directories
+    size: int
+
+    @classmethod
+    def of(cls, path: str | Path) -> "FileSignature":
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        if os.path.isdir(path):
+            from .video_source import list_image_frames
+
+            return cls(path, stat.st_mtime_ns, len(list_image_frames(path)))
+        return cls(path, stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def digest(self) -> str:
+        """Short stable name for files derived from this one."""
+        key = f"{self.path}\0{self.mtime_ns}\0{self.size}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+@dataclass(frozen=True, slots=True)
+class VideoMetadata:
+    fps: float
+    frame_count: int
+    width: int
+    height: int
+
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.fps if self.fps > 0 else 0.0
+
+    @property
+    def readable(self) -> bool:
+        return self.frame_count > 0
+
+
+def _scan_directory(
+    directory: str, extensions: frozenset[str], image_sequences: bool
+) -> tuple[list[FileSignature], list[str]]:
+    files: list[FileSignature] = []
+    subdirectories: list[str] = []
+    image_count = 0
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name == EXPORT_MARKER:
+                    return [], []
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    suffix = os.path.splitext(entry.name)[1].lower()
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif suffix in IMAGE_EXTENSIONS:
+                        image_count += 1
+                    elif suffix in extensions:
+                        stat = entry.stat()
+                        files.append(
+                            FileSignature(
+                                os.path.abspath(entry.path),
+                                stat.st_mtime_ns,
+                                stat.st_size,
+                            )
+                        )
+                except OSError as e:
+                    print(f"Skipping {entry.path}: {e}")
+        if image_sequences and image_count >= MIN_IMAGE_SEQUENCE_FRAMES:
+            files.append(
+                FileSignature(
+                    os.path.abspath(directory),
+                    os.stat(directory).st_mtime_ns,
+                    image_count,
+                )
+            )
+    except OSError as e:
+        print(f"Cannot scan {directory}: {e}")
+    return files, subdirectories
+
+
+def mark_export_directory(path: str | Path) -> Path:
+    """Create `path` for exports that `scan_media` must not list."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / EXPORT_MARKER).touch()
+    return path
+
+
+def scan_media(
+    root: str | Path,
+    extensions: frozenset[str] = VIDEO_EXTENSIONS,
+    max_workers: int = PROBE_WORKERS,
+    image_sequences: bool = True,
+) -> list[FileSignature]:
+    """Recursively list video files under `root`, sorted by path.
+
+    Directories are listed breadth-first, one level at a time in parallel,
+    which hides most of the per-directory latency of network shares.
+    Hidden files and directories are skipped, and so are export
+    directories. Directories of extracted frames are listed as a single
+    entry when `image_sequences` is set.
+    """
+    found: list[FileSignature] = []
+    frontier = [os.path.abspath(root)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while frontier:
+            next_frontier: list[str] = []
+            for files, subdirectories in pool.map(
+                lambda d: _scan_directory(d, extensions, image_sequences),
+                frontier,
+            ):
+                found.extend(files)
+                next_frontier.extend(subdirectories)
+            frontier = next_frontier
+    return sorted(found, key=lambda signature: signature.path)
+
+
+def probe_video(path: str) -> VideoMetadata:
+    """Read container metadata without decoding any frames."""
+    import cv2
+
+    if os.path.isdir(path):
+        from .video_source import ImageSequenceSource
+
+        try:
+            with ImageSequenceSource(path) as source:
+                return VideoMetadata(
+                    source.fps, source.frame_count, source.width, source.height
+                )
+        except OSError:
+            return VideoMetadata(0.0, 0, 0, 0)
+
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return VideoMetadata(0.0, 0, 0, 0)
+        return VideoMetadata(
+            fps=float(cap.get(cv2.CAP_PROP_FPS)),
+            frame_count=max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT))),
+            width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+    finally:
+        cap.release()
+
+
+class MediaIndex:
+    """Persistent metadata cache keyed by path, mtime and size."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+        self.load()
+
+    @classmethod
+    def open_default(cls) -> "MediaIndex":
+        return cls(get_app_data_dir() / "media_index.json")
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable media index {self.path}: {e}")
+            return
+        if data.get("version") == INDEX_VERSION:
+            with self._lock:
+                self._entries = data.get("entries", {})
+
+    def save(self) -> None:
+        """Write the index atomically, if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": INDEX_VERSION, "entries": self._entries}
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(payload, file, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def get(self, signature: FileSignature) -> VideoMetadata | None:
+        with self._lock:
+            entry = self._entries.get(signature.path)
+        if (
+            entry is None
+            or entry["mtime_ns"] != signature.mtime_ns
+            or entry["size"] != signature.size
+        ):
+            return None
+        return VideoMetadata(
+            entry["fps"], entry["frame_count"], entry["width"], entry["height"]
+        )
+
+    def put(self, signature: FileSignature, metadata: VideoMetadata) -> None:
+        with self._lock:
+            self._entries[signature.path] = {
+                "mtime_ns": signature.mtime_ns,
+                "size": signature.size,
+                **asdict(metadata),
+            }
+            self._dirty = True
+
+    def probe(
+        self,
+        signatures: Iterable[FileSignature],
+        max_workers: int = PROBE_WORKERS,
+        on_probed: Callable[[FileSignature, VideoMetadata], None] | None = None,
+    ) -> None:
+        """Probe every file that is missing or stale, then save."""
+        missing = [s for s in signatures if self.get(s) is None]
+        if not missing:
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for signature, metadata in zip(
+                missing, pool.map(lambda s: probe_video(s.path), missing)
+            ):
+                self.put(signature, metadata)
+                if on_probed is not None:
+                    on_probed(signature, metadata)
+        self.save()
@@ -0,0 +1,212 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+
+from .config import get_app_data_dir
+from .jobs import JobContext, JobKind
+from .media_index import FileSignature, probe_video
+from .video_source import open_video_source
+
+# Frames are compared at this width, keeping the aspect ratio
+MOTION_WIDTH = 160
+MOTION_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# Shortest stretch of video a worker analyses; each segment pays one seek
+SEGMENT_MIN_FRAMES = 250
+# On the normalized signal, where 1.0 is the video's busiest frames
+DEFAULT_IDLE_THRESHOLD = 0.05
+# Idle stretches shorter than this are played, not skipped
+MIN_IDLE_SECONDS = 1.0
+MOTION_JOB = "motion"
+
+type Activity = npt.NDArray[np.float32]
+
+
+def motion_dir() -> Path:
+    return get_app_data_dir("motion")
+
+
+def activity_path(signature: FileSignature) -> Path:
+    return motion_dir() / f"{signature.digest}.npy"
+
+
+def partial_activity_path(signature: FileSignature) -> Path:
+    """Energy of the frames analysed so far by an unfinished scan."""
+    return motion_dir() / f"{signature.digest}.part.npy"
+
+
+def load_activity(signature: FileSignature) -> Activity | None:
+    """Cached motion energy of this exact version of the video, if any."""
+    try:
+        return np.asarray(np.load(activity_path(signature)), np.float32)
+    except (OSError, ValueError):
+        return None
+
+
+def segment_energy(path: str, begin: int, end: int) -> Activity:
+    """Mean absolute difference between consecutive frames in [begin, end).
+
+    Runs in a worker process. Each value compares a frame with the one
+    before it on downscaled grayscale frames, in the 0-1 range. Frames
+    that cannot be decoded count as active, so they are never skipped.
+    """
+    energy = np.ones(end - begin, dtype=np.float32)
+    previous: npt.NDArray[np.int16] | None = None
+    size: tuple[int, int] | None = None
+    with open_video_source(path) as source:
+        # Start one frame early so the first value has something to compare
+        source.seek_frame(max(0, begin - 1))
+        while source.grab():
+            index = source.frame_index
+            if index >= end:
+                break
+            frame = source.retrieve()
+            if frame is None:
+                break
+            if size is None:
+                height, width = frame.shape[:2]
+                scale = min(1.0, MOTION_WIDTH / width)
+                size = (
+                    max(1, round(width * scale)),
+                    max(1, round(height * scale)),
+                )
+            gray = cv2.cvtColor(
+                cv2.resize(frame, size, interpolation=cv2.INTER_AREA),
+                cv2.COLOR_BGR2GRAY,
+            ).astype(np.int16)
+            if index >= begin:
+                energy[index - begin] = (
+                    0.0
+                    if previous is None
+                    else np.abs(gray - previous).mean() / 255
+                )
+            previous = gray
+    return energy
+
+
+def normalize_activity(activity: Activity) -> Activity:
+    """Scale so the video's busiest frames are around 1.0."""
+    if activity.size == 0:
+        return activity
+    peak = float(np.percentile(activity, 99))
+    if peak <= 0:
+        return np.zeros_like(activity)
+    return np.asarray(np.clip(activity / peak, 0.0, 1.0), np.float32)
+
+
+def skip_targets(
+    activity: Activity, threshold: float, min_idle_frames: int
+) -> npt.NDArray[np.int64]:
+    """Frame to play instead of each frame.
+
+    Frames inside an idle stretch of at least `min_idle_frames` map to the
+    first active frame after it (or to the end of the video); every other
+    frame maps to itself.
+    """
+    idle = activity < threshold
+
+    # Idle runs as [start, stop) pairs
+    edges = np.diff(np.concatenate(([0], idle.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    targets = np.arange(activity.size)
+    for start, stop in zip(starts, stops):
+        if stop - start >= min_idle_frames:
+            targets[start:stop] = stop
+    return targets
+
+
+def segment_length(frame_count: int, workers: int) -> int:
+    """Frames per worker task: a few tasks per worker, none too short."""
+    return max(SEGMENT_MIN_FRAMES, math.ceil(frame_count / (workers * 4)))
+
+
+def _save_array(path: Path, array: Activity) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as file:
+        np.save(file, array)
+    os.replace(tmp_path, path)
+
+
+class MotionAnalyzer:
+    """Computes and caches per-frame motion energy as background jobs.
+
+    Segments of a video are analysed in a process pool a batch at a time.
+    After each batch the energy so far is saved and checkpointed, so a scan
+    that is cancelled or interrupted resumes where it stopped.
+    """
+
+    def __init__(self, max_workers: int = MOTION_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # The UI process runs Tk and several threads; never fork it
+            self._pool = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def job_kind(self) -> JobKind:
+        return JobKind(
+            MOTION_JOB,
+            self.analyze,
+            lambda signature: activity_path(signature).exists(),
+        )
+
+    def analyze(self, signature: FileSignature, context: JobContext) -> None:
+        frame_count = probe_video(signature.path).frame_count
+        length = segment_length(frame_count, self.max_workers)
+        part_path = partial_activity_path(signature)
+
+        done = int(context.progress.get("frames", 0))
+        energy: list[Activity] = []
+        if done:
+            try:
+                energy.append(np.asarray(np.load(part_path), np.float32))
+            except (OSError, ValueError):
+                energy = []
+            if not energy or energy[0].size != done:
+                done, energy = 0, []
+
+        while done < frame_count:
+            # One segment at a time while a video is playing
+            batch = 1 if context.throttled else self.max_workers
+            begins = range(
+                done, min(frame_count, done + batch * length), length
+            )
+            futures = [
+                self._executor().submit(
+                    segment_energy,
+                    signature.path,
+                    begin,
+                    min(frame_count, begin + length),
+                )
+                for begin in begins
+            ]
+            energy.extend(future.result() for future in futures)
+            done = min(frame_count, begins[-1] + length)
+            if done < frame_count:
+                _save_array(part_path, np.concatenate(energy))
+                context.checkpoint(frames=done)
+
+        _save_array(
+            activity_path(signature),
+            np.concatenate(energy) if energy else np.zeros(0, np.float32),
+        )
+        part_path.unlink(missing_ok=True)
+
+    def get(self, signature: FileSignature) -> Activity | None:
+        return load_activity(signature)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,100 @@
+import os
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, Future
+
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from .video_source import VideoSource
+
+# Frames being converted or waiting to be shown; bounds the read-ahead
+PIPELINE_DEPTH = 6
+# cvtColor and resize release the GIL, so threads scale across cores
+PIPELINE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+type PipelineFrame = tuple[MatLike, int, float]
+
+
+class FramePipeline:
+    """Reads ahead of playback and prepares frames on a worker pool.
+
+    A decode thread owns `source` until `stop` returns: it reads frames in
+    order, hands each one to `prepare` on the pool and queues the future
+    with the frame's index and position. Futures are presented in the
+    order they were queued, so frames come out in decode order however the
+    pool schedules them. `prepare` is given each frame and its index.
+    """
+
+    def __init__(
+        self,
+        source: VideoSource,
+        pool: Executor,
+        prepare: Callable[[MatLike, int], MatLike],
+        next_index: int,
+        skip_targets: npt.NDArray[np.int64] | None = None,
+        depth: int = PIPELINE_DEPTH,
+    ) -> None:
+        self.source = source
+        self.pool = pool
+        self.prepare = prepare
+        # Index of the frame the next read returns
+        self.next_index = next_index
+        # Frame to read instead of each frame while skipping idle stretches
+        self.skip_targets = skip_targets
+        self.frames: queue.Queue[tuple[Future[MatLike], int, float]] = (
+            queue.Queue(maxsize=depth)
+        )
+        self.stopped = threading.Event()
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self._decode, daemon=True)
+        self.thread.start()
+
+    def _decode(self) -> None:
+        try:
+            while not self.stopped.is_set():
+                targets = self.skip_targets
+                if targets is not None and 0 <= self.next_index < targets.size:
+                    target = int(targets[self.next_index])
+                    if target != self.next_index:
+                        self.source.seek_frame(target)
+                        self.next_index = target
+                frame = self.source.read()
+                if frame is None:
+                    break
+                self.next_index = self.source.frame_index + 1
+                item = (
+                    self.pool.submit(
+                        self.prepare, frame, self.source.frame_index
+                    ),
+                    self.source.frame_index,
+                    self.source.position,
+                )
+                while not self.stopped.is_set():
+                    try:
+                        self.frames.put(item, timeout=0.05)
+                        break
+                    except queue.Full:
+                        continue
+        finally:
+            self.finished.set()
+
+    def next_frame(self) -> PipelineFrame | None:
+        """Next frame in order, or None if it is not decoded yet."""
+        try:
+            future, index, position = self.frames.get_nowait()
+        except queue.Empty:
+            return None
+        return future.result(), index, position
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every frame up to the end of the video was presented."""
+        return self.finished.is_set() and self.frames.empty()
+
+    def stop(self) -> None:
+        """Stop reading; afterwards the caller owns `source` again."""
+        self.stopped.set()
+        self.thread.join()
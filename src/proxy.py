@@ -0,0 +1,280 @@
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+from collections.abc import Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from .config import get_app_data_dir
+from .media_index import FileSignature
+
+PROXY_HEIGHT = 540
+# Keyframe interval of ffmpeg proxies; the OpenCV fallback is all-intra
+PROXY_GOP = 12
+PROXY_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+PROXY_SUFFIXES = (".mp4", ".avi")
+PROXY_CACHE_BYTES = 10 * 1024 * 1024 * 1024
+
+
+def proxy_dir() -> Path:
+    return get_app_data_dir("proxies")
+
+
+def find_proxy(signature: FileSignature) -> Path | None:
+    """Finished proxy for this exact version of the source, if any."""
+    for suffix in PROXY_SUFFIXES:
+        path = proxy_dir() / f"{signature.digest}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def _transcode_ffmpeg(source: str, target: str, height: int, gop: int) -> None:
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-y",
+            "-i",
+            source,
+            "-map",
+            "0:v:0",
+            "-an",
+            "-vf",
+            f"scale=-2:'min({height},ih)'",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-crf",
+            "28",
+            "-g",
+            str(gop),
+            "-keyint_min",
+            str(gop),
+            "-sc_threshold",
+            "0",
+            "-pix_fmt",
+            "yuv420p",
+            # Keep every source timestamp so proxy and original line up
+            "-fps_mode",
+            "passthrough",
+            "-f",
+            "mp4",
+            target,
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def _transcode_opencv(source: str, target: str, height: int) -> None:
+    import cv2
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise OSError(f"Cannot open {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    source_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    scale = min(1.0, height / source_height) if source_height else 1.0
+    size = (int(width * scale) // 2 * 2, int(source_height * scale) // 2 * 2)
+
+    # MJPEG makes every frame a keyframe, so any seek is a single decode
+    writer = cv2.VideoWriter(
+        target, cv2.VideoWriter.fourcc(*"MJPG"), fps, size, True
+    )
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            writer.write(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+    finally:
+        writer.release()
+        cap.release()
+
+
+def transcode_proxy(
+    source: str,
+    target_stem: str,
+    height: int = PROXY_HEIGHT,
+    gop: int = PROXY_GOP,
+) -> str:
+    """Write a low-resolution, short-GOP copy of `source`.
+
+    Runs in a worker process. Uses ffmpeg (H.264, fixed GOP) when available
+    and falls back to an all-intra MJPEG AVI written by OpenCV. Frames keep
+    their source timing, so positions in the proxy are positions in the
+    original.
+    """
+    suffix = ".mp4" if shutil.which("ffmpeg") else ".avi"
+    target = f"{target_stem}{suffix}"
+    tmp_path = f"{target_stem}.part{suffix}"
+    try:
+        if suffix == ".mp4":
+            _transcode_ffmpeg(source, tmp_path, height, gop)
+        else:
+            _transcode_opencv(source, tmp_path, height)
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return target
+
+
+def prune_stale_proxies() -> int:
+    """Delete proxies whose source changed or disappeared."""
+    removed = 0
+    for sidecar in proxy_dir().glob("*.json"):
+        digest = sidecar.stem
+        try:
+            with open(sidecar, encoding="utf-8") as file:
+                source = json.load(file)["source"]
+            current = FileSignature.of(source).digest
+        except (OSError, ValueError, KeyError):
+            current = None
+        if current != digest:
+            for path in proxy_dir().glob(f"{digest}.*"):
+                path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def prune_proxies(max_bytes: int, keep: Iterable[str] = ()) -> int:
+    """Delete least recently used proxies until the rest fit in
+    `max_bytes`, sparing the ones whose digest is in `keep`."""
+    keep = set(keep)
+    # Each proxy is its video, its sidecar and maybe an unfinished part
+    sizes: dict[str, int] = {}
+    used: dict[str, float] = {}
+    for path in proxy_dir().iterdir():
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        digest = path.name.split(".", 1)[0]
+        sizes[digest] = sizes.get(digest, 0) + stat.st_size
+        used[digest] = max(used.get(digest, 0.0), stat.st_mtime)
+    total = sum(sizes.values())
+    removed = 0
+    for digest in sorted(used, key=used.__getitem__):
+        if total <= max_bytes:
+            break
+        if digest in keep:
+            continue
+        for path in proxy_dir().glob(f"{digest}.*"):
+            path.unlink(missing_ok=True)
+        total -= sizes[digest]
+        removed += 1
+    return removed
+
+
+class ProxyManager:
+    """Builds proxies in a background process pool and tracks them.
+
+    Finished proxies are pruned, least recently used first, to stay
+    under `max_bytes`, except the one last handed to the player and the
+    ones still being built.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = PROXY_WORKERS,
+        max_bytes: int = PROXY_CACHE_BYTES,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self._pool: ProcessPoolExecutor | None = None
+        # Re-entrant: a future that is already done runs its callback
+        # inside request()
+        self._lock = threading.RLock()
+        self._pending: dict[str, Future[str]] = {}
+        self._failed: set[str] = set()
+        # Digest of the proxy last handed to the player
+        self._in_use: str | None = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # The UI process runs Tk and several threads; never fork it
+            self._pool = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            threading.Thread(target=self.prune, daemon=True).start()
+        return self._pool
+
+    def prune(self) -> None:
+        """Drop stale proxies, then the least recently used ones over
+        budget."""
+        prune_stale_proxies()
+        with self._lock:
+            keep = {*self._pending, self._in_use or ""}
+        prune_proxies(self.max_bytes, keep)
+
+    def request(self, signatures: Iterable[FileSignature]) -> None:
+        """Queue proxies for these sources, in the given order."""
+        with self._lock:
+            for signature in signatures:
+                digest = signature.digest
+                if (
+                    os.path.isdir(signature.path)
+                    or digest in self._pending
+                    or digest in self._failed
+                    or find_proxy(signature) is not None
+                ):
+                    continue
+                stem = proxy_dir() / digest
+                with open(
+                    stem.with_suffix(".json"), "w", encoding="utf-8"
+                ) as f:
+                    json.dump({"source": signature.path}, f)
+                future = self._executor().submit(
+                    transcode_proxy, signature.path, str(stem)
+                )
+                self._pending[digest] = future
+                future.add_done_callback(partial(self._finished, digest))
+
+    def _finished(self, digest: str, future: Future[str]) -> None:
+        with self._lock:
+            self._pending.pop(digest, None)
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                print(f"Proxy transcoding failed: {error}")
+                self._failed.add(digest)
+                return
+            keep = {digest, *self._pending, self._in_use or ""}
+        prune_proxies(self.max_bytes, keep)
+
+    def get(self, signature: FileSignature) -> Path | None:
+        path = find_proxy(signature)
+        if path is not None:
+            # The modification time orders proxies for pruning
+            try:
+                os.utime(path)
+            except OSError:
+                return None
+            with self._lock:
+                self._in_use = signature.digest
+        return path
+
+    def pending(self) -> bool:
+        with self._lock:
+            return bool(self._pending)
+
+    def cancel_pending(self) -> None:
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+from .config import get_app_data_dir
+from .media_index import FileSignature
+
+# Large sequential reads are what network shares are good at
+READAHEAD_CHUNK_BYTES = 16 * 1024 * 1024
+READAHEAD_CACHE_BYTES = 20 * 1024 * 1024 * 1024
+# Playlist entries after the current one that are copied ahead
+READAHEAD_VIDEOS = 2
+
+
+def cache_dir() -> Path:
+    return get_app_data_dir("readahead")
+
+
+def cached_path(signature: FileSignature) -> Path:
+    return cache_dir() / f"{signature.digest}{Path(signature.path).suffix}"
+
+
+def find_local_copy(signature: FileSignature) -> Path | None:
+    """Finished local copy of this exact version of the file, if any."""
+    path = cached_path(signature)
+    return path if path.exists() else None
+
+
+def copy_file(
+    source: str,
+    target: Path,
+    chunk_bytes: int = READAHEAD_CHUNK_BYTES,
+    max_rate: float | None = None,
+    cancelled: threading.Event | None = None,
+) -> bool:
+    """Copy in large sequential chunks; False if cancelled midway.
+
+    `max_rate` caps the copy in bytes per second, which keeps playback from
+    the share responsive while the copy runs and lets a local directory
+    stand in for a slow share. The copy only appears under `target` once it
+    is complete.
+    """
+    partial = target.with_name(f"{target.name}.part")
+    start = time.perf_counter()
+    copied = 0
+    try:
+        with open(source, "rb") as src, open(partial, "wb") as dst:
+            while chunk := src.read(chunk_bytes):
+                if cancelled is not None and cancelled.is_set():
+                    return False
+                dst.write(chunk)
+                copied += len(chunk)
+                if max_rate:
+                    ahead = copied / max_rate - (time.perf_counter() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        os.replace(partial, target)
+        return True
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+class ReadAheadCache:
+    """Copies videos from slow storage to a bounded local cache.
+
+    A single worker copies one file at a time, in the order of the last
+    request, so the video being watched comes first and the next playlist
+    entries follow. Least recently used copies are evicted to stay under
+    `max_bytes`, except the one last handed to the player and the ones
+    still requested.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = READAHEAD_CACHE_BYTES,
+        chunk_bytes: int = READAHEAD_CHUNK_BYTES,
+        max_rate: float | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.chunk_bytes = chunk_bytes
+        self.max_rate = max_rate
+        self._condition = threading.Condition()
+        self._wanted: list[FileSignature] = []
+        self._failed: set[str] = set()
+        self._copying: str | None = None
+        # Digest of the copy last handed to the player
+        self._in_use: str | None = None
+        self._cancel = threading.Event()
+        self._stopped = False
+        self._worker: threading.Thread | None = None
+
+    def request(self, signatures: Iterable[FileSignature]) -> None:
+        """Replace the queued copies with these, in priority order."""
+        with self._condition:
+            self._wanted = [
+                signature
+                for signature in signatures
+                if not os.path.isdir(signature.path)
+                and signature.digest not in self._failed
+                and signature.size <= self.max_bytes
+            ]
+            wanted = {signature.digest for signature in self._wanted}
+            if self._copying is not None and self._copying not in wanted:
+                self._cancel.set()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+            self._condition.notify()
+
+    def get(self, signature: FileSignature) -> Path | None:
+        """Local copy to play instead of `signature`, if it is complete."""
+        path = find_local_copy(signature)
+        if path is not None:
+            # The modification time orders copies for eviction
+            try:
+                os.utime(path)
+            except OSError:
+                return None
+            with self._condition:
+                self._in_use = signature.digest
+        return path
+
+    def pending(self) -> bool:
+        with self._condition:
+            return self._copying is not None or bool(self._wanted)
+
+    def shutdown(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._wanted = []
+            self._cancel.set()
+            self._condition.notify()
+
+    def _next(self) -> FileSignature | None:
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                while self._wanted:
+                    signature = self._wanted.pop(0)
+                    if find_local_copy(signature) is None:
+                        self._copying = signature.digest
+                        self._cancel.clear()
+                        return signature
+                self._copying = None
+                self._condition.wait()
+
+    def _run(self) -> None:
+        while (signature := self._next()) is not None:
+            target = cached_path(signature)
+            with self._condition:
+                keep = {signature.digest, *(s.digest for s in self._wanted)}
+                if self._in_use is not None:
+                    keep.add(self._in_use)
+            try:
+                self._evict(signature.size, keep)
+                if copy_file(
+                    signature.path,
+                    target,
+                    self.chunk_bytes,
+                    self.max_rate,
+                    self._cancel,
+                ):
+                    print(f"Cached {signature.path} locally")
+            except OSError as e:
+                print(f"Read-ahead copy failed: {e}")
+                with self._condition:
+                    self._failed.add(signature.digest)
+
+    def _evict(self, needed: int, keep: set[str]) -> None:
+        """Delete least recently used copies until `needed` bytes fit,
+        sparing the copies whose digest is in `keep`."""
+        copies = []
+        total = 0
+        for path in cache_dir().iterdir():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            # Spared copies still take up room
+            total += stat.st_size
+            if path.name.split(".", 1)[0] not in keep:
+                copies.append((stat.st_mtime, stat.st_size, path))
+        for _, size, path in sorted(copies):
+            if total + needed <= self.max_bytes:
+                break
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                # Still open for playback on platforms that forbid this
+                continue
+            total -= size
@@ -1,9 +1,18 @@
 import csv
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from pathlib import Path
+from typing import Any
 
 from .types import GroupType, RecordType, Role, Sex, Stage
-from .utils import format_time
+from .utils import format_time, video_stem_path
+
+
+@dataclass(frozen=True)
+class FrameStamp:
+    """Frame on screen when a behaviour was toggled."""
+
+    position: float
+    frame_index: int | None = None
 
 
 @dataclass(frozen=True)
@@ -24,6 +33,8 @@ class BehaviorRecord:
     group_size: int | None = None
     mother_and_calf: int | None = None
     calves: int | None = None
+    start_frame: int | None = None
+    end_frame: int | None = None
 
     @property
     def start_time_str(self) -> str:
@@ -57,6 +68,40 @@ class BehaviorRecord:
         return base_str
 
 
+_INT_FIELDS = frozenset(
+    {
+        "session",
+        "group_size",
+        "mother_and_calf",
+        "calves",
+        "start_frame",
+        "end_frame",
+    }
+)
+_FLOAT_FIELDS = frozenset({"start_time", "duration", "end_time"})
+
+
+def load_from_csv(path: str | Path) -> list[BehaviorRecord]:
+    """Read back the records of a CSV written by `save_as_csv`."""
+    optional = {f.name: f.default is None for f in fields(BehaviorRecord)}
+    records: list[BehaviorRecord] = []
+    with open(path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            values: dict[str, Any] = {}
+            for name, is_optional in optional.items():
+                raw = row.get(name) or ""
+                if not raw and is_optional:
+                    values[name] = None
+                elif name in _INT_FIELDS:
+                    values[name] = int(float(raw))
+                elif name in _FLOAT_FIELDS:
+                    values[name] = float(raw)
+                else:
+                    values[name] = raw
+            records.append(BehaviorRecord(**values))
+    return records
+
+
 def save_as_csv(
     video_files: list[str],
     current_video_index: int,
@@ -64,10 +109,9 @@ def save_as_csv(
     behavior_records: list[BehaviorRecord],
 ) -> None:
     if video_files and behavior_records:
-        video_name = video_files[current_video_index]
-        csv_root = f"{Path(video_name).stem}"
-        csv_filename = f"{csv_root}.csv"
-        csv_path = Path(video_dir) / csv_filename
+        root = video_stem_path(video_dir, video_files[current_video_index])
+        csv_root = root.name
+        csv_path = root.parent / f"{csv_root}.csv"
 
         suffix_counter = 0
 
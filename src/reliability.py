@@ -0,0 +1,334 @@
+"""Inter-observer agreement between independently labelled CSVs.
+
+    python -m src.reliability observer_a/ observer_b/ [observer_c/ ...]
+
+The CSVs written by `save_as_csv` for each video are merged and paired by
+relative path across the observer directories, and Cohen's kappa is
+reported per behaviour and overall for every pair of observers, summed over
+all the videos they share.
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import re
+from collections import defaultdict
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+from .media_index import VIDEO_EXTENSIONS, probe_video
+from .record import BehaviorRecord, load_from_csv
+
+# Events of two observers this close together are the same event
+EVENT_TOLERANCE_SECONDS = 1.0
+# STATE records are compared on a grid of bins of this length
+STATE_BIN_SECONDS = 1.0
+RELIABILITY_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# CSV of a later save of a video, see `save_as_csv`
+_SAVE_SUFFIX = re.compile(r"(.+)_\d+")
+
+type Counts = npt.NDArray[np.int64]
+# (parent_behaviour, behaviour); the same name may sit in several categories
+type BehaviourKey = tuple[str, str]
+
+
+def cohens_kappa(counts: Counts) -> npt.NDArray[np.float64]:
+    """Kappa of 2x2 tables stacked along the leading axes.
+
+    Each table is [[both, only first], [only second, neither]]. Tables
+    where chance agreement is certain (nobody ever saw the behaviour, or
+    both always did) give NaN.
+    """
+    counts = counts.astype(np.float64)
+    total = counts.sum(axis=(-2, -1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed = (counts[..., 0, 0] + counts[..., 1, 1]) / total
+        first = (counts[..., 0, 0] + counts[..., 0, 1]) / total
+        second = (counts[..., 0, 0] + counts[..., 1, 0]) / total
+        chance = first * second + (1 - first) * (1 - second)
+        kappa = (observed - chance) / (1 - chance)
+    return np.where(np.isclose(chance, 1.0), np.nan, kappa)
+
+
+@dataclass(frozen=True)
+class AgreementTable:
+    """2x2 agreement counts of two observers, one table per behaviour."""
+
+    behaviours: tuple[BehaviourKey, ...]
+    counts: Counts
+
+    def kappa(self) -> dict[BehaviourKey, float]:
+        return dict(zip(self.behaviours, cohens_kappa(self.counts).tolist()))
+
+    def overall_kappa(self) -> float:
+        """Kappa of the tables of all behaviours pooled together."""
+        return float(cohens_kappa(self.counts.sum(axis=0)))
+
+    def __add__(self, other: "AgreementTable") -> "AgreementTable":
+        behaviours = tuple(sorted(set(self.behaviours) | set(other.behaviours)))
+        counts = np.zeros((len(behaviours), 2, 2), dtype=np.int64)
+        for table in (self, other):
+            rows = [behaviours.index(b) for b in table.behaviours]
+            counts[rows] += table.counts
+        return AgreementTable(behaviours, counts)
+
+
+def _record_end(record: BehaviorRecord) -> float:
+    if record.end_time is not None:
+        return record.end_time
+    return record.start_time + record.duration
+
+
+def _match_events(
+    first: npt.NDArray[np.float64],
+    second: npt.NDArray[np.float64],
+    tolerance: float,
+) -> int:
+    """Number of one-to-one matches between two sorted time arrays.
+
+    Every pair at most `tolerance` apart is a candidate; the closest pairs
+    are matched first, and each event is matched at most once. Unlike
+    nearest neighbours, this still pairs up events in a tight cluster.
+    """
+    low = np.searchsorted(second, first - tolerance, side="left")
+    high = np.searchsorted(second, first + tolerance, side="right")
+    widths = high - low
+    i = np.repeat(np.arange(first.size), widths)
+    j = np.arange(widths.sum()) - np.repeat(np.cumsum(widths) - widths, widths)
+    j += np.repeat(low, widths)
+    order = np.argsort(np.abs(first[i] - second[j]), kind="stable")
+
+    used_first = np.zeros(first.size, dtype=np.bool_)
+    used_second = np.zeros(second.size, dtype=np.bool_)
+    matches = 0
+    for a, b in zip(i[order].tolist(), j[order].tolist()):
+        if not used_first[a] and not used_second[b]:
+            used_first[a] = used_second[b] = True
+            matches += 1
+    return matches
+
+
+def _state_bins(
+    records: Sequence[BehaviorRecord], bins: int, bin_seconds: float
+) -> npt.NDArray[np.bool_]:
+    """Bins covered by any of the records."""
+    edges = np.zeros(bins + 1, dtype=np.int64)
+    starts = np.array([r.start_time for r in records], dtype=np.float64)
+    ends = np.array(
+        [_record_end(r) for r in records],
+        dtype=np.float64,
+    )
+    start_bins = np.clip(np.floor(starts / bin_seconds), 0, bins).astype(int)
+    end_bins = np.clip(np.ceil(ends / bin_seconds), 0, bins).astype(int)
+    np.add.at(edges, start_bins, 1)
+    np.add.at(edges, end_bins, -1)
+    return np.cumsum(edges[:-1]) > 0
+
+
+def compare_records(
+    first: Sequence[BehaviorRecord],
+    second: Sequence[BehaviorRecord],
+    tolerance: float = EVENT_TOLERANCE_SECONDS,
+    bin_seconds: float = STATE_BIN_SECONDS,
+    duration: float | None = None,
+) -> AgreementTable:
+    """Agreement of two observers on one video.
+
+    EVENT records agree when matched within `tolerance`; the video is
+    counted as windows of twice the tolerance to get the number of moments
+    where both agreed nothing happened. STATE records are compared bin by
+    bin over the video.
+    """
+    if duration is None:
+        duration = max(map(_record_end, (*first, *second)), default=0.0)
+    bins = max(1, int(np.ceil(duration / bin_seconds)))
+    windows = max(1, int(np.ceil(duration / (2 * tolerance))))
+
+    def key(record: BehaviorRecord) -> BehaviourKey:
+        return record.parent_behaviour, record.behaviour
+
+    kinds: dict[BehaviourKey, str] = {}
+    for record in (*first, *second):
+        kinds.setdefault(key(record), record.record_type)
+    behaviours = tuple(sorted(kinds))
+    counts = np.zeros((len(behaviours), 2, 2), dtype=np.int64)
+
+    for row, behaviour in enumerate(behaviours):
+        mine = [r for r in first if key(r) == behaviour]
+        theirs = [r for r in second if key(r) == behaviour]
+        if kinds[behaviour] == "STATE":
+            a = _state_bins(mine, bins, bin_seconds)
+            b = _state_bins(theirs, bins, bin_seconds)
+            both = int(np.count_nonzero(a & b))
+            only_first = int(np.count_nonzero(a & ~b))
+            only_second = int(np.count_nonzero(~a & b))
+            neither = bins - both - only_first - only_second
+        else:
+            a_times = np.sort([r.start_time for r in mine])
+            b_times = np.sort([r.start_time for r in theirs])
+            both = _match_events(a_times, b_times, tolerance)
+            only_first = a_times.size - both
+            only_second = b_times.size - both
+            neither = max(0, windows - both - only_first - only_second)
+        counts[row] = [[both, only_first], [only_second, neither]]
+    return AgreementTable(behaviours, counts)
+
+
+def compare_files(
+    paths: Sequence[Sequence[str | Path]],
+    tolerance: float = EVENT_TOLERANCE_SECONDS,
+    bin_seconds: float = STATE_BIN_SECONDS,
+    duration: float | None = None,
+) -> dict[tuple[int, int], AgreementTable]:
+    """Agreement of every pair of observers on one video.
+
+    `paths` holds the CSVs of each observer; an observer who saved a
+    video several times has the records of all the saves merged. Without
+    the video's `duration`, it ends with the last record.
+    """
+    records = [
+        [record for path in observer for record in load_from_csv(path)]
+        for observer in paths
+    ]
+    if not duration:
+        duration = max(
+            (_record_end(r) for observer in records for r in observer),
+            default=0.0,
+        )
+    return {
+        (i, j): compare_records(
+            records[i], records[j], tolerance, bin_seconds, duration
+        )
+        for i, j in itertools.combinations(range(len(records)), 2)
+    }
+
+
+def compare_season(
+    videos: Mapping[str, Sequence[Sequence[str | Path]]],
+    tolerance: float = EVENT_TOLERANCE_SECONDS,
+    bin_seconds: float = STATE_BIN_SECONDS,
+    max_workers: int = RELIABILITY_WORKERS,
+    durations: Mapping[str, float] | None = None,
+) -> dict[tuple[int, int], AgreementTable]:
+    """Agreement per pair of observers, summed over many videos.
+
+    `videos` maps each video to its CSVs, one list per observer in the
+    same order for every video, and `durations` to its length in seconds.
+    Videos are compared in parallel processes.
+    """
+    durations = durations or {}
+    totals: dict[tuple[int, int], AgreementTable] = {}
+    with ProcessPoolExecutor(
+        max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures = [
+            pool.submit(
+                compare_files,
+                paths,
+                tolerance,
+                bin_seconds,
+                durations.get(video),
+            )
+            for video, paths in videos.items()
+        ]
+        for future in futures:
+            for pair, table in future.result().items():
+                totals[pair] = totals[pair] + table if pair in totals else table
+    return totals
+
+
+def video_csv_files(directory: str | Path) -> dict[str, list[Path]]:
+    """CSVs under `directory`, grouped by the video they were saved for.
+
+    Videos are named by their path relative to `directory`, without the
+    suffix. `save_as_csv` writes `<stem>.csv`, then `<stem>_<n>.csv` on
+    later saves, so `<stem>_<n>.csv` joins `<stem>.csv` unless a video
+    called `<stem>_<n>` sits next to it.
+    """
+    directory = Path(directory)
+    csv_files: dict[str, Path] = {}
+    videos: set[str] = set()
+    for path in directory.rglob("*"):
+        name = path.relative_to(directory).with_suffix("").as_posix()
+        if path.suffix.lower() == ".csv":
+            csv_files[name] = path
+        elif path.suffix.lower() in VIDEO_EXTENSIONS:
+            videos.add(name)
+
+    grouped: defaultdict[str, list[Path]] = defaultdict(list)
+    for name, path in sorted(csv_files.items()):
+        match = _SAVE_SUFFIX.fullmatch(name)
+        if match and match[1] in csv_files and name not in videos:
+            name = match[1]
+        grouped[name].append(path)
+    return dict(grouped)
+
+
+def video_durations(
+    directory: str | Path, videos: Iterable[str]
+) -> dict[str, float]:
+    """Probed length of each of `videos` found under `directory`, named as
+    by `video_csv_files`."""
+    directory = Path(directory)
+    wanted = set(videos)
+    durations: dict[str, float] = {}
+    for path in directory.rglob("*"):
+        name = path.relative_to(directory).with_suffix("").as_posix()
+        if path.suffix.lower() in VIDEO_EXTENSIONS and name in wanted:
+            duration = probe_video(str(path)).duration
+            if duration > 0:
+                durations[name] = duration
+    return durations
+
+
+def pair_csv_files(
+    directories: Sequence[str | Path],
+) -> dict[str, list[list[Path]]]:
+    """CSVs of the videos labelled in every observer directory."""
+    by_video = [video_csv_files(directory) for directory in directories]
+    shared = set(by_video[0]).intersection(*by_video[1:])
+    return {
+        video: [files[video] for files in by_video] for video in sorted(shared)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("observers", nargs="+", help="one directory each")
+    parser.add_argument(
+        "--tolerance", type=float, default=EVENT_TOLERANCE_SECONDS
+    )
+    parser.add_argument("--bin", type=float, default=STATE_BIN_SECONDS)
+    parser.add_argument(
+        "--videos", help="directory of the videos, defaults to the first"
+    )
+    args = parser.parse_args()
+    if len(args.observers) < 2:
+        parser.error("at least two observer directories are needed")
+
+    videos = pair_csv_files(args.observers)
+    print(f"{len(videos)} videos labelled by every observer")
+    durations = video_durations(args.videos or args.observers[0], videos)
+    if len(durations) < len(videos):
+        print(
+            f"{len(videos) - len(durations)} videos not found; they are "
+            "taken to end with their last record"
+        )
+    for (i, j), table in compare_season(
+        videos, args.tolerance, args.bin, durations=durations
+    ).items():
+        print(f"\n{args.observers[i]} vs {args.observers[j]}")
+        for (parent, behaviour), kappa in table.kappa().items():
+            print(f"  {parent}/{behaviour}: {kappa:.3f}")
+        print(f"  Global: {table.overall_kappa():.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import queue
+import threading
+
+import cv2
+from cv2.typing import MatLike
+
+from .video_source import DecoderOptions, VideoSource, open_video_source
+
+# Decoded frames held by the reverse player at most (current chunk, one
+# ready chunk and the one being decoded), in bytes
+REVERSE_BUFFER_BYTES = 192 * 1024 * 1024
+REVERSE_MAX_CHUNK_FRAMES = 120
+
+type ReverseFrame = tuple[MatLike, int, float]
+
+
+def fit_size(
+    width: int, height: int, max_width: int, max_height: int
+) -> tuple[int, int]:
+    """Size of a width x height frame scaled down to fit the box."""
+    scale = min(1.0, max_width / width, max_height / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class ReversePlayer:
+    """Presents a video backwards with bounded memory.
+
+    Codecs can only decode forwards from a keyframe, so a worker thread with
+    its own decoder walks back through the file one chunk at a time: it seeks
+    to the start of the chunk, decodes it forwards and hands it over
+    reversed. The next chunk is decoded while the current one is presented,
+    which keeps frame pacing steady. Frames are stored at display size, so a
+    chunk costs a fraction of the full-resolution frames.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        options: DecoderOptions,
+        end_index: int,
+        max_width: int,
+        max_height: int,
+        budget_bytes: int = REVERSE_BUFFER_BYTES,
+    ) -> None:
+        self.path = path
+        self.options = options
+        self.end_index = end_index
+        self.max_width = max_width
+        self.max_height = max_height
+        self.budget_bytes = budget_bytes
+        self.chunks: queue.Queue[list[ReverseFrame]] = queue.Queue(maxsize=1)
+        self.current: list[ReverseFrame] = []
+        self.stopped = threading.Event()
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self._decode, daemon=True)
+        self.thread.start()
+
+    def _decode(self) -> None:
+        try:
+            source = open_video_source(self.path, self.options)
+        except OSError as e:
+            print(f"Error opening video for reverse playback: {e}")
+            self.finished.set()
+            return
+
+        size = fit_size(
+            source.width, source.height, self.max_width, self.max_height
+        )
+        chunk_frames = max(
+            1,
+            min(
+                REVERSE_MAX_CHUNK_FRAMES,
+                self.budget_bytes // (3 * size[0] * size[1] * 3),
+            ),
+        )
+
+        with source:
+            end = self.end_index
+            while end > 0 and not self.stopped.is_set():
+                begin = max(0, end - chunk_frames)
+                seek_at = begin
+                chunk = self._read_chunk(source, seek_at, begin, end, size)
+                # An inaccurate seek can land inside or past the chunk;
+                # start further back before giving up on its first frames
+                while (
+                    (not chunk or chunk[0][1] > begin)
+                    and seek_at > 0
+                    and not self.stopped.is_set()
+                ):
+                    seek_at = max(0, seek_at - chunk_frames)
+                    chunk = self._read_chunk(source, seek_at, begin, end, size)
+
+                if not chunk:
+                    break
+                chunk.reverse()
+                while not self.stopped.is_set():
+                    try:
+                        self.chunks.put(chunk, timeout=0.05)
+                        break
+                    except queue.Full:
+                        continue
+                end = begin
+        self.finished.set()
+
+    def _read_chunk(
+        self,
+        source: VideoSource,
+        seek_at: int,
+        begin: int,
+        end: int,
+        size: tuple[int, int],
+    ) -> list[ReverseFrame]:
+        """Frames [begin, end) at display size, decoded from `seek_at`."""
+        source.seek_frame(seek_at)
+        chunk: list[ReverseFrame] = []
+        while not self.stopped.is_set():
+            if not source.grab() or source.frame_index >= end:
+                break
+            if source.frame_index < begin:
+                continue
+            frame = source.retrieve()
+            if frame is None:
+                break
+            if (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            chunk.append((frame, source.frame_index, source.position))
+        return chunk
+
+    def next_frame(self) -> ReverseFrame | None:
+        """Next frame going backwards, or None if it is not decoded yet."""
+        if not self.current:
+            try:
+                self.current = self.chunks.get_nowait()
+            except queue.Empty:
+                return None
+        return self.current.pop(0)
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the start of the video has been presented."""
+        return (
+            self.finished.is_set() and not self.current and self.chunks.empty()
+        )
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join(timeout=1.0)
@@ -0,0 +1,203 @@
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+from .utils import video_stem_path
+
+ROI_FORMAT_VERSION = 1
+ROI_SUFFIX = ".roi.npz"
+# Box coordinates are stored as fractions of the frame in 1/65535 steps,
+# finer than a pixel at any resolution we record
+COORD_SCALE = 65535
+
+# (left, top, right, bottom) as fractions of the frame width and height
+type Box = tuple[float, float, float, float]
+
+
+def roi_path(video_dir: str | Path, video_name: str) -> Path:
+    """Annotations live next to the CSVs, named after the video."""
+    root = video_stem_path(video_dir, video_name)
+    return root.parent / f"{root.name}{ROI_SUFFIX}"
+
+
+@dataclass
+class RoiTrack:
+    """Keyframed boxes of one tagged animal.
+
+    Only keyframes are stored, sorted by frame; boxes in between are
+    interpolated linearly. A hidden keyframe (NaN box) marks where the
+    animal leaves the view. There is no box before the first keyframe or
+    after the last one. Keyframes found by the tracker are flagged in
+    `tracked`; the ones drawn by hand always win over them.
+    """
+
+    frames: npt.NDArray[np.int64] = field(
+        default_factory=lambda: np.zeros(0, np.int64)
+    )
+    boxes: npt.NDArray[np.float32] = field(
+        default_factory=lambda: np.zeros((0, 4), np.float32)
+    )
+    tracked: npt.NDArray[np.bool_] = field(
+        default_factory=lambda: np.zeros(0, np.bool_)
+    )
+
+    def __len__(self) -> int:
+        return int(self.frames.size)
+
+    def set_key(
+        self, frame: int, box: Box | None, tracked: bool = False
+    ) -> None:
+        """Add or replace the keyframe at `frame`; None hides the box."""
+        row = np.array(box if box is not None else (np.nan,) * 4, np.float32)
+        i = int(np.searchsorted(self.frames, frame))
+        if i < self.frames.size and self.frames[i] == frame:
+            self.boxes[i] = row
+            self.tracked[i] = tracked
+            return
+        self.frames = np.insert(self.frames, i, frame)
+        self.boxes = np.insert(self.boxes, i, row, axis=0)
+        self.tracked = np.insert(self.tracked, i, tracked)
+
+    def delete_key(self, frame: int) -> bool:
+        i = int(np.searchsorted(self.frames, frame))
+        if i == self.frames.size or self.frames[i] != frame:
+            return False
+        self.frames = np.delete(self.frames, i)
+        self.boxes = np.delete(self.boxes, i, axis=0)
+        self.tracked = np.delete(self.tracked, i)
+        return True
+
+    def next_drawn_key(self, frame: int) -> int | None:
+        """First keyframe after `frame` that was not found by the tracker."""
+        i = int(np.searchsorted(self.frames, frame, side="right"))
+        drawn = np.flatnonzero(~self.tracked[i:])
+        return int(self.frames[i + drawn[0]]) if drawn.size else None
+
+    def clear_tracked(self, begin: int, end: int | None = None) -> None:
+        """Drop the tracker's keyframes strictly between begin and end."""
+        inside = (self.frames > begin) & self.tracked
+        if end is not None:
+            inside &= self.frames < end
+        keep = ~inside
+        self.frames = self.frames[keep]
+        self.boxes = self.boxes[keep]
+        self.tracked = self.tracked[keep]
+
+    def add_tracked(
+        self, frames: npt.NDArray[np.int64], boxes: npt.NDArray[np.float32]
+    ) -> None:
+        """Merge keyframes found by the tracker, replacing earlier tracker
+        keyframes on the same frames but never drawn ones."""
+        keep = ~(self.tracked & np.isin(self.frames, frames))
+        new = ~np.isin(frames, self.frames[keep])
+        merged = np.concatenate((self.frames[keep], frames[new]))
+        order = np.argsort(merged, kind="stable")
+        self.frames = merged[order]
+        self.boxes = np.concatenate((self.boxes[keep], boxes[new]))[order]
+        self.tracked = np.concatenate(
+            (self.tracked[keep], np.ones(int(new.sum()), np.bool_))
+        )[order]
+
+    def box_at(self, frame: int) -> Box | None:
+        """Interpolated box at `frame`, in O(log keyframes)."""
+        i = int(np.searchsorted(self.frames, frame, side="right"))
+        if i == 0:
+            return None
+        before = self.boxes[i - 1]
+        if self.frames[i - 1] == frame:
+            box = before
+        elif i == self.frames.size:
+            return None
+        elif np.isnan(self.boxes[i]).any():
+            # The box stays put until the animal leaves the view
+            box = before
+        else:
+            t = (frame - self.frames[i - 1]) / (
+                self.frames[i] - self.frames[i - 1]
+            )
+            box = before + (self.boxes[i] - before) * np.float32(t)
+        if np.isnan(box).any():
+            return None
+        left, top, right, bottom = box.tolist()
+        return left, top, right, bottom
+
+
+class RoiStore:
+    """The tracks of every tag in one video."""
+
+    def __init__(self) -> None:
+        self.tracks: dict[str, RoiTrack] = {}
+
+    def track(self, tag: str) -> RoiTrack:
+        return self.tracks.setdefault(tag, RoiTrack())
+
+    def boxes_at(self, frame: int) -> Iterator[tuple[str, Box]]:
+        for tag, track in self.tracks.items():
+            box = track.box_at(frame)
+            if box is not None:
+                yield tag, box
+
+    def save(self, path: str | Path) -> None:
+        """Write every track into flat arrays, one row per keyframe."""
+        tracks = [(tag, t) for tag, t in self.tracks.items() if len(t)]
+        boxes = np.concatenate(
+            [np.zeros((0, 4), np.float32), *(t.boxes for _, t in tracks)]
+        )
+        # Keyframes are stored as gaps from the previous one, which compress
+        # far better than absolute frame numbers
+        frame_steps = np.concatenate(
+            [
+                np.zeros(0, np.int64),
+                *(np.diff(t.frames, prepend=0) for _, t in tracks),
+            ]
+        )
+        tracked = np.concatenate(
+            [np.zeros(0, np.bool_), *(t.tracked for _, t in tracks)]
+        )
+        hidden = np.isnan(boxes).any(axis=1)
+        coords = np.rint(
+            np.clip(np.nan_to_num(boxes), 0.0, 1.0) * COORD_SCALE
+        ).astype(np.uint16)
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                version=np.int32(ROI_FORMAT_VERSION),
+                tags=np.array([tag for tag, _ in tracks], dtype=np.str_),
+                counts=np.array([len(t) for _, t in tracks], np.int64),
+                frame_steps=frame_steps,
+                coords=coords,
+                hidden=hidden,
+                tracked=tracked,
+            )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RoiStore":
+        store = cls()
+        with np.load(path) as data:
+            if int(data["version"]) != ROI_FORMAT_VERSION:
+                raise ValueError(f"Unsupported ROI file version in {path}")
+            boxes = data["coords"].astype(np.float32) / COORD_SCALE
+            boxes[data["hidden"]] = np.nan
+            steps = data["frame_steps"]
+            # Files saved before tracking existed only hold drawn keyframes
+            tracked = (
+                data["tracked"]
+                if "tracked" in data.files
+                else np.zeros(len(boxes), np.bool_)
+            )
+            offsets = np.concatenate(([0], np.cumsum(data["counts"])))
+            for tag, begin, end in zip(
+                data["tags"].tolist(), offsets[:-1], offsets[1:]
+            ):
+                store.tracks[tag] = RoiTrack(
+                    np.cumsum(steps[begin:end]),
+                    boxes[begin:end],
+                    tracked[begin:end],
+                )
+        return store
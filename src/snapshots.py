@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import cv2
+from cv2.typing import MatLike
+
+from .media_index import mark_export_directory, probe_video
+from .record import BehaviorRecord
+from .video_source import DecoderOptions, open_video_source
+
+SNAPSHOT_FORMAT = ".jpg"
+SNAPSHOT_QUALITY = 92
+SNAPSHOT_WRITERS = min(8, (os.cpu_count() or 1) * 2)
+# Videos decoded at the same time
+SNAPSHOT_VIDEOS = max(1, (os.cpu_count() or 2) // 2)
+# Gaps longer than this are seeked over instead of decoded through
+SEEK_GAP_SECONDS = 5.0
+# Decoded frames waiting for a writer, per video
+PENDING_WRITES = 16
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    frame_index: int
+    path: Path
+
+
+@dataclass
+class SnapshotReport:
+    written: list[Path] = field(default_factory=list)
+    # Requested frames the decoder never reached
+    missing: list[Snapshot] = field(default_factory=list)
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^\w-]+", "_", text).strip("_") or "registro"
+
+
+def record_snapshots(
+    records: Sequence[BehaviorRecord], fps: float, directory: Path, stem: str
+) -> list[Snapshot]:
+    """Start frame of every record, and end frame of STATE records."""
+    snapshots: list[Snapshot] = []
+    for number, record in enumerate(records, start=1):
+        marks = [("inicio", record.start_frame, record.start_time)]
+        if record.record_type == "STATE" and record.end_time is not None:
+            marks.append(("fin", record.end_frame, record.end_time))
+        for mark, frame_index, seconds in marks:
+            if frame_index is None:
+                frame_index = round(seconds * fps)
+            name = (
+                f"{stem}_{number:04d}_{slugify(record.behaviour)}_{mark}"
+                f"_{frame_index}{SNAPSHOT_FORMAT}"
+            )
+            snapshots.append(Snapshot(frame_index, directory / name))
+    return snapshots
+
+
+def _write(frame: MatLike, paths: list[Path]) -> list[Path]:
+    params = [cv2.IMWRITE_JPEG_QUALITY, SNAPSHOT_QUALITY]
+    for path in paths:
+        if not cv2.imwrite(str(path), frame, params):
+            raise OSError(f"Cannot write {path}")
+    return paths
+
+
+def export_video_snapshots(
+    video_path: str,
+    snapshots: Sequence[Snapshot],
+    writers: ThreadPoolExecutor,
+    options: DecoderOptions | None = None,
+) -> SnapshotReport:
+    """Decode `video_path` once, front to back, saving the requested frames.
+
+    Frames are visited in order; short gaps are decoded through and long
+    ones are seeked over, so no frame is decoded twice. Encoding and
+    writing happen on `writers` while decoding continues.
+    """
+    by_frame: dict[int, list[Path]] = defaultdict(list)
+    for snapshot in snapshots:
+        by_frame[max(0, snapshot.frame_index)].append(snapshot.path)
+
+    report = SnapshotReport()
+    futures: list[Future[list[Path]]] = []
+    slots = threading.BoundedSemaphore(PENDING_WRITES)
+
+    with open_video_source(video_path, options) as source:
+        seek_gap = max(1, round(SEEK_GAP_SECONDS * (source.fps or 25.0)))
+        targets = sorted(by_frame)
+        for position, target in enumerate(targets):
+            if target - source.frame_index > seek_gap:
+                source.seek_frame(target)
+            reached = source.frame_index >= target
+            while not reached and source.grab():
+                reached = source.frame_index >= target
+            frame = source.retrieve() if reached else None
+            if frame is None:
+                report.missing.extend(
+                    Snapshot(t, path)
+                    for t in targets[position:]
+                    for path in by_frame[t]
+                )
+                break
+
+            slots.acquire()
+            future = writers.submit(_write, frame, by_frame[target])
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+
+    for future in futures:
+        report.written.extend(future.result())
+    return report
+
+
+def export_snapshots(
+    jobs: Mapping[str, Sequence[BehaviorRecord]],
+    output_dir: str | Path,
+    options: DecoderOptions | None = None,
+) -> SnapshotReport:
+    """Save a still for every record of every video in `jobs`.
+
+    Videos are decoded in parallel, each in a single pass, and all of them
+    share one pool of image writers. Images go to one subdirectory of
+    `output_dir` per video.
+    """
+    output_dir = mark_export_directory(output_dir)
+    report = SnapshotReport()
+    with (
+        ThreadPoolExecutor(SNAPSHOT_WRITERS) as writers,
+        ThreadPoolExecutor(SNAPSHOT_VIDEOS) as decoders,
+    ):
+        futures: list[Future[SnapshotReport]] = []
+        for video_path, records in jobs.items():
+            if not records:
+                continue
+            stem = Path(video_path).stem
+            directory = output_dir / stem
+            directory.mkdir(parents=True, exist_ok=True)
+            snapshots = record_snapshots(
+                records, probe_video(video_path).fps, directory, stem
+            )
+            futures.append(
+                decoders.submit(
+                    export_video_snapshots,
+                    video_path,
+                    snapshots,
+                    writers,
+                    options,
+                )
+            )
+        for future in futures:
+            result = future.result()
+            report.written.extend(result.written)
+            report.missing.extend(result.missing)
+    return report
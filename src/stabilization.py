@@ -0,0 +1,294 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from .config import get_app_data_dir
+from .jobs import JobContext, JobKind
+from .media_index import FileSignature, probe_video
+from .motion import segment_length
+from .roi import Box
+from .video_source import open_video_source
+
+# Camera motion is estimated at this width, keeping the aspect ratio
+STABILIZE_WIDTH = 320
+STABILIZE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# Corners followed from each frame to the next
+STABILIZE_FEATURES = 200
+# Fewer tracked corners than this and the frame counts as not moving
+STABILIZE_MIN_FEATURES = 8
+# Camera motion slower than this window is kept; the rocking is removed
+STABILIZE_SMOOTH_SECONDS = 1.0
+# Largest correction, as a fraction of the frame width or height
+STABILIZE_MAX_SHIFT = 0.1
+# Frames are enlarged this much so the warp does not uncover the borders
+STABILIZE_ZOOM = 1.05
+STABILIZE_JOB = "stabilize"
+
+# One row per frame: (dx, dy, angle), the shift as a fraction of the frame
+# width and height and the rotation about the centre in radians
+type Transforms = npt.NDArray[np.float32]
+
+
+def stabilization_dir() -> Path:
+    return get_app_data_dir("stabilization")
+
+
+def transforms_path(signature: FileSignature) -> Path:
+    return stabilization_dir() / f"{signature.digest}.npy"
+
+
+def partial_motion_path(signature: FileSignature) -> Path:
+    """Camera motion of the frames analysed so far by an unfinished pass."""
+    return stabilization_dir() / f"{signature.digest}.part.npy"
+
+
+def load_transforms(signature: FileSignature) -> Transforms | None:
+    """Cached corrections for this exact version of the video, if any."""
+    try:
+        return np.asarray(np.load(transforms_path(signature)), np.float32)
+    except (OSError, ValueError):
+        return None
+
+
+def frame_motion(
+    previous: MatLike, gray: MatLike
+) -> tuple[float, float, float]:
+    """Camera shift and rotation from one grayscale frame to the next."""
+    points = cv2.goodFeaturesToTrack(previous, STABILIZE_FEATURES, 0.01, 8)
+    if points is None or len(points) < STABILIZE_MIN_FEATURES:
+        return 0.0, 0.0, 0.0
+    moved, status, _ = cv2.calcOpticalFlowPyrLK(previous, gray, points, None)
+    found = status.ravel() == 1
+    if found.sum() < STABILIZE_MIN_FEATURES:
+        return 0.0, 0.0, 0.0
+    matrix, _ = cv2.estimateAffinePartial2D(points[found], moved[found])
+    if matrix is None:
+        return 0.0, 0.0, 0.0
+    height, width = gray.shape[:2]
+    # Re-express the shift as one about the frame centre, where the
+    # correction rotates
+    centre = np.array((width / 2, height / 2))
+    shift = matrix[:, 2] + matrix[:, :2] @ centre - centre
+    angle = math.atan2(matrix[1, 0], matrix[0, 0])
+    return shift[0] / width, shift[1] / height, angle
+
+
+def segment_motion(path: str, begin: int, end: int) -> Transforms:
+    """Camera motion into each frame in [begin, end) from the one before.
+
+    Runs in a worker process, on downscaled grayscale frames. Frames that
+    cannot be decoded count as not moving.
+    """
+    motion = np.zeros((end - begin, 3), dtype=np.float32)
+    previous: MatLike | None = None
+    size: tuple[int, int] | None = None
+    with open_video_source(path) as source:
+        # Start one frame early so the first frame has something to follow
+        source.seek_frame(max(0, begin - 1))
+        while source.grab():
+            index = source.frame_index
+            if index >= end:
+                break
+            frame = source.retrieve()
+            if frame is None:
+                break
+            if size is None:
+                height, width = frame.shape[:2]
+                scale = min(1.0, STABILIZE_WIDTH / width)
+                size = (
+                    max(1, round(width * scale)),
+                    max(1, round(height * scale)),
+                )
+            gray = cv2.cvtColor(
+                cv2.resize(frame, size, interpolation=cv2.INTER_AREA),
+                cv2.COLOR_BGR2GRAY,
+            )
+            if index >= begin and previous is not None:
+                motion[index - begin] = frame_motion(previous, gray)
+            previous = gray
+    return motion
+
+
+def smooth_corrections(motion: Transforms, radius: int) -> Transforms:
+    """Per-frame warp that moves the camera path onto its moving average.
+
+    The path is the running sum of the frame-to-frame motion; averaging it
+    over 2 * radius + 1 frames keeps pans and turns but not the rocking.
+    """
+    if motion.size == 0:
+        return motion
+    path = np.cumsum(motion, axis=0, dtype=np.float64)
+    padded = np.pad(path, ((radius + 1, radius), (0, 0)), mode="edge")
+    totals = np.cumsum(padded, axis=0)
+    window = 2 * radius + 1
+    smoothed = (totals[window:] - totals[:-window]) / window
+    corrections = smoothed - path
+    corrections[:, :2] = np.clip(
+        corrections[:, :2], -STABILIZE_MAX_SHIFT, STABILIZE_MAX_SHIFT
+    )
+    return corrections.astype(np.float32)
+
+
+def stabilize_frame(frame: MatLike, correction: Transforms) -> MatLike:
+    """Warp a frame of any size by its correction, in a single pass."""
+    height, width = frame.shape[:2]
+    dx, dy, angle = correction.tolist()
+    # OpenCV's positive angles turn the other way round from ours
+    matrix = cv2.getRotationMatrix2D(
+        (width / 2, height / 2), -math.degrees(angle), STABILIZE_ZOOM
+    )
+    matrix[:, 2] += (
+        dx * width * STABILIZE_ZOOM,
+        dy * height * STABILIZE_ZOOM,
+    )
+    return cv2.warpAffine(
+        frame, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE
+    )
+
+
+def warp_box(
+    box: Box,
+    correction: tuple[float, float, float],
+    width: float,
+    height: float,
+    inverse: bool = False,
+) -> Box:
+    """Where a box lands when its frame is warped by `correction`.
+
+    With `inverse`, maps a box drawn on the stabilized frame back onto
+    the original one. A rotated box is replaced by its bounding box.
+    """
+    dx, dy, angle = correction
+    # The same warp as stabilize_frame, written out so boxes can be
+    # mapped without loading a frame
+    alpha = STABILIZE_ZOOM * math.cos(angle)
+    beta = -STABILIZE_ZOOM * math.sin(angle)
+    scale = alpha * alpha + beta * beta
+    shift_x = dx * width * STABILIZE_ZOOM
+    shift_y = dy * height * STABILIZE_ZOOM
+    centre_x, centre_y = width / 2, height / 2
+    left, top, right, bottom = box
+    xs: list[float] = []
+    ys: list[float] = []
+    for x, y in ((left, top), (right, top), (left, bottom), (right, bottom)):
+        x, y = x * width - centre_x, y * height - centre_y
+        if inverse:
+            x, y = x - shift_x, y - shift_y
+            x, y = (
+                (alpha * x - beta * y) / scale,
+                (beta * x + alpha * y) / scale,
+            )
+        else:
+            x, y = (
+                alpha * x + beta * y + shift_x,
+                alpha * y - beta * x + shift_y,
+            )
+        xs.append((x + centre_x) / width)
+        ys.append((y + centre_y) / height)
+    return (
+        max(0.0, min(xs)),
+        max(0.0, min(ys)),
+        min(1.0, max(xs)),
+        min(1.0, max(ys)),
+    )
+
+
+def _save_array(path: Path, array: Transforms) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as file:
+        np.save(file, array)
+    os.replace(tmp_path, path)
+
+
+class Stabilizer:
+    """Estimates and caches per-frame stabilization as background jobs.
+
+    Camera motion is measured on segments of a video in a process pool, a
+    batch at a time, and checkpointed after each batch like a motion
+    scan. Once the whole video is measured, the smoothed corrections are
+    saved; playback only has to warp each frame by its row.
+    """
+
+    def __init__(self, max_workers: int = STABILIZE_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # The UI process runs Tk and several threads; never fork it
+            self._pool = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def job_kind(self) -> JobKind:
+        return JobKind(
+            STABILIZE_JOB,
+            self.analyze,
+            lambda signature: transforms_path(signature).exists(),
+        )
+
+    def analyze(self, signature: FileSignature, context: JobContext) -> None:
+        metadata = probe_video(signature.path)
+        frame_count = metadata.frame_count
+        length = segment_length(frame_count, self.max_workers)
+        part_path = partial_motion_path(signature)
+
+        done = int(context.progress.get("frames", 0))
+        motion: list[Transforms] = []
+        if done:
+            try:
+                motion.append(np.asarray(np.load(part_path), np.float32))
+            except (OSError, ValueError):
+                motion = []
+            if not motion or len(motion[0]) != done:
+                done, motion = 0, []
+
+        while done < frame_count:
+            # One segment at a time while a video is playing
+            batch = 1 if context.throttled else self.max_workers
+            begins = range(
+                done, min(frame_count, done + batch * length), length
+            )
+            futures = [
+                self._executor().submit(
+                    segment_motion,
+                    signature.path,
+                    begin,
+                    min(frame_count, begin + length),
+                )
+                for begin in begins
+            ]
+            motion.extend(future.result() for future in futures)
+            done = min(frame_count, begins[-1] + length)
+            if done < frame_count:
+                _save_array(part_path, np.concatenate(motion))
+                context.checkpoint(frames=done)
+
+        radius = round(STABILIZE_SMOOTH_SECONDS * (metadata.fps or 25.0))
+        _save_array(
+            transforms_path(signature),
+            smooth_corrections(
+                np.concatenate(motion)
+                if motion
+                else np.zeros((0, 3), np.float32),
+                radius,
+            ),
+        )
+        part_path.unlink(missing_ok=True)
+
+    def get(self, signature: FileSignature) -> Transforms | None:
+        return load_transforms(signature)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
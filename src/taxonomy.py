@@ -0,0 +1,291 @@
+import json
+import tomllib
+import unicodedata
+from bisect import bisect_left
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, cast
+
+from .types import RecordType
+
+RECORD_TYPES: frozenset[str] = frozenset({"STATE", "EVENT"})
+
+
+class TaxonomyError(ValueError):
+    """Raised when a behaviour taxonomy is malformed."""
+
+
+@dataclass(frozen=True, slots=True)
+class BehaviorEntry:
+    path: tuple[str, ...]
+    name: str
+    record_type: RecordType
+    # Tk key sequence without the angle brackets, e.g. "r" or "F1"
+    hotkey: str | None = None
+
+    @property
+    def category(self) -> str:
+        return self.path[-1]
+
+    @property
+    def parents(self) -> tuple[str, ...]:
+        """Enclosing categories, closest first."""
+        return self.path[::-1]
+
+    @property
+    def key(self) -> str:
+        return "/".join((*self.path, self.name))
+
+
+class Taxonomy:
+    """Compiled behaviour taxonomy with constant-time lookups.
+
+    Behaviour names are not unique across categories ("Respiración" lives
+    under several of them), nor are category names at different depths, so
+    entries are keyed by their full path and the by-name index keeps every
+    match in document order.
+    """
+
+    def __init__(self, entries: Iterable[BehaviorEntry]) -> None:
+        self.entries = tuple(entries)
+        self._by_key: dict[tuple[tuple[str, ...], str], BehaviorEntry] = {}
+        self._by_name: dict[str, list[BehaviorEntry]] = {}
+        # Parents of the first category of each name, closest first
+        self._category_parents: dict[str, tuple[str, ...]] = {}
+        self.hotkeys: dict[str, BehaviorEntry] = {}
+
+        for entry in self.entries:
+            key = (entry.path, entry.name)
+            if key in self._by_key:
+                raise TaxonomyError(f"Duplicate behaviour: {entry.key}")
+            self._by_key[key] = entry
+            self._by_name.setdefault(entry.name, []).append(entry)
+            for depth, category in enumerate(entry.path):
+                self._category_parents.setdefault(
+                    category, entry.path[:depth][::-1]
+                )
+
+            if entry.hotkey is not None:
+                if entry.hotkey in self.hotkeys:
+                    raise TaxonomyError(
+                        f"Hotkey {entry.hotkey!r} is bound to both "
+                        f"{self.hotkeys[entry.hotkey].key} and {entry.key}"
+                    )
+                self.hotkeys[entry.hotkey] = entry
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "Taxonomy":
+        if not isinstance(data, Mapping) or not data:
+            raise TaxonomyError("Taxonomy must be a non-empty table")
+
+        entries: list[BehaviorEntry] = []
+        for category, node in data.items():
+            if not isinstance(node, Mapping):
+                raise TaxonomyError(
+                    f"Top-level entry {category!r} must be a category"
+                )
+            _compile_node((), category, node, entries)
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, path: tuple[str, ...], name: str) -> BehaviorEntry | None:
+        return self._by_key.get((path, name))
+
+    def entries_named(self, name: str) -> tuple[BehaviorEntry, ...]:
+        return tuple(self._by_name.get(name, ()))
+
+    def parents_of(self, name: str) -> tuple[str, ...]:
+        """Parents of the first behaviour called `name`, or failing that
+        of the first category called `name`, closest first."""
+        matches = self._by_name.get(name)
+        if matches:
+            return matches[0].parents
+        return self._category_parents.get(name, ())
+
+    def as_dict(self) -> dict[str, Any]:
+        """Rebuild the nested category/behaviour mapping."""
+        root: dict[str, Any] = {}
+        for entry in self.entries:
+            node = root
+            for category in entry.path:
+                node = node.setdefault(category, {})
+            node[entry.name] = (
+                {"type": entry.record_type, "hotkey": entry.hotkey}
+                if entry.hotkey
+                else entry.record_type
+            )
+        return root
+
+
+def _check_name(name: object, where: tuple[str, ...]) -> str:
+    if not isinstance(name, str) or not name.strip():
+        raise TaxonomyError(f"Empty name under {'/'.join(where) or 'root'}")
+    if "/" in name:
+        raise TaxonomyError(f"Name {name!r} must not contain '/'")
+    return name
+
+
+def _compile_node(
+    path: tuple[str, ...],
+    category: str,
+    node: Mapping[str, Any],
+    entries: list[BehaviorEntry],
+) -> None:
+    path = (*path, _check_name(category, path))
+    if not node:
+        raise TaxonomyError(f"Category {'/'.join(path)} is empty")
+
+    for name, value in node.items():
+        _check_name(name, path)
+        if _is_leaf_table(value):
+            entries.append(_compile_leaf_table(path, name, value))
+        elif isinstance(value, Mapping):
+            _compile_node(path, name, value, entries)
+        elif isinstance(value, str) and value in RECORD_TYPES:
+            entries.append(BehaviorEntry(path, name, cast(RecordType, value)))
+        else:
+            raise TaxonomyError(
+                f"{'/'.join(path)}/{name}: expected one of "
+                f"{sorted(RECORD_TYPES)}, got {value!r}"
+            )
+
+
+def _is_leaf_table(value: Any) -> bool:
+    return isinstance(value, Mapping) and isinstance(value.get("type"), str)
+
+
+def _compile_leaf_table(
+    path: tuple[str, ...], name: str, value: Mapping[str, Any]
+) -> BehaviorEntry:
+    """Compile a `{type = "EVENT", hotkey = "r"}` style behaviour."""
+    where = "/".join((*path, name))
+    unknown = set(value) - {"type", "hotkey"}
+    if unknown:
+        raise TaxonomyError(f"{where}: unknown fields {sorted(unknown)}")
+
+    record_type = value["type"]
+    if record_type not in RECORD_TYPES:
+        raise TaxonomyError(
+            f"{where}: expected one of {sorted(RECORD_TYPES)}, "
+            f"got {record_type!r}"
+        )
+
+    hotkey = value.get("hotkey")
+    if hotkey is not None and (
+        not isinstance(hotkey, str)
+        or not hotkey.strip()
+        or any(c in hotkey for c in "<> ")
+    ):
+        raise TaxonomyError(f"{where}: invalid hotkey {hotkey!r}")
+
+    return BehaviorEntry(path, name, cast(RecordType, record_type), hotkey)
+
+
+def _reject_duplicate_keys(pairs: list[tuple[str, Any]]) -> dict[str, Any]:
+    result: dict[str, Any] = {}
+    for key, value in pairs:
+        if key in result:
+            raise TaxonomyError(f"Duplicate key {key!r}")
+        result[key] = value
+    return result
+
+
+def load_taxonomy(path: str | Path) -> Taxonomy:
+    """Load and validate a taxonomy from a JSON or TOML file."""
+    path = Path(path)
+    match path.suffix.lower():
+        case ".json":
+            with open(path, encoding="utf-8") as file:
+                try:
+                    data = json.load(
+                        file, object_pairs_hook=_reject_duplicate_keys
+                    )
+                except json.JSONDecodeError as e:
+                    raise TaxonomyError(f"{path}: {e}") from e
+        case ".toml":
+            with open(path, "rb") as file:
+                try:
+                    data = tomllib.load(file)
+                except tomllib.TOMLDecodeError as e:
+                    raise TaxonomyError(f"{path}: {e}") from e
+        case _:
+            raise TaxonomyError(f"Unsupported taxonomy format: {path.suffix}")
+    return Taxonomy.from_mapping(data)
+
+
+def normalize_text(text: str) -> str:
+    """Case- and accent-insensitive form used for searching."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class BehaviorSearchIndex:
+    """Prefix/substring search over a taxonomy's behaviours.
+
+    Word prefixes are answered from a sorted word list; substring matches
+    are scanned, but only over the previous result set when the new query
+    extends the last one, which is the common case while typing.
+    """
+
+    def __init__(self, taxonomy: Taxonomy) -> None:
+        self.entries = taxonomy.entries
+        self._names = [normalize_text(e.name) for e in self.entries]
+        self._haystacks = [
+            f"{name} {normalize_text(' '.join(e.path))}"
+            for name, e in zip(self._names, self.entries)
+        ]
+        self._words = sorted(
+            (word, index)
+            for index, name in enumerate(self._names)
+            for word in set(name.split())
+        )
+        self._all = list(range(len(self.entries)))
+        self._last_query = ""
+        self._last_matches = self._all
+
+    def _word_prefix_matches(self, prefix: str) -> set[int]:
+        matches: set[int] = set()
+        start = bisect_left(self._words, (prefix, -1))
+        for word, index in self._words[start:]:
+            if not word.startswith(prefix):
+                break
+            matches.add(index)
+        return matches
+
+    def search(self, query: str) -> list[int]:
+        """Indices of matching entries, best matches first.
+
+        Every whitespace-separated term must occur in the behaviour name or
+        its categories. Names that start with the query rank first, then
+        names with a word starting with the first term, then the rest.
+        """
+        query = normalize_text(query).strip()
+        if not query:
+            self._last_query, self._last_matches = "", self._all
+            return self._all
+
+        candidates = (
+            self._last_matches
+            if self._last_query and query.startswith(self._last_query)
+            else self._all
+        )
+        terms = query.split()
+        matches = [
+            i
+            for i in candidates
+            if all(term in self._haystacks[i] for term in terms)
+        ]
+        self._last_query, self._last_matches = query, matches
+
+        word_prefixed = self._word_prefix_matches(terms[0])
+        return sorted(
+            matches,
+            key=lambda i: (
+                not self._names[i].startswith(query),
+                i not in word_prefixed,
+                i,
+            ),
+        )
@@ -0,0 +1,160 @@
+import queue
+import threading
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2.typing import MatLike
+
+from .reverse import fit_size
+from .roi import Box
+from .video_source import DecoderOptions, open_video_source
+
+# Frames are shrunk to fit this box before tracking; the animal is still
+# tens of pixels wide and the tracker's cost no longer depends on the
+# recording's resolution
+TRACK_MAX_WIDTH = 640
+TRACK_MAX_HEIGHT = 360
+# The tracker looks at every TRACK_STRIDE-th frame. The frames in between
+# are only grabbed, and their boxes are interpolated between keyframes
+TRACK_STRIDE = 3
+# Keyframes handed to the app at once
+TRACK_BATCH_KEYS = 10
+# Trackers drift, so propagation stops this long after the drawn box
+TRACK_MAX_SECONDS = 300.0
+
+# Frames and boxes found since the last batch; a NaN box marks where the
+# tracker lost the animal
+type TrackedKeys = tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]
+
+
+def create_tracker() -> cv2.Tracker:
+    """KCF when OpenCV was built with the contrib trackers, MIL otherwise."""
+    for name in ("TrackerKCF", "TrackerCSRT", "TrackerMIL"):
+        tracker_class = getattr(cv2, name, None)
+        if tracker_class is not None:
+            tracker: cv2.Tracker = tracker_class.create()
+            return tracker
+    raise RuntimeError("OpenCV was built without object trackers")
+
+
+class TrackPropagator:
+    """Follows one drawn box forwards through the video.
+
+    A worker thread with its own decoder starts at the drawn keyframe and
+    runs ahead of playback as fast as it can decode, until `end_frame`, the
+    end of the video or the tracker losing the animal. Every
+    `TRACK_STRIDE`-th frame becomes a keyframe; they are handed over in
+    batches on `keys` and the app merges them into the tag's track.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        options: DecoderOptions | None,
+        anchor_frame: int,
+        box: Box,
+        end_frame: int | None = None,
+    ) -> None:
+        self.path = path
+        self.options = options
+        self.anchor_frame = anchor_frame
+        self.box = box
+        self.end_frame = end_frame
+        self.keys: queue.Queue[TrackedKeys] = queue.Queue()
+        self.stopped = threading.Event()
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self._track, daemon=True)
+        self.thread.start()
+
+    def _track(self) -> None:
+        try:
+            source = open_video_source(self.path, self.options)
+        except OSError as e:
+            print(f"Error opening video for tracking: {e}")
+            self.finished.set()
+            return
+
+        with source:
+            size = fit_size(
+                source.width, source.height, TRACK_MAX_WIDTH, TRACK_MAX_HEIGHT
+            )
+            width, height = size
+
+            def shrink(frame: MatLike) -> MatLike:
+                if (frame.shape[1], frame.shape[0]) == size:
+                    return frame
+                return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+            end = self.anchor_frame + round(
+                TRACK_MAX_SECONDS * (source.fps or 25.0)
+            )
+            if self.end_frame is not None:
+                end = min(end, self.end_frame)
+            source.seek_frame(self.anchor_frame)
+            frame = source.read()
+            if frame is None:
+                self.finished.set()
+                return
+            left, top, right, bottom = self.box
+            tracker = create_tracker()
+            tracker.init(
+                shrink(frame),
+                (
+                    round(left * width),
+                    round(top * height),
+                    max(1, round((right - left) * width)),
+                    max(1, round((bottom - top) * height)),
+                ),
+            )
+
+            frames: list[int] = []
+            boxes: list[tuple[float, float, float, float]] = []
+            while not self.stopped.is_set():
+                for _ in range(TRACK_STRIDE - 1):
+                    if not source.grab():
+                        break
+                frame = source.read()
+                if frame is None or source.frame_index >= end:
+                    break
+                found, (x, y, w, h) = tracker.update(shrink(frame))
+                frames.append(source.frame_index)
+                if not found:
+                    boxes.append((np.nan,) * 4)
+                    break
+                boxes.append(
+                    (x / width, y / height, (x + w) / width, (y + h) / height)
+                )
+                if len(frames) >= TRACK_BATCH_KEYS:
+                    self._hand_over(frames, boxes)
+                    frames, boxes = [], []
+            if frames and not self.stopped.is_set():
+                self._hand_over(frames, boxes)
+        self.finished.set()
+
+    def _hand_over(
+        self,
+        frames: list[int],
+        boxes: list[tuple[float, float, float, float]],
+    ) -> None:
+        self.keys.put(
+            (
+                np.array(frames, np.int64),
+                np.clip(np.array(boxes, np.float32), 0.0, 1.0),
+            )
+        )
+
+    def next_keys(self) -> TrackedKeys | None:
+        try:
+            return self.keys.get_nowait()
+        except queue.Empty:
+            return None
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every keyframe found was handed over."""
+        return self.finished.is_set() and self.keys.empty()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join(timeout=1.0)
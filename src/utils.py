@@ -1,3 +1,13 @@
+from pathlib import Path
+
+
+def video_stem_path(video_dir: str | Path, video_name: str) -> Path:
+    """Path, without suffix, of files saved for a video: next to it, so
+    same-named videos in different subfolders do not share them."""
+    name = Path(video_name)
+    return Path(video_dir) / name.parent / name.stem
+
+
 def format_time(seconds: float) -> str:
     minutes = int(seconds // 60)
     seconds = int(seconds % 60)
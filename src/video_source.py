@@ -0,0 +1,241 @@
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Literal, Self
+
+import cv2
+from cv2.typing import MatLike
+
+from .config import get_app_data_dir
+from .media_index import IMAGE_EXTENSIONS
+
+type Backend = Literal["auto", "ffmpeg", "gstreamer", "msmf", "avfoundation"]
+
+BACKEND_API: dict[str, int] = {
+    "auto": cv2.CAP_ANY,
+    "ffmpeg": cv2.CAP_FFMPEG,
+    "gstreamer": cv2.CAP_GSTREAMER,
+    "msmf": cv2.CAP_MSMF,
+    "avfoundation": cv2.CAP_AVFOUNDATION,
+}
+
+# Extracted frames carry no timing, assume this rate unless told otherwise
+IMAGE_SEQUENCE_FPS = 25.0
+
+DECODER_OPTIONS_FILE = "decoder.json"
+
+
+@dataclass(frozen=True)
+class DecoderOptions:
+    backend: Backend = "auto"
+    # CAP_PROP_N_THREADS; None keeps the backend default
+    threads: int | None = None
+    hw_acceleration: bool = False
+    # Hand frames over in BGR and let PIL swap channels while it copies
+    # them, instead of a separate full-frame cv2.cvtColor pass
+    bgr_passthrough: bool = False
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "DecoderOptions":
+        known = {f.name for f in fields(cls)}
+        options = cls(**{k: v for k, v in data.items() if k in known})
+        if options.backend not in BACKEND_API:
+            raise ValueError(f"Unknown decoder backend: {options.backend}")
+        return options
+
+    def capture_params(self) -> list[int]:
+        params: list[int] = []
+        if self.threads is not None:
+            params += [cv2.CAP_PROP_N_THREADS, self.threads]
+        if self.hw_acceleration:
+            params += [
+                cv2.CAP_PROP_HW_ACCELERATION,
+                cv2.VIDEO_ACCELERATION_ANY,
+            ]
+        return params
+
+
+def load_decoder_options(path: str | Path | None = None) -> DecoderOptions:
+    """Options saved by `benchmarks.decode --write`, or the defaults."""
+    path = Path(path or get_app_data_dir() / DECODER_OPTIONS_FILE)
+    try:
+        with open(path, encoding="utf-8") as file:
+            return DecoderOptions.from_dict(json.load(file))
+    except FileNotFoundError:
+        return DecoderOptions()
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Ignoring decoder options in {path}: {e}")
+        return DecoderOptions()
+
+
+def save_decoder_options(
+    options: DecoderOptions, path: str | Path | None = None
+) -> Path:
+    path = Path(path or get_app_data_dir() / DECODER_OPTIONS_FILE)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(asdict(options), file, indent=2)
+    return path
+
+
+class VideoSource(ABC):
+    """Sequential frame reader with seeking.
+
+    After a successful read, `frame_index` and `position` describe the frame
+    that was just returned.
+    """
+
+    fps: float
+    frame_count: int
+    width: int
+    height: int
+
+    def __init__(self) -> None:
+        self.frame_index = -1
+        self.position = 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.fps if self.fps > 0 else 0.0
+
+    @abstractmethod
+    def grab(self) -> bool:
+        """Advance one frame without converting it."""
+
+    @abstractmethod
+    def retrieve(self) -> MatLike | None:
+        """Return the frame reached by the last `grab`."""
+
+    def read(self) -> MatLike | None:
+        return self.retrieve() if self.grab() else None
+
+    @abstractmethod
+    def seek_frame(self, index: int) -> None:
+        """Position the source so the next read returns frame `index`."""
+
+    def seek_time(self, seconds: float) -> None:
+        self.seek_frame(round(seconds * self.fps))
+
+    @abstractmethod
+    def release(self) -> None: ...
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.release()
+
+
+class CaptureSource(VideoSource):
+    """cv2.VideoCapture with an explicit backend and decoder options."""
+
+    def __init__(
+        self, path: str, options: DecoderOptions | None = None
+    ) -> None:
+        super().__init__()
+        self.options = options or DecoderOptions()
+        self.cap = cv2.VideoCapture(
+            path,
+            BACKEND_API[self.options.backend],
+            self.options.capture_params(),
+        )
+        if not self.cap.isOpened():
+            raise OSError(
+                f"Cannot open {path} with the {self.options.backend} backend"
+            )
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def grab(self) -> bool:
+        if not self.cap.grab():
+            return False
+        # POS_FRAMES already points past the frame that was just grabbed
+        self.frame_index = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+        self.position = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        return True
+
+    def retrieve(self) -> MatLike | None:
+        ret, frame = self.cap.retrieve()
+        return frame if ret else None
+
+    def seek_frame(self, index: int) -> None:
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, max(0, index))
+
+    def seek_time(self, seconds: float) -> None:
+        self.cap.set(cv2.CAP_PROP_POS_MSEC, max(0.0, seconds) * 1000)
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+def _natural_key(name: str) -> list[Any]:
+    return [
+        int(part) if part.isdigit() else part
+        for part in re.split(r"(\d+)", name)
+    ]
+
+
+def list_image_frames(directory: str | Path) -> list[str]:
+    """Image files in `directory`, in natural order (frame2 < frame10)."""
+    names = [
+        entry.name
+        for entry in os.scandir(directory)
+        if entry.is_file()
+        and not entry.name.startswith(".")
+        and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+    ]
+    return [os.path.join(directory, n) for n in sorted(names, key=_natural_key)]
+
+
+class ImageSequenceSource(VideoSource):
+    """A directory of extracted JPEG/PNG frames played back as a video."""
+
+    def __init__(self, directory: str, fps: float = IMAGE_SEQUENCE_FPS) -> None:
+        super().__init__()
+        self.files = list_image_frames(directory)
+        if not self.files:
+            raise OSError(f"No image frames in {directory}")
+        self.fps = fps
+        self.frame_count = len(self.files)
+        self.next_index = 0
+        first = cv2.imread(self.files[0])
+        if first is None:
+            raise OSError(f"Cannot read {self.files[0]}")
+        self.height, self.width = first.shape[:2]
+
+    def grab(self) -> bool:
+        if self.next_index >= self.frame_count:
+            return False
+        self.frame_index = self.next_index
+        self.position = self.frame_index / self.fps
+        self.next_index += 1
+        return True
+
+    def retrieve(self) -> MatLike | None:
+        if self.frame_index < 0:
+            return None
+        return cv2.imread(self.files[self.frame_index])
+
+    def seek_frame(self, index: int) -> None:
+        self.next_index = min(max(0, index), self.frame_count)
+
+    def release(self) -> None:
+        pass
+
+
+def open_video_source(
+    path: str, options: DecoderOptions | None = None
+) -> VideoSource:
+    if os.path.isdir(path):
+        return ImageSequenceSource(path)
+    return CaptureSource(path, options)
@@ -0,0 +1,142 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tkinter as tk
+import traceback
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from .config import get_app_data_dir
+
+# A callback this late means the UI visibly froze
+STALL_THRESHOLD_SECONDS = 0.25
+HEARTBEAT_INTERVAL_MS = 50
+PROFILE_WINDOW_SECONDS = 10.0
+# Frames kept per allocation by tracemalloc
+TRACEMALLOC_FRAMES = 25
+
+
+class StallWatchdog:
+    """Reports when the Tk event loop stops running callbacks on time.
+
+    A heartbeat scheduled with `root.after` measures how late it runs. A
+    monitor thread notices a heartbeat that is overdue while the stall is
+    still going on and logs what the main thread is executing.
+    """
+
+    def __init__(
+        self,
+        root: tk.Misc,
+        threshold: float = STALL_THRESHOLD_SECONDS,
+        interval_ms: int = HEARTBEAT_INTERVAL_MS,
+        context: Callable[[], str] | None = None,
+    ) -> None:
+        self.root = root
+        self.threshold = threshold
+        self.interval_ms = interval_ms
+        # Extra state worth logging with a stall, e.g. queue statistics
+        self.context = context
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.perf_counter()
+        self.reported_beat = 0.0
+        self.stalls = 0
+        self.worst_stall = 0.0
+        self.stopped = threading.Event()
+        self.monitor = threading.Thread(target=self._monitor, daemon=True)
+
+    def start(self) -> None:
+        self.last_beat = time.perf_counter()
+        self.root.after(self.interval_ms, self._beat)
+        self.monitor.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def _beat(self) -> None:
+        now = time.perf_counter()
+        lateness = now - self.last_beat - self.interval_ms / 1000
+        if lateness > self.threshold:
+            self.stalls += 1
+            self.worst_stall = max(self.worst_stall, lateness)
+            print(f"UI event loop stalled for {lateness * 1000:.0f} ms")
+        self.last_beat = now
+        if not self.stopped.is_set():
+            self.root.after(self.interval_ms, self._beat)
+
+    def _monitor(self) -> None:
+        overdue = self.interval_ms / 1000 + self.threshold
+        while not self.stopped.wait(self.threshold / 2):
+            beat = self.last_beat
+            if (
+                time.perf_counter() - beat < overdue
+                or beat == self.reported_beat
+            ):
+                continue
+            # Report each stall once, while it is happening
+            self.reported_beat = beat
+            frame = sys._current_frames().get(self.main_thread_id or 0)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            context = f"\n{self.context()}" if self.context else ""
+            print(
+                f"UI event loop blocked for over {self.threshold * 1000:.0f}"
+                f" ms, main thread at:\n{stack}{context}"
+            )
+
+
+class ProfileCapture:
+    """cProfile of the calling thread plus tracemalloc, dumped on stop."""
+
+    def __init__(self) -> None:
+        self.profile: cProfile.Profile | None = None
+        self.baseline: tracemalloc.Snapshot | None = None
+        self.started_tracing = False
+
+    @property
+    def active(self) -> bool:
+        return self.profile is not None
+
+    def start(self) -> None:
+        if self.profile is not None:
+            return
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.baseline = tracemalloc.take_snapshot()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        print("Profiling started")
+
+    def stop(self) -> Path | None:
+        """Write the capture to the diagnostics directory."""
+        if self.profile is None:
+            return None
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if self.started_tracing:
+            tracemalloc.stop()
+
+        directory = get_app_data_dir("diagnostics")
+        stem = time.strftime("%Y%m%d-%H%M%S")
+        profile_path = directory / f"profile-{stem}.prof"
+        self.profile.dump_stats(profile_path)
+
+        summary = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=summary)
+        stats.sort_stats("cumulative").print_stats(40)
+        summary.write("\nAllocations since the capture started:\n")
+        if self.baseline is not None:
+            for diff in snapshot.compare_to(self.baseline, "lineno")[:30]:
+                summary.write(f"{diff}\n")
+        with open(
+            directory / f"profile-{stem}.txt", "w", encoding="utf-8"
+        ) as f:
+            f.write(summary.getvalue())
+
+        self.profile = None
+        self.baseline = None
+        print(f"Profile saved to {profile_path}")
+        return profile_path
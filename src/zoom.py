@@ -0,0 +1,149 @@
+import math
+import tkinter as tk
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+TILE_SIZE = 256
+# PhotoImages kept across zoom levels, about 64 MB of tiles
+TILE_CACHE_TILES = 256
+# Pan and scroll redraws are coalesced to about one per display refresh
+PAN_INTERVAL_MS = 16
+
+type TileKey = tuple[float, int, int]
+
+
+class TileCache:
+    """Draws a zoomed frame on a canvas as tiles, only where it is visible.
+
+    Each zoom level is an image pyramid level that is never built in full:
+    a tile is resized from the matching region of the original frame the
+    first time it scrolls into view and then kept, so zooming back to a
+    level or panning over a paused frame reuses what was already drawn.
+    """
+
+    def __init__(
+        self, canvas: tk.Canvas, max_tiles: int = TILE_CACHE_TILES
+    ) -> None:
+        self.canvas = canvas
+        self.max_tiles = max_tiles
+        self.image: Image.Image | None = None
+        self.scale = 0.0
+        self.tiles: OrderedDict[TileKey, ImageTk.PhotoImage] = OrderedDict()
+        # Canvas items of the tiles drawn at the current scale
+        self.items: dict[TileKey, int] = {}
+
+    def clear(self) -> None:
+        self.canvas.delete("tile")
+        self.items.clear()
+        self.tiles.clear()
+        self.image = None
+        self.scale = 0.0
+
+    def show(self, image: Image.Image, scale: float) -> None:
+        """Display `image` at `scale`, keeping the view centred."""
+        if image is not self.image:
+            self.clear()
+            self.image = image
+        if scale != self.scale:
+            x_view, y_view = self.canvas.xview(), self.canvas.yview()
+            self.canvas.delete("tile")
+            self.items.clear()
+            self.scale = scale
+            width = math.ceil(image.width * scale)
+            height = math.ceil(image.height * scale)
+            self.canvas.configure(scrollregion=(0, 0, width, height))
+            self._recentre(x_view, y_view, width, height)
+        self.refresh()
+
+    def _recentre(
+        self,
+        x_view: tuple[float, float],
+        y_view: tuple[float, float],
+        width: int,
+        height: int,
+    ) -> None:
+        x_centre = (x_view[0] + x_view[1]) / 2
+        y_centre = (y_view[0] + y_view[1]) / 2
+        visible_x = self.canvas.winfo_width() / width
+        visible_y = self.canvas.winfo_height() / height
+        self.canvas.xview_moveto(max(0.0, x_centre - visible_x / 2))
+        self.canvas.yview_moveto(max(0.0, y_centre - visible_y / 2))
+
+    def refresh(self) -> None:
+        """Draw the tiles that are in view and not drawn yet."""
+        if self.image is None:
+            return
+        scale = self.scale
+        width = math.ceil(self.image.width * scale)
+        height = math.ceil(self.image.height * scale)
+        left = max(0, int(self.canvas.canvasx(0)) // TILE_SIZE)
+        top = max(0, int(self.canvas.canvasy(0)) // TILE_SIZE)
+        right = min(
+            math.ceil(width / TILE_SIZE),
+            math.ceil(
+                (self.canvas.canvasx(0) + self.canvas.winfo_width()) / TILE_SIZE
+            ),
+        )
+        bottom = min(
+            math.ceil(height / TILE_SIZE),
+            math.ceil(
+                (self.canvas.canvasy(0) + self.canvas.winfo_height())
+                / TILE_SIZE
+            ),
+        )
+
+        visible: set[TileKey] = set()
+        for ty in range(top, bottom):
+            for tx in range(left, right):
+                key = (scale, tx, ty)
+                visible.add(key)
+                if key in self.items:
+                    self.tiles.move_to_end(key)
+                    continue
+                photo = self._tile(key, width, height)
+                self.items[key] = self.canvas.create_image(
+                    tx * TILE_SIZE,
+                    ty * TILE_SIZE,
+                    anchor=tk.NW,
+                    image=photo,
+                    tags=("tile",),
+                )
+        self._evict(visible)
+
+    def _tile(
+        self, key: TileKey, width: int, height: int
+    ) -> ImageTk.PhotoImage:
+        photo = self.tiles.get(key)
+        if photo is not None:
+            self.tiles.move_to_end(key)
+            return photo
+        assert self.image is not None
+        scale, tx, ty = key
+        x0, y0 = tx * TILE_SIZE, ty * TILE_SIZE
+        x1, y1 = min(width, x0 + TILE_SIZE), min(height, y0 + TILE_SIZE)
+        # Resize just the source region under this tile
+        tile = self.image.resize(
+            (x1 - x0, y1 - y0),
+            Image.Resampling.LANCZOS,
+            box=(
+                x0 / scale,
+                y0 / scale,
+                min(self.image.width, x1 / scale),
+                min(self.image.height, y1 / scale),
+            ),
+        )
+        photo = ImageTk.PhotoImage(tile)
+        self.tiles[key] = photo
+        return photo
+
+    def _evict(self, visible: set[TileKey]) -> None:
+        for key in list(self.tiles):
+            if len(self.tiles) <= self.max_tiles:
+                break
+            if key in visible:
+                continue
+            del self.tiles[key]
+            item = self.items.pop(key, None)
+            if item is not None:
+                self.canvas.delete(item)
@@ -0,0 +1,28 @@
+from collections.abc import Callable
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+VIDEO_FPS = 25.0
+
+
+@pytest.fixture
+def make_video(tmp_path: Path) -> Callable[..., Path]:
+    """Writes an MJPG video whose frame i is filled with grey level i."""
+
+    def make(
+        frames: int, size: tuple[int, int] = (64, 48), name: str = "video.avi"
+    ) -> Path:
+        path = tmp_path / name
+        width, height = size
+        writer = cv2.VideoWriter(
+            str(path), cv2.VideoWriter.fourcc(*"MJPG"), VIDEO_FPS, size
+        )
+        for index in range(frames):
+            writer.write(np.full((height, width, 3), index % 256, np.uint8))
+        writer.release()
+        return path
+
+    return make
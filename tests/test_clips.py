@@ -0,0 +1,82 @@
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import cv2
+import pytest
+
+from src.clips import (
+    PENDING_FRAMES,
+    ClipReport,
+    ClipSpec,
+    encode_clips,
+    export_clips,
+)
+from src.media_index import scan_media
+from src.record import BehaviorRecord
+
+from .conftest import VIDEO_FPS
+
+
+class CrashingWriter:
+    fourcc = staticmethod(cv2.VideoWriter.fourcc)
+
+    def __init__(self, *args: Any) -> None:
+        pass
+
+    def isOpened(self) -> bool:
+        return True
+
+    def write(self, frame: Any) -> None:
+        raise RuntimeError("encoder crashed")
+
+    def release(self) -> None:
+        pass
+
+
+def test_unexpected_writer_error_fails_the_clip_without_blocking(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    make_video: Callable[..., Path],
+) -> None:
+    video = make_video(4 * PENDING_FRAMES)
+    monkeypatch.setattr(cv2, "VideoWriter", CrashingWriter)
+    clip = ClipSpec(0.0, 3 * PENDING_FRAMES / VIDEO_FPS, tmp_path / "clip.mp4")
+
+    reports: list[ClipReport] = []
+    thread = threading.Thread(
+        target=lambda: reports.append(encode_clips(str(video), [clip])),
+        daemon=True,
+    )
+    thread.start()
+    thread.join(timeout=30)
+
+    assert not thread.is_alive(), "encode_clips blocked on a dead writer"
+    assert reports[0].failed == [clip]
+    assert reports[0].written == []
+
+
+def test_clip_directory_is_left_out_of_the_video_scan(
+    tmp_path: Path, make_video: Callable[..., Path]
+) -> None:
+    video = make_video(100)
+    record = BehaviorRecord(
+        session=1,
+        role="madre",
+        behaviour="Desplazamiento",
+        parent_behaviour="Individuales",
+        start_time=1.0,
+        duration=1.0,
+        record_type="STATE",
+        tag="A",
+        group_type="individual",
+        sex="hembra",
+        end_time=2.0,
+    )
+    report = export_clips(
+        {str(video): [record]}, tmp_path / "clips", frame_accurate=True
+    )
+
+    assert len(report.written) == 1
+    assert [s.path for s in scan_media(tmp_path)] == [str(video)]
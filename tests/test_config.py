@@ -0,0 +1,50 @@
+from typing import Any
+
+import pytest
+
+from src.app import PROFILE_HOTKEY, TRANSPORT_KEYS
+from src.config import BEHAVIOR_DATA, DEFAULT_TAXONOMY, get_recursive_parents
+from src.taxonomy import Taxonomy
+
+
+def test_default_taxonomy_binds_frequent_events() -> None:
+    hotkeys = DEFAULT_TAXONOMY.hotkeys
+
+    assert hotkeys["r"].key == "Individuales/Respiración"
+    assert all(entry.record_type == "EVENT" for entry in hotkeys.values())
+    assert not set(hotkeys) & {*TRANSPORT_KEYS, PROFILE_HOTKEY}
+
+
+def test_recursive_parents_reuses_the_default_taxonomy(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    compiled = []
+    from_mapping = Taxonomy.from_mapping
+
+    def counting(mapping: dict[str, Any]) -> Taxonomy:
+        compiled.append(mapping)
+        return from_mapping(mapping)
+
+    monkeypatch.setattr(Taxonomy, "from_mapping", counting)
+
+    assert get_recursive_parents("Respiración", BEHAVIOR_DATA)
+    assert compiled == []
+
+
+def test_recursive_parents_follow_changes_to_a_mapping() -> None:
+    data: dict[str, Any] = {"Grupales": {"Juego": {"Salto": "EVENT"}}}
+    assert get_recursive_parents("Salto", data) == ["Juego", "Grupales"]
+
+    data["Grupales"]["Caza"] = data["Grupales"].pop("Juego")
+    assert get_recursive_parents("Salto", data) == ["Caza", "Grupales"]
+
+
+def test_recursive_parents_of_a_category() -> None:
+    data = {"Grupales": {"Juego": {"Salto": "EVENT"}}}
+
+    assert get_recursive_parents("Juego", data) == ["Grupales"]
+    assert get_recursive_parents("Grupales", data) == []
+
+
+def test_recursive_parents_of_malformed_mapping_are_empty() -> None:
+    assert get_recursive_parents("Salto", {"Grupales": {"Salto": 3}}) == []
@@ -0,0 +1,112 @@
+import queue
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from src.frame_processor import (
+    CommandQueueElement,
+    FrameProcessor,
+    FrameQueueElement,
+)
+from src.video_source import open_video_source
+
+
+@pytest.fixture
+def processor(make_video: Callable[..., Path]) -> Iterator[FrameProcessor]:
+    """A paused processor driven from the test thread, not started."""
+    path = str(make_video(20, (320, 180)))
+    frames: queue.Queue[FrameQueueElement] = queue.Queue()
+    commands: queue.Queue[CommandQueueElement] = queue.Queue()
+    processor = FrameProcessor(path, frames, commands, 80, 45)
+    processor.source = open_video_source(path)
+    processor.total_frames = processor.source.frame_count
+    processor.fps = processor.source.fps
+    yield processor
+    processor.source.release()
+
+
+def shown(processor: FrameProcessor) -> list[tuple[int, int]]:
+    sizes = []
+    while not processor.frame_queue.empty():
+        item = processor.frame_queue.get_nowait()
+        sizes.append((item["data"].shape[1], item["data"].shape[0]))
+    return sizes
+
+
+def test_zoom_redraws_only_when_the_shown_frame_is_too_small(
+    processor: FrameProcessor,
+) -> None:
+    processor.jog(5)
+    index = processor.last_index
+    assert shown(processor) == [(80, 45)]
+
+    processor.set_zoom(0.5)
+    processor.set_zoom(1.0)
+    assert shown(processor) == []
+
+    processor.set_zoom(2.0)
+    assert shown(processor) == [(160, 90)]
+    processor.set_zoom(1.5)
+    processor.set_zoom(2.0)
+    assert shown(processor) == []
+    assert processor.last_index == index
+
+
+def test_seek_bursts_are_coalesced_in_order(processor: FrameProcessor) -> None:
+    commands: list[CommandQueueElement] = [
+        {"type": "seek", "position": 0.1},
+        {"type": "pause"},
+        {"type": "seek", "position": 0.2},
+        {"type": "speed", "value": 2.0},
+        {"type": "seek", "position": 0.3},
+    ]
+    for command in commands:
+        processor.command_queue.put(command)
+
+    assert processor.pending_commands() == [
+        {"type": "pause"},
+        {"type": "speed", "value": 2.0},
+        {"type": "seek", "position": 0.3},
+    ]
+    assert processor.pending_commands() == []
+
+
+def test_paused_seek_shows_the_target_frame_only(
+    processor: FrameProcessor,
+) -> None:
+    processor.paused = True
+    processor.jog(1)
+    shown(processor)
+    for position in (0.2, 0.4):
+        processor.command_queue.put({"type": "seek", "position": position})
+    for command in processor.pending_commands():
+        processor.handle_command(command)
+
+    assert len(shown(processor)) == 1
+    assert processor.last_index == round(0.4 * processor.fps)
+
+
+def test_stopping_the_pipeline_resyncs_after_the_last_frame_shown(
+    processor: FrameProcessor,
+) -> None:
+    assert processor.source is not None
+    with ThreadPoolExecutor(2) as pool:
+        processor.pool = pool
+        processor.start_pipeline()
+        pipeline = processor.pipeline
+        assert pipeline is not None
+        for _ in range(3):
+            while (item := pipeline.next_frame()) is None:
+                time.sleep(0.001)
+            processor.emit_frame(*item, prepared=True)
+        # Let the decoder read ahead of what was shown
+        while not pipeline.frames.full() and not pipeline.finished.is_set():
+            time.sleep(0.001)
+        processor.stop_pipeline()
+
+    assert processor.last_index == 2
+    assert processor.source.read() is not None
+    assert processor.source.frame_index == 3
@@ -0,0 +1,92 @@
+import queue
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.frame_processor import FrameQueueElement
+from src.frame_queue import DropPolicy, FrameQueue
+
+FRAME_BYTES = 100
+
+
+def frame(index: int) -> FrameQueueElement:
+    return {
+        "type": "frame",
+        "data": np.zeros(FRAME_BYTES, np.uint8),
+        "position": index / 25,
+        "frame_index": index,
+    }
+
+
+def indices(frames: FrameQueue) -> list[int | None]:
+    items = []
+    while not frames.empty():
+        items.append(frames.get_nowait().get("frame_index"))
+    return items
+
+
+@pytest.mark.parametrize(
+    ("policy", "kept"),
+    [("drop_newest", [0, 1, 2]), ("drop_oldest", [2, 3, 4])],
+)
+def test_drop_policies(policy: DropPolicy, kept: list[int]) -> None:
+    frames = FrameQueue(3 * FRAME_BYTES, policy)
+    for index in range(5):
+        frames.put(frame(index))
+
+    stats = frames.stats()
+    assert stats.dropped_frames == 2
+    assert stats.queued_bytes == stats.peak_bytes == 3 * FRAME_BYTES
+    assert indices(frames) == kept
+    assert frames.stats().queued_bytes == 0
+
+
+def test_control_messages_are_never_dropped_or_counted() -> None:
+    frames = FrameQueue(FRAME_BYTES, "drop_oldest")
+    frames.put({"type": "metadata"})
+    frames.put(frame(0))
+    frames.put({"type": "eof"})
+    frames.put(frame(1))
+
+    assert frames.stats().queued_bytes == FRAME_BYTES
+    assert indices(frames) == [None, None, 1]
+
+
+def test_oversized_frame_is_accepted_by_an_empty_queue() -> None:
+    frames = FrameQueue(FRAME_BYTES // 2, "drop_newest")
+    frames.put(frame(0))
+    frames.put(frame(1))
+
+    assert indices(frames) == [0]
+
+
+def test_blocking_producer_waits_for_room() -> None:
+    frames = FrameQueue(FRAME_BYTES, "block")
+    frames.put(frame(0))
+    with pytest.raises(queue.Full):
+        frames.put(frame(1), block=False)
+
+    producer = threading.Thread(target=frames.put, args=(frame(1),))
+    producer.start()
+    time.sleep(0.1)
+    assert producer.is_alive()
+    assert frames.get_nowait()["frame_index"] == 0
+    producer.join(timeout=1)
+
+    assert not producer.is_alive()
+    assert indices(frames) == [1]
+    assert frames.stats().blocked_seconds >= 0.05
+
+
+def test_discard_frames_keeps_control_messages() -> None:
+    frames = FrameQueue(10 * FRAME_BYTES)
+    frames.put(frame(0))
+    frames.put({"type": "eof"})
+    frames.put(frame(1))
+
+    assert frames.discard_frames() == 2
+    assert frames.stats().queued_bytes == 0
+    assert frames.get_nowait()["type"] == "eof"
+    assert frames.empty()
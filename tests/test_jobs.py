@@ -0,0 +1,149 @@
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from src.jobs import JobContext, JobKind, JobScheduler, video_priority
+from src.media_index import FileSignature
+
+STEPS = 40
+
+
+class Recorder:
+    """A job kind that checkpoints every step and logs where each run
+    started."""
+
+    def __init__(self, step_seconds: float = 0.0) -> None:
+        self.step_seconds = step_seconds
+        self.lock = threading.Lock()
+        self.starts: list[tuple[str, int]] = []
+        self.finished: set[str] = set()
+        self.running = 0
+        self.peak_running = 0
+
+    def run(self, signature: FileSignature, context: JobContext) -> None:
+        first = int(context.progress.get("step", 0))
+        with self.lock:
+            self.starts.append((Path(signature.path).name, first))
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+        try:
+            for step in range(first, STEPS):
+                time.sleep(self.step_seconds)
+                context.checkpoint(step=step + 1)
+        finally:
+            with self.lock:
+                self.running -= 1
+        with self.lock:
+            self.finished.add(signature.digest)
+
+    def kind(self) -> JobKind:
+        return JobKind(
+            "test",
+            self.run,
+            lambda signature: signature.digest in self.finished,
+        )
+
+
+@pytest.fixture
+def videos(tmp_path: Path) -> Callable[[int], list[FileSignature]]:
+    def make(count: int) -> list[FileSignature]:
+        signatures = []
+        for index in range(count):
+            path = tmp_path / f"{index}.mp4"
+            path.write_bytes(b"x")
+            signatures.append(FileSignature.of(path))
+        return signatures
+
+    return make
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_video_priority_wraps_around_the_playlist() -> None:
+    assert video_priority(3, 3, 7) == (0, 0)
+    assert video_priority(1, 3, 7) == (1, 2)
+    assert video_priority(0, 3, 7) == (2, 3)
+    assert video_priority(6, 0, 7) == (1, 1)
+
+
+def test_current_video_and_neighbours_go_first(
+    tmp_path: Path, videos: Callable[[int], list[FileSignature]]
+) -> None:
+    recorder = Recorder()
+    scheduler = JobScheduler(1, state_path=tmp_path / "state.json")
+    scheduler.register(recorder.kind())
+    scheduler.schedule("test", videos(7), 3)
+    wait_until(lambda: not scheduler.pending())
+    scheduler.shutdown()
+
+    assert [name for name, _ in recorder.starts] == [
+        f"{index}.mp4" for index in (3, 2, 4, 1, 5, 0, 6)
+    ]
+
+
+def test_preempted_job_resumes_from_its_checkpoint(
+    tmp_path: Path, videos: Callable[[int], list[FileSignature]]
+) -> None:
+    recorder = Recorder(step_seconds=0.005)
+    scheduler = JobScheduler(1, state_path=tmp_path / "state.json")
+    scheduler.register(recorder.kind())
+    playlist = videos(2)
+    scheduler.schedule("test", playlist, 0)
+    wait_until(lambda: recorder.running == 1)
+    time.sleep(0.05)
+    scheduler.focus(playlist, 1)
+    wait_until(lambda: not scheduler.pending())
+    scheduler.shutdown()
+
+    (first, _), (second, _), (resumed, step) = recorder.starts
+    assert (first, second, resumed) == ("0.mp4", "1.mp4", "0.mp4")
+    assert 0 < step < STEPS
+    assert len(recorder.finished) == 2
+
+
+def test_unfinished_jobs_continue_in_the_next_session(
+    tmp_path: Path, videos: Callable[[int], list[FileSignature]]
+) -> None:
+    state = tmp_path / "state.json"
+    first = Recorder(step_seconds=0.005)
+    scheduler = JobScheduler(1, state_path=state)
+    scheduler.register(first.kind())
+    scheduler.schedule("test", videos(1), 0)
+    wait_until(lambda: first.running == 1)
+    time.sleep(0.05)
+    scheduler.shutdown()
+    wait_until(lambda: first.running == 0)
+
+    second = Recorder()
+    scheduler = JobScheduler(1, state_path=state)
+    scheduler.register(second.kind())
+    wait_until(lambda: not scheduler.pending())
+    scheduler.shutdown()
+
+    [(name, step)] = second.starts
+    assert name == "0.mp4" and 0 < step < STEPS
+    assert len(second.finished) == 1
+
+
+def test_throttled_scheduler_runs_one_job_at_a_time(
+    tmp_path: Path, videos: Callable[[int], list[FileSignature]]
+) -> None:
+    recorder = Recorder(step_seconds=0.001)
+    scheduler = JobScheduler(
+        3, throttle=lambda: True, state_path=tmp_path / "state.json"
+    )
+    scheduler.register(recorder.kind())
+    scheduler.schedule("test", videos(4), 0)
+    wait_until(lambda: not scheduler.pending())
+    scheduler.shutdown()
+
+    assert recorder.peak_running == 1
+    assert len(recorder.finished) == 4
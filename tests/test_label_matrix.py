@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import numpy as np
+
+from src.label_matrix import (
+    MATRIX_CHUNK_BYTES,
+    chunk_frames_for,
+    fill_label_matrix,
+    video_csv_files,
+)
+
+
+def test_chunks_fit_the_byte_budget() -> None:
+    for columns in (1, 80, 5000):
+        frames = chunk_frames_for(columns)
+        assert frames * columns * 9 <= MATRIX_CHUNK_BYTES
+    assert chunk_frames_for(80) > chunk_frames_for(5000)
+
+
+def test_chunked_fill_matches_one_pass() -> None:
+    columns = 11
+    # (column, first frame, end frame)
+    spans = np.array([[0, 0, 5], [3, 4, 40], [10, 17, 18], [3, 30, 50]])
+    whole = np.zeros((50, 2), dtype=np.uint8)
+    chunked = np.zeros_like(whole)
+    fill_label_matrix(whole, spans, columns, chunk_frames=50)
+    fill_label_matrix(chunked, spans, columns, chunk_frames=7)
+
+    assert np.array_equal(whole, chunked)
+    dense = np.unpackbits(whole, axis=1, count=columns).astype(bool)
+    assert dense[:5, 0].all() and not dense[5:, 0].any()
+    assert dense[4:50, 3].all() and not dense[:4, 3].any()
+    assert dense[:, 10].nonzero()[0].tolist() == [17]
+
+
+def test_csvs_of_a_video_named_like_a_copy_are_left_out(
+    tmp_path: Path,
+) -> None:
+    for name in ("a.mp4", "a_1.mp4", "a.csv", "a_1.csv", "a_2.csv"):
+        (tmp_path / name).touch()
+
+    assert video_csv_files(tmp_path, "a.mp4") == [
+        tmp_path / "a.csv",
+        tmp_path / "a_2.csv",
+    ]
+    assert video_csv_files(tmp_path, "a_1.mp4") == [tmp_path / "a_1.csv"]
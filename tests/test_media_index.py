@@ -0,0 +1,17 @@
+from pathlib import Path
+
+from src.media_index import mark_export_directory, scan_media
+
+
+def test_export_directories_are_not_scanned(tmp_path: Path) -> None:
+    (tmp_path / "dia1").mkdir()
+    (tmp_path / "dia1" / "clip.mp4").touch()
+    exports = mark_export_directory(tmp_path / "capturas")
+    (exports / "clip").mkdir()
+    (exports / "clip.mp4").touch()
+    for index in range(12):
+        (exports / "clip" / f"{index:04d}.jpg").touch()
+
+    assert [Path(s.path) for s in scan_media(tmp_path)] == [
+        tmp_path / "dia1" / "clip.mp4"
+    ]
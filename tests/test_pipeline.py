@@ -0,0 +1,59 @@
+import random
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+from cv2.typing import MatLike
+
+from src.pipeline import FramePipeline
+from src.video_source import VideoSource, open_video_source
+
+
+@pytest.fixture
+def source(make_video: Callable[..., Path]) -> Iterator[VideoSource]:
+    with open_video_source(str(make_video(30))) as source:
+        yield source
+
+
+def drain(pipeline: FramePipeline) -> list[tuple[int, int]]:
+    """(index, grey level) of every frame until the end of the video."""
+    shown = []
+    deadline = time.monotonic() + 10
+    while not pipeline.exhausted:
+        assert time.monotonic() < deadline, "pipeline stalled"
+        item = pipeline.next_frame()
+        if item is None:
+            time.sleep(0.001)
+            continue
+        frame, index, _ = item
+        shown.append((index, int(frame[0, 0, 0])))
+    return shown
+
+
+def test_frames_come_out_in_decode_order(source: VideoSource) -> None:
+    def prepare(frame: MatLike, index: int) -> MatLike:
+        # Workers finish out of order
+        time.sleep(random.uniform(0, 0.005))
+        return frame
+
+    with ThreadPoolExecutor(4) as pool:
+        shown = drain(FramePipeline(source, pool, prepare, 0))
+
+    assert [index for index, _ in shown] == list(range(30))
+    # Each frame is the one decoded at its index
+    assert all(abs(level - index) <= 2 for index, level in shown)
+
+
+def test_idle_stretches_are_skipped(source: VideoSource) -> None:
+    targets = np.arange(30, dtype=np.int64)
+    targets[5:20] = 20
+    with ThreadPoolExecutor(2) as pool:
+        pipeline = FramePipeline(
+            source, pool, lambda frame, _: frame, 0, targets
+        )
+        shown = drain(pipeline)
+
+    assert [index for index, _ in shown] == [*range(5), *range(20, 30)]
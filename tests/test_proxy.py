@@ -0,0 +1,45 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from src.proxy import proxy_dir, prune_proxies
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def app_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("BEHAVIOUR_LABELING_HOME", str(tmp_path / "home"))
+
+
+def add_proxy(digest: str, used: float, size: int = MB) -> None:
+    """A finished proxy and its sidecar, last played at `used`."""
+    for name, data in (
+        (f"{digest}.mp4", os.urandom(size)),
+        (f"{digest}.json", b'{"source": "x"}'),
+    ):
+        path = proxy_dir() / name
+        path.write_bytes(data)
+        os.utime(path, (used, used))
+
+
+def test_least_recently_used_proxies_go_first() -> None:
+    add_proxy("old", 1000)
+    add_proxy("kept", 1500)
+    add_proxy("mid", 2000)
+    add_proxy("new", 3000)
+
+    removed = prune_proxies(2 * MB + 1024, keep={"kept"})
+
+    assert removed == 2
+    left = {path.name.split(".", 1)[0] for path in proxy_dir().iterdir()}
+    assert left == {"kept", "new"}
+
+
+def test_nothing_is_pruned_under_budget() -> None:
+    add_proxy("a", 1000)
+    add_proxy("b", 2000)
+
+    assert prune_proxies(10 * MB) == 0
+    assert len(list(proxy_dir().iterdir())) == 4
@@ -0,0 +1,86 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from src.media_index import FileSignature
+from src.readahead import ReadAheadCache, cache_dir, find_local_copy
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def app_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("BEHAVIOUR_LABELING_HOME", str(tmp_path / "home"))
+
+
+def share_file(tmp_path: Path, name: str, size: int = MB) -> FileSignature:
+    """A file on the stand-in for a network share."""
+    path = tmp_path / "share" / name
+    path.parent.mkdir(exist_ok=True)
+    path.write_bytes(os.urandom(size))
+    return FileSignature.of(path)
+
+
+def wait_idle(cache: ReadAheadCache, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while cache.pending():
+        assert time.monotonic() < deadline, "read-ahead never finished"
+        time.sleep(0.01)
+
+
+def test_throttled_copy_appears_only_once_complete(tmp_path: Path) -> None:
+    video = share_file(tmp_path, "a.mp4")
+    # About half a second at this rate
+    cache = ReadAheadCache(chunk_bytes=64 * 1024, max_rate=2 * MB)
+    cache.request([video])
+    time.sleep(0.2)
+
+    assert cache.pending()
+    assert find_local_copy(video) is None
+    assert cache.get(video) is None
+    wait_idle(cache)
+    copy = cache.get(video)
+    assert copy is not None
+    assert copy.read_bytes() == Path(video.path).read_bytes()
+    cache.shutdown()
+
+
+def test_copy_dropped_from_the_request_is_cancelled(tmp_path: Path) -> None:
+    slow, other = share_file(tmp_path, "a.mp4"), share_file(tmp_path, "b.mp4")
+    cache = ReadAheadCache(chunk_bytes=64 * 1024, max_rate=MB)
+    cache.request([slow])
+    time.sleep(0.2)
+    cache.request([other])
+    wait_idle(cache)
+
+    assert find_local_copy(slow) is None
+    assert find_local_copy(other) is not None
+    # No partial copy is left behind
+    assert [p.suffix for p in cache_dir().iterdir()] == [".mp4"]
+    cache.shutdown()
+
+
+def test_eviction_spares_the_playing_and_requested_copies(
+    tmp_path: Path,
+) -> None:
+    playing, ahead, old, new = (
+        share_file(tmp_path, f"{name}.mp4") for name in "abcd"
+    )
+    cache = ReadAheadCache(max_bytes=3 * MB)
+    cache.request([playing, ahead, old])
+    wait_idle(cache)
+    copy = cache.get(playing)
+    assert copy is not None
+    # Played for long enough that every other copy is more recent
+    os.utime(copy, (0, 0))
+
+    cache.request([new, ahead])
+    wait_idle(cache)
+
+    assert find_local_copy(playing) is not None
+    assert find_local_copy(ahead) is not None
+    assert find_local_copy(old) is None
+    assert find_local_copy(new) is not None
+    cache.shutdown()
@@ -0,0 +1,144 @@
+import math
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from src.record import BehaviorRecord, save_as_csv
+from src.reliability import (
+    compare_files,
+    compare_records,
+    pair_csv_files,
+    video_csv_files,
+    video_durations,
+)
+from src.types import RecordType
+
+
+def record(
+    parent: str,
+    behaviour: str,
+    start: float,
+    record_type: RecordType = "EVENT",
+    duration: float = 0.0,
+) -> BehaviorRecord:
+    return BehaviorRecord(
+        session=1,
+        role="madre",
+        behaviour=behaviour,
+        parent_behaviour=parent,
+        start_time=start,
+        duration=duration,
+        record_type=record_type,
+        tag="A",
+        group_type="individual",
+        sex="hembra",
+    )
+
+
+def test_same_name_in_two_categories_is_kept_apart() -> None:
+    first = [
+        record("Individuales", "Nado uno sobre otro", 10.0),
+        record("Grupales", "Nado uno sobre otro", 20.0, "STATE", 10.0),
+    ]
+    second = [
+        record("Individuales", "Nado uno sobre otro", 10.2),
+        record("Grupales", "Nado uno sobre otro", 20.0, "STATE", 10.0),
+    ]
+    table = compare_records(first, second, duration=60.0)
+
+    assert table.behaviours == (
+        ("Grupales", "Nado uno sobre otro"),
+        ("Individuales", "Nado uno sobre otro"),
+    )
+    # The event is matched, the state compared bin by bin
+    assert table.counts[1, 0].tolist() == [1, 0]
+    assert table.counts[0, 0].tolist() == [10, 0]
+    assert all(math.isclose(k, 1.0) for k in table.kappa().values())
+
+
+def test_clustered_breaths_are_all_matched() -> None:
+    # A burst of breaths, logged a little late by the second observer
+    first = [record("Individuales", "Respiración", t) for t in (5.0, 5.6)]
+    second = [record("Individuales", "Respiración", t) for t in (5.5, 6.0)]
+    table = compare_records(first, second, duration=60.0)
+
+    both, only_first = table.counts[0, 0].tolist()
+    assert (both, only_first) == (2, 0)
+
+
+def test_events_beyond_the_tolerance_do_not_match() -> None:
+    first = [record("Individuales", "Respiración", t) for t in (5.0, 30.0)]
+    second = [record("Individuales", "Respiración", t) for t in (6.5, 30.9)]
+    table = compare_records(first, second, duration=60.0)
+
+    assert table.counts[0].tolist() == [[1, 1], [1, 27]]
+
+
+def write_csv(path: Path, records: list[BehaviorRecord]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    save_as_csv([path.stem + ".mp4"], 0, str(path.parent), records)
+
+
+def test_saves_of_a_video_are_merged_and_paired_by_relative_path(
+    tmp_path: Path,
+) -> None:
+    first, second = tmp_path / "a", tmp_path / "b"
+    breath = [record("Individuales", "Respiración", 5.0)]
+    # The first observer saved twice, the second once; both labelled a
+    # video of the same name in another folder
+    write_csv(first / "dia1" / "clip.csv", breath)
+    write_csv(first / "dia1" / "clip_1.csv", breath)
+    write_csv(first / "dia2" / "clip.csv", breath)
+    write_csv(second / "dia1" / "clip.csv", breath * 2)
+    write_csv(second / "dia2" / "clip.csv", breath)
+
+    videos = pair_csv_files([first, second])
+
+    assert sorted(videos) == ["dia1/clip", "dia2/clip"]
+    assert [len(files) for files in videos["dia1/clip"]] == [2, 1]
+    table = compare_files(videos["dia1/clip"])[0, 1]
+    assert table.counts[0, 0].tolist() == [2, 0]
+
+
+def test_video_named_like_a_later_save_keeps_its_own_csv(
+    tmp_path: Path,
+) -> None:
+    for name in ("clip.mp4", "clip_1.mp4", "clip.csv", "clip_1.csv"):
+        (tmp_path / name).touch()
+    (tmp_path / "clip_2.csv").touch()
+
+    assert video_csv_files(tmp_path) == {
+        "clip": [tmp_path / "clip.csv", tmp_path / "clip_2.csv"],
+        "clip_1": [tmp_path / "clip_1.csv"],
+    }
+
+
+def test_video_length_counts_towards_agreeing_on_nothing(
+    tmp_path: Path, make_video: Callable[..., Path]
+) -> None:
+    make_video(250, name="clip.avi")
+    write_csv(tmp_path / "clip.csv", [record("Individuales", "Respiración", 1)])
+    csv_files = [[tmp_path / "clip.csv"]] * 2
+    durations = video_durations(tmp_path, ["clip"])
+
+    assert durations == {"clip": pytest.approx(10.0)}
+    short = compare_files(csv_files)[0, 1]
+    full = compare_files(csv_files, duration=durations["clip"])[0, 1]
+    # Windows of twice the tolerance: one up to the record, five in the video
+    assert short.counts[0, 1, 1] == 0
+    assert full.counts[0, 1, 1] == 4
+
+
+def test_csvs_are_saved_next_to_their_video(tmp_path: Path) -> None:
+    breath = [record("Individuales", "Respiración", 5.0)]
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    for _ in range(2):
+        save_as_csv(["a/clip.mp4", "b/clip.mp4"], 0, str(tmp_path), breath)
+    save_as_csv(["a/clip.mp4", "b/clip.mp4"], 1, str(tmp_path), breath)
+
+    assert video_csv_files(tmp_path) == {
+        "a/clip": [tmp_path / "a" / "clip.csv", tmp_path / "a" / "clip_1.csv"],
+        "b/clip": [tmp_path / "b" / "clip.csv"],
+    }
@@ -0,0 +1,63 @@
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from src import reverse
+from src.reverse import ReversePlayer
+from src.video_source import DecoderOptions, VideoSource, open_video_source
+
+WIDTH, HEIGHT = 64, 48
+
+
+def overshooting(frames: int) -> Callable[..., VideoSource]:
+    """open_video_source whose seeks land `frames` past the target."""
+
+    def open_source(path: str, options: DecoderOptions) -> VideoSource:
+        source = open_video_source(path, options)
+        seek_frame = source.seek_frame
+
+        def seek(index: int) -> None:
+            seek_frame(min(source.frame_count - 1, index + frames))
+
+        source.seek_frame = seek  # type: ignore[method-assign]
+        return source
+
+    return open_source
+
+
+def play_back(player: ReversePlayer, timeout: float = 10.0) -> list[int]:
+    indices = []
+    deadline = time.monotonic() + timeout
+    while not player.exhausted:
+        assert time.monotonic() < deadline, "reverse playback stalled"
+        item = player.next_frame()
+        if item is None:
+            time.sleep(0.01)
+        else:
+            indices.append(item[1])
+    return indices
+
+
+def test_inaccurate_seeks_do_not_end_reverse_playback(
+    make_video: Callable[..., Path], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = make_video(20, (WIDTH, HEIGHT))
+    monkeypatch.setattr(reverse, "open_video_source", overshooting(6))
+    # Chunks of four frames, so every seek lands past its chunk
+    player = ReversePlayer(
+        str(path),
+        DecoderOptions(),
+        20,
+        WIDTH,
+        HEIGHT,
+        budget_bytes=4 * 3 * WIDTH * HEIGHT * 3,
+    )
+    try:
+        indices = play_back(player)
+    finally:
+        player.stop()
+
+    # Frames before the first keyframe the seeks can reach stay unseen
+    assert indices == list(range(19, 5, -1))
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.roi import RoiStore, RoiTrack
+
+
+def approx_box(box: tuple[float, ...] | None) -> object:
+    return pytest.approx(box, abs=1e-4) if box is not None else None
+
+
+def test_boxes_are_interpolated_between_keyframes() -> None:
+    track = RoiTrack()
+    track.set_key(20, (0.2, 0.2, 0.4, 0.4))
+    track.set_key(10, (0.0, 0.0, 0.2, 0.2))
+
+    assert track.box_at(9) is None
+    assert track.box_at(10) == approx_box((0.0, 0.0, 0.2, 0.2))
+    assert track.box_at(15) == approx_box((0.1, 0.1, 0.3, 0.3))
+    assert track.box_at(20) == approx_box((0.2, 0.2, 0.4, 0.4))
+    # Nothing after the last keyframe
+    assert track.box_at(21) is None
+
+
+def test_hidden_keyframe_holds_the_box_then_hides_it() -> None:
+    track = RoiTrack()
+    track.set_key(0, (0.1, 0.1, 0.2, 0.2))
+    track.set_key(10, None)
+    track.set_key(20, (0.5, 0.5, 0.6, 0.6))
+    track.set_key(30, (0.7, 0.7, 0.8, 0.8))
+
+    assert track.box_at(9) == approx_box((0.1, 0.1, 0.2, 0.2))
+    assert track.box_at(10) is None
+    # The animal is out of view until it is drawn again
+    assert track.box_at(15) is None
+    assert track.box_at(25) == approx_box((0.6, 0.6, 0.7, 0.7))
+
+
+def test_drawn_keyframes_win_over_tracked_ones() -> None:
+    track = RoiTrack()
+    track.set_key(0, (0.1, 0.1, 0.2, 0.2))
+    track.set_key(6, (0.3, 0.3, 0.4, 0.4))
+    track.add_tracked(
+        np.array([3, 6, 9], np.int64), np.full((3, 4), 0.5, np.float32)
+    )
+
+    assert track.frames.tolist() == [0, 3, 6, 9]
+    assert track.tracked.tolist() == [False, True, False, True]
+    assert track.box_at(6) == approx_box((0.3, 0.3, 0.4, 0.4))
+    assert track.next_drawn_key(0) == 6
+    track.clear_tracked(0, 6)
+    assert track.frames.tolist() == [0, 6, 9]
+
+
+def test_store_round_trip(tmp_path: Path) -> None:
+    store = RoiStore()
+    store.track("A").set_key(5, (0.1, 0.2, 0.3, 0.4))
+    store.track("A").set_key(9, None)
+    store.track("B").add_tracked(
+        np.array([100], np.int64), np.array([[0.5, 0.5, 0.9, 0.9]], np.float32)
+    )
+    path = tmp_path / "clip.roi.npz"
+    store.save(path)
+    loaded = RoiStore.load(path)
+
+    assert loaded.tracks["A"].frames.tolist() == [5, 9]
+    assert loaded.tracks["A"].box_at(7) == approx_box((0.1, 0.2, 0.3, 0.4))
+    assert loaded.tracks["A"].box_at(9) is None
+    assert loaded.tracks["B"].tracked.tolist() == [True]
+    assert dict(loaded.boxes_at(100)) == {"B": approx_box((0.5, 0.5, 0.9, 0.9))}
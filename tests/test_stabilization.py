@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.stabilization import stabilize_frame, warp_box
+
+
+def test_warped_box_follows_the_stabilized_frame() -> None:
+    frame = np.zeros((90, 160, 3), np.uint8)
+    frame[30:60, 40:80] = 255
+    correction = (0.05, -0.04, 0.0)
+
+    warped = stabilize_frame(frame, np.array(correction, np.float32))
+    rows, columns = np.nonzero(warped[:, :, 0] > 127)
+    left, top, right, bottom = warp_box(
+        (40 / 160, 30 / 90, 80 / 160, 60 / 90), correction, 160, 90
+    )
+
+    assert left * 160 == pytest.approx(columns.min(), abs=1.5)
+    assert top * 90 == pytest.approx(rows.min(), abs=1.5)
+    assert right * 160 == pytest.approx(columns.max() + 1, abs=1.5)
+    assert bottom * 90 == pytest.approx(rows.max() + 1, abs=1.5)
+
+
+def test_inverse_maps_a_drawn_box_back_onto_the_original_frame() -> None:
+    box = (0.3, 0.2, 0.6, 0.5)
+    correction = (-0.03, 0.02, 0.0)
+
+    drawn = warp_box(box, correction, 640, 360)
+    assert warp_box(drawn, correction, 640, 360, inverse=True) == (
+        pytest.approx(box)
+    )
+
+    # A rotated box grows to its bounding box but still contains the box
+    rotated = (0.01, 0.02, 0.05)
+    back = warp_box(
+        warp_box(box, rotated, 640, 360), rotated, 640, 360, inverse=True
+    )
+    assert back[0] <= box[0] and back[1] <= box[1]
+    assert back[2] >= box[2] and back[3] >= box[3]
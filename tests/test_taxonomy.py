@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import pytest
+
+from src.taxonomy import Taxonomy, TaxonomyError, load_taxonomy
+
+
+def test_same_category_name_at_different_depths() -> None:
+    taxonomy = Taxonomy.from_mapping(
+        {
+            "Grupales": {"Juego": {"Salto": "EVENT"}},
+            "Individuales": {"Juego": {"Salto": "STATE"}},
+        }
+    )
+
+    assert len(taxonomy) == 2
+    entry = taxonomy.lookup(("Individuales", "Juego"), "Salto")
+    assert entry is not None and entry.record_type == "STATE"
+    assert taxonomy.lookup(("Juego",), "Salto") is None
+
+
+def test_duplicate_full_path_is_rejected() -> None:
+    entries = Taxonomy.from_mapping({"Juego": {"Salto": "EVENT"}}).entries
+    with pytest.raises(TaxonomyError):
+        Taxonomy(entries * 2)
+
+
+@pytest.mark.parametrize(
+    ("name", "text"),
+    [("bad.json", '{"Juego": {'), ("bad.toml", "[Juego\n")],
+)
+def test_unparseable_file_is_a_taxonomy_error(
+    tmp_path: Path, name: str, text: str
+) -> None:
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(TaxonomyError, match=name):
+        load_taxonomy(path)
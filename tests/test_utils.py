@@ -0,0 +1,12 @@
+from pathlib import Path
+
+from src.roi import roi_path
+from src.utils import video_stem_path
+
+
+def test_files_of_same_named_videos_in_subfolders_are_kept_apart(
+    tmp_path: Path,
+) -> None:
+    assert video_stem_path(tmp_path, "a/clip.mp4") == tmp_path / "a" / "clip"
+    assert roi_path(tmp_path, "a/clip.mp4") != roi_path(tmp_path, "b/clip.mp4")
+    assert roi_path(tmp_path, "clip.v2.mp4") == tmp_path / "clip.v2.roi.npz"